@@ -0,0 +1,91 @@
+import os
+import re
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from src.festivals.parsers import parse_dong, parse_rude
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fixture:
+        return fixture.read()
+
+
+def parse_dong_with_soup(body: str) -> list[str]:
+    from bs4 import BeautifulSoup
+
+    artist_names = []
+    for artist_link in BeautifulSoup(body, features="html.parser").find_all("a"):
+        if (
+            artist_link.get("href") is not None
+            and artist_link.get("href").startswith(
+                "https://www.dongopenair.de/band-details/?band="
+            )
+            and not re.match("^\\d\\d:\\d\\d", artist_link.text.strip())
+            and artist_link.text.strip() != ""
+        ):
+            artist_names.append(artist_link.text.strip())
+    return artist_names
+
+
+def parse_rude_with_soup(body: str) -> list[str]:
+    from bs4 import BeautifulSoup
+
+    parsed_html = BeautifulSoup(body, features="html.parser")
+    return [
+        element.find_next("h2").find_next("a").text.split(" (")[0]
+        for element in parsed_html.find_all("div", attrs={"class": "cb-article-meta"})
+    ]
+
+
+def measure(parse: Callable[[str], list[str]], body: str, *, rounds: int) -> dict:
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parse(body)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(durations) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(*, rounds: int = 20) -> dict:
+    results = {}
+    for fixture, streaming, soup in [
+        ("dong.html", parse_dong, parse_dong_with_soup),
+        ("rude.html", parse_rude, parse_rude_with_soup),
+    ]:
+        body = read_fixture(fixture)
+        if streaming(body) != soup(body):
+            raise AssertionError(f"Parsers disagree on {fixture}")
+        results[fixture] = {
+            "streaming": measure(streaming, body, rounds=rounds),
+            "beautifulsoup": measure(soup, body, rounds=rounds),
+        }
+    return results
+
+
+def main():
+    for fixture, result in run().items():
+        streaming = result["streaming"]
+        soup = result["beautifulsoup"]
+        print(
+            f"{fixture:10} "
+            f"time {soup['median_ms']:7.2f} ms -> {streaming['median_ms']:6.2f} ms  "
+            f"peak memory {soup['peak_kib']:8.1f} KiB -> {streaming['peak_kib']:6.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
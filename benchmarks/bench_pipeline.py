@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import gzip
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from typing import Any
+
+from benchmarks.bench_extract import read_fixture
+from benchmarks.scale import (
+    artist_names,
+    dong_body,
+    rude_body,
+    spotify_response,
+    wacken_body,
+)
+from benchmarks.stubs import InMemoryS3, StubServices, StubSsm
+from handler import _handle
+from src.adapter.github import GitHubClient
+from src.adapter.http import HttpStack
+from src.adapter.spotify import ArtistInformation, SpotifyClient, select_artist
+from src.festivals import sources
+from src.festivals.bands import GENRES
+from src.festivals.output import serialize_artists, serialize_artists_v2
+from src.festivals.parsers import parse_dong, parse_rude, parse_wacken
+from src.festivals.run_request import RunRequest
+from src.metrics import Metrics
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCALES = [1_000, 10_000]
+PIPELINE_SCALES = [1_000]
+
+
+def measure(function: Callable[[], Any], *, rounds: int) -> dict:
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def lineup_bodies() -> dict[str, dict[str, str]]:
+    bodies = {
+        "fixture": {
+            "wacken": read_fixture("wacken.json"),
+            "dong": read_fixture("dong.html"),
+            "rude": read_fixture("rude.html"),
+        }
+    }
+    for scale in SCALES:
+        names = artist_names(scale)
+        bodies[str(scale)] = {
+            "wacken": wacken_body(names),
+            "dong": dong_body(names),
+            "rude": rude_body(names),
+        }
+    return bodies
+
+
+def bench_parse(*, rounds: int) -> dict:
+    parsers = {"wacken": parse_wacken, "dong": parse_dong, "rude": parse_rude}
+    results = {}
+    for scale, bodies in lineup_bodies().items():
+        for festival, body in bodies.items():
+            parse = parsers[festival]
+            result = measure(lambda parse=parse, body=body: parse(body), rounds=rounds)
+            result["items"] = len(parse(body))
+            results[f"parse/{festival}/{scale}"] = result
+    return results
+
+
+def search_responses() -> dict[str, dict[str, dict]]:
+    responses = {"fixture": json.loads(read_fixture("spotify_search.json"))}
+    for scale in SCALES:
+        responses[str(scale)] = {
+            name: spotify_response(name) for name in artist_names(scale)
+        }
+    return responses
+
+
+def bench_match(*, rounds: int) -> dict:
+    results = {}
+    for scale, responses in search_responses().items():
+
+        def match(responses=responses):
+            for name, response in responses.items():
+                select_artist(name=name, genres=GENRES, search_response=response)
+
+        result = measure(match, rounds=rounds)
+        result["items"] = len(responses)
+        results[f"match/{scale}"] = result
+    return results
+
+
+def published_artists() -> dict[str, list[ArtistInformation]]:
+    artists = {
+        "fixture": [
+            select_artist(name=name, genres=GENRES, search_response=response)
+            for name, response in search_responses()["fixture"].items()
+        ]
+    }
+    for scale in [80, *SCALES]:
+        artists[str(scale)] = [
+            ArtistInformation(
+                id=f"{i:022d}",
+                name=name,
+                search_name=name,
+                image_url=f"https://i.scdn.co/image/{i:040d}",
+            )
+            for i, name in enumerate(artist_names(scale))
+        ]
+    return artists
+
+
+def bench_serialize(*, rounds: int) -> dict:
+    results = {}
+    serializers = {"serialize": serialize_artists, "serialize_v2": serialize_artists_v2}
+    for scale, artists in published_artists().items():
+        for name, serialize in serializers.items():
+            result = measure(
+                lambda serialize=serialize, artists=artists: serialize(artists),
+                rounds=rounds,
+            )
+            result["items"] = len(artists)
+            results[f"{name}/{scale}"] = result
+    return results
+
+
+def output_sizes() -> dict:
+    sizes = {}
+    for scale, artists in published_artists().items():
+        v1 = serialize_artists(artists).encode()
+        v2 = serialize_artists_v2(artists).encode()
+        sizes[f"output/{scale}"] = {
+            "items": len(artists),
+            "v1_bytes": len(v1),
+            "v2_bytes": len(v2),
+            "v1_gzip_bytes": len(gzip.compress(v1)),
+            "v2_gzip_bytes": len(gzip.compress(v2)),
+        }
+    return sizes
+
+
+@contextlib.contextmanager
+def unthrottled_sources() -> Iterator[None]:
+    registered = dict(sources._sources)
+    for name, source in registered.items():
+        sources._sources[name] = dataclasses.replace(source, max_per_second=None)
+    try:
+        yield
+    finally:
+        sources._sources.update(registered)
+
+
+def run_pipeline(*, bodies: dict[str, str], spotify_responses: dict[str, dict]):
+    services = StubServices(
+        lineups={
+            "www.wacken.com": bodies["wacken"],
+            "www.dongopenair.de": bodies["dong"],
+            "www.rockunterdeneichen.de": bodies["rude"],
+        },
+        spotify_responses=spotify_responses,
+    )
+    http = HttpStack(transport=services.transport())
+    ssm = StubSsm()
+    spotify_client = SpotifyClient(ssm=ssm, http=http)
+    github_client = GitHubClient(ssm=ssm, http=http)
+
+    def run():
+        with Metrics().activate():
+            return asyncio.run(
+                _handle(
+                    s3=InMemoryS3(),
+                    spotify_client=spotify_client,
+                    github_client=github_client,
+                    run_request=RunRequest(festivals=["wacken", "dong"]),
+                    http=http,
+                )
+            )
+
+    return run
+
+
+def bench_pipeline(*, rounds: int) -> dict:
+    results = {}
+    bodies = lineup_bodies()
+    responses = search_responses()
+    with unthrottled_sources():
+        for scale in ["fixture", *map(str, PIPELINE_SCALES)]:
+            run = run_pipeline(bodies=bodies[scale], spotify_responses=responses[scale])
+            result = measure(run, rounds=rounds)
+            result["items"] = sum(
+                festival["artists"]
+                for name, festival in run().items()
+                if not name.startswith("http")
+            )
+            results[f"pipeline/{scale}"] = result
+    return results
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(*, rounds: int = 5, pipeline_rounds: int = 3) -> dict:
+    results = {}
+    results.update(bench_parse(rounds=rounds))
+    results.update(bench_match(rounds=rounds))
+    results.update(bench_serialize(rounds=rounds))
+    results.update(bench_pipeline(rounds=pipeline_rounds))
+    return {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+        "sizes": output_sizes(),
+    }
+
+
+def compare(baseline: dict, current: dict) -> dict[str, float]:
+    changes = {}
+    for name, result in current["results"].items():
+        if name in baseline["results"]:
+            before = baseline["results"][name]["median_ms"]
+            changes[name] = (result["median_ms"] - before) / before * 100
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="file for the JSON results")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    arguments = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    current = run(rounds=arguments.rounds)
+    output = arguments.output
+    if output is None:
+        output = os.path.join(RESULTS, f"{current['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(current, f, indent=2)
+
+    changes = {}
+    if arguments.compare is not None:
+        with open(arguments.compare) as f:
+            changes = compare(json.load(f), current)
+    for name, result in current["results"].items():
+        change = f"{changes[name]:+7.1f} %" if name in changes else ""
+        print(
+            f"{name:28} {result['median_ms']:10.3f} ms {result['peak_kib']:10.1f} KiB"
+            f" {result['items']:7d} items {change}"
+        )
+    for name, size in current["sizes"].items():
+        print(
+            f"{name:28} v1 {size['v1_bytes']:9d} B ({size['v1_gzip_bytes']:8d} B gzip)"
+            f"  v2 {size['v2_bytes']:9d} B ({size['v2_gzip_bytes']:8d} B gzip)"
+        )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import json
+from html import escape
+
+
+def artist_names(count: int) -> list[str]:
+    return [f"Synthetic Band {i:05d}" for i in range(count)]
+
+
+def wacken_body(names: list[str]) -> str:
+    return json.dumps(
+        [
+            {
+                "artist": {"title": name, "uid": i},
+                "stage": {"title": "Faster" if i % 2 == 0 else "Harder"},
+                "day": 1 + i % 4,
+            }
+            for i, name in enumerate(names)
+        ]
+    )
+
+
+def dong_body(names: list[str]) -> str:
+    rows = []
+    for name in names:
+        rows.append(
+            "<div class='band'><span>Fr 18:30</span>"
+            f"<a href='https://www.dongopenair.de/band-details/?band={escape(name)}'"
+            f" style='color: #ffffff'>{escape(name)}</a></div>"
+        )
+    return f"<html><body><nav><a href='/'>Home</a></nav>{''.join(rows)}</body></html>"
+
+
+def rude_body(names: list[str]) -> str:
+    rows = []
+    for i, name in enumerate(names):
+        rows.append(
+            "<article><div class='cb-article-meta'>"
+            f"<h2><a href='https://www.rockunterdeneichen.de/bands/{i}'>{escape(name)} (DE)</a></h2>"
+            "<span class='cb-date'>2026</span></div><p>Lorem ipsum dolor sit amet.</p></article>"
+        )
+    return f"<html><body>{''.join(rows)}</body></html>"
+
+
+def spotify_response(name: str, *, candidates: int = 5) -> dict:
+    items = []
+    for i in range(candidates):
+        items.append(
+            {
+                "id": f"{i:02d}{name.encode().hex()}"[:22],
+                "name": name if i == candidates - 1 else f"{name} Tribute {i}",
+                "genres": ["swedish death metal", "death metal"] if i % 2 else [],
+                "images": [
+                    {"height": 640, "url": f"https://i.scdn.co/{i}/640", "width": 640},
+                    {"height": 320, "url": f"https://i.scdn.co/{i}/320", "width": 320},
+                    {"height": 160, "url": f"https://i.scdn.co/{i}/160", "width": 160},
+                ],
+            }
+        )
+    return {"artists": {"items": items}}
@@ -0,0 +1,84 @@
+import httpx
+
+from benchmarks.scale import spotify_response
+
+
+class InMemoryS3:
+    def __init__(self):
+        self.objects: dict[str, str | bytes] = {}
+
+    def upload(
+        self,
+        *,
+        bucket_name: str,
+        key: str,
+        json: str,
+        cache_control: str | None = None,
+        if_match: str | None = None,
+        if_none_match: str | None = None,
+    ):
+        self.objects[key] = json
+
+    def upload_bytes(
+        self,
+        *,
+        bucket_name: str,
+        key: str,
+        body: bytes,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ):
+        self.objects[key] = body
+
+    def download(self, *, bucket_name: str, key: str) -> str | None:
+        return self.objects.get(key)
+
+    def download_with_etag(
+        self, *, bucket_name: str, key: str
+    ) -> tuple[str | None, str | None]:
+        return self.objects.get(key), None
+
+
+class StubSsm:
+    def get_parameters(self, *, parameter_names: list[str]) -> dict:
+        return {name: "stub" for name in parameter_names}
+
+
+class StubServices:
+    def __init__(
+        self,
+        *,
+        lineups: dict[str, str],
+        spotify_responses: dict[str, dict] | None = None,
+    ):
+        self.lineups = lineups
+        self.spotify_responses = {} if spotify_responses is None else spotify_responses
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in self.lineups:
+            return httpx.Response(200, text=self.lineups[host])
+        if host == "accounts.spotify.com":
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": "stub",
+                    "token_type": "bearer",
+                    "expires_in": 3600,
+                },
+            )
+        if host == "api.spotify.com":
+            name = request.url.params["q"]
+            if name not in self.spotify_responses:
+                return httpx.Response(200, json=spotify_response(name))
+            return httpx.Response(200, json=self.spotify_responses[name])
+        if host == "api.github.com" and request.method == "GET":
+            return httpx.Response(200, json=[])
+        if host == "api.github.com" and request.method == "POST":
+            return httpx.Response(201, json={})
+        if host == "api.github.com":
+            return httpx.Response(200, json={})
+        return httpx.Response(404)
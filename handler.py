@@ -1,15 +1,52 @@
 import asyncio
+import functools
 import json
 import logging
 import os
-
-import boto3
+import time
 
 from src.adapter.github import GitHubClient
+from src.adapter.http import HttpStack
+from src.adapter.http_cache import cache_from_env
+from src.adapter.http_recording import recorder_from_env, replay_from_env
+from src.adapter.http_stats import HttpStatsMiddleware
+from src.adapter.http_tracing import TracingMiddleware
+from src.adapter.invoker import LambdaInvoker, LocalInvoker
 from src.adapter.s3 import S3
+from src.adapter.search_archive import search_archive_from_env
+from src.adapter.spotify import ArtistInformation, SpotifyClient
 from src.adapter.ssm import Ssm
-from src.adapter.spotify import SpotifyClient, ArtistInformation
-from src.festivals.bands import get_wacken_artists, get_dong_artists, get_rude_artists
+from src.executor import Executor
+from src.festivals.bands import SharedSearches, get_festival_artists, get_lineup
+from src.festivals.catalog import CatalogPublisher
+from src.festivals.changes import (
+    Change,
+    ChangeFeed,
+    diff_artists,
+    notifier_from_env,
+)
+from src.festivals.checkpoint import (
+    DEFAULT_MAX_AGE_SECONDS,
+    Checkpoint,
+    CheckpointStore,
+    lineup_fingerprint,
+)
+from src.festivals.deadline import Deadline
+from src.festivals.history import HistoryStore
+from src.festivals.images import image_mirror_from_env
+from src.festivals.manifest import Manifest, ManifestStore
+from src.festivals.output import SERIALIZERS, output_versions_from_env, versioned_key
+from src.festivals.retry_queue import RetryQueue, RetryQueueStore
+from src.festivals.run_request import RunRequest
+from src.festivals.sources import FestivalSource, get_source
+from src.festivals.timetable import (
+    Slot,
+    Timetable,
+    TimetablePublisher,
+    timetables_enabled,
+)
+from src.metrics import Metrics, current_metrics
+from src.tracing import Tracer, span
 
 logger = logging.getLogger(__name__)
 
@@ -20,93 +57,408 @@ def _configure_logger():
 
 
 async def _handle(
-    *, s3: S3, spotify_client: SpotifyClient, github_client: GitHubClient
-):
+    *,
+    s3: S3,
+    spotify_client: SpotifyClient,
+    github_client: GitHubClient,
+    deadline: Deadline | None = None,
+    run_request: RunRequest | None = None,
+    executor: Executor | None = None,
+    http: HttpStack | None = None,
+) -> dict:
+    if run_request is None:
+        run_request = RunRequest()
+    if executor is None:
+        executor = Executor()
+    if http is None:
+        http = HttpStack()
+    bucket_name = os.getenv("FESTIVAL_ARTISTS_BUCKET")
+    checkpoint_store = CheckpointStore(s3=s3, bucket_name=bucket_name)
+    checkpoints = {
+        festival: checkpoint_store.load(
+            festival=festival, output_key=get_source(festival).output_key
+        )
+        for festival in run_request.festivals
+    }
+    retry_queue_store = RetryQueueStore(s3=s3, bucket_name=bucket_name)
+    retry_queues = {
+        festival: retry_queue_store.load(festival=festival)
+        for festival in run_request.festivals
+    }
+
+    if deadline is None:
+        deadline = Deadline()
+    max_age = float(os.getenv("CHECKPOINT_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS))
+    shared_searches = SharedSearches()
+    output_versions = output_versions_from_env()
+    timetables = {} if timetables_enabled() else None
+
+    festival_tasks = {}
     try:
         async with asyncio.TaskGroup() as tg:
-            wacken_task = tg.create_task(
-                get_wacken_artists(
-                    spotify_client=spotify_client, github_client=github_client
+            for festival in run_request.festivals:
+                festival_tasks[festival] = tg.create_task(
+                    _isolate_festival(
+                        festival,
+                        _resolve_festival(
+                            source=get_source(festival),
+                            spotify_client=spotify_client,
+                            github_client=github_client,
+                            checkpoint=checkpoints[festival],
+                            retry_queue=retry_queues[festival],
+                            deadline=deadline,
+                            run_request=run_request,
+                            executor=executor,
+                            http=http,
+                            max_age=max_age,
+                            shared_searches=shared_searches,
+                            timetables=timetables,
+                        ),
+                    )
                 )
+    except Exception as e:
+        logger.error("Error while retrieving artists", exc_info=e)
+
+    metrics = current_metrics()
+    summary = {}
+    published = {}
+    publications = {}
+    manifest_store = ManifestStore(s3=s3, bucket_name=bucket_name)
+    manifest = manifest_store.load()
+    change_feed = ChangeFeed(
+        s3=s3, bucket_name=bucket_name, notifier=notifier_from_env()
+    )
+    history_store = HistoryStore(s3=s3, bucket_name=bucket_name)
+    for festival, task in festival_tasks.items():
+        if task.cancelled() or task.result() is None:
+            summary[festival] = {"failed": True}
+            continue
+        fingerprint, artist_names, artists = task.result()
+        checkpoint = checkpoints[festival]
+        if artists is None:
+            logger.info(f"Lineup of {festival} is unchanged, skipping")
+            metrics.increment("SkippedUnchanged", festival=festival)
+            summary[festival] = {
+                "artists": len(checkpoint.artists),
+                "skipped": "unchanged",
+            }
+            # The unchanged lineup is still on the site, so its artists were seen now
+            _record_history(
+                history_store,
+                festival=festival,
+                artist_names=artist_names,
+                ids={name: artist.id for name, artist in checkpoint.artists.items()},
             )
-            dong_task = tg.create_task(
-                get_dong_artists(
-                    spotify_client=spotify_client, github_client=github_client
-                )
+            continue
+        if run_request.covers_whole_lineup() and not deadline.is_running_low():
+            checkpoint.fingerprint = fingerprint
+        output_key = get_source(festival).output_key
+        entry = manifest.festivals.get(festival)
+        sequence = 0 if entry is None else entry.sequence
+        # The first change of a festival is a full snapshot so the feed replays from empty
+        previous = None
+        if sequence > 0:
+            previous = s3.download(bucket_name=bucket_name, key=output_key)
+        bodies = await _publish(
+            s3=s3,
+            executor=executor,
+            checkpoint_store=checkpoint_store,
+            checkpoint=checkpoint,
+            key=output_key,
+            artists=artists,
+            versions=output_versions,
+        )
+        published[festival] = bodies["v1"]
+        # The snapshot only tells which content objects are new, the manifest
+        # itself is committed once all festivals are published
+        manifest_store.publish_objects(
+            manifest.update(
+                festival=festival,
+                bodies=bodies,
+                artists=len(artists),
+                now=time.time(),
             )
-            rude_task = tg.create_task(
-                get_rude_artists(
-                    spotify_client=spotify_client,
-                    github_client=github_client,
-                    artists=[
-                        "Acranius",
-                        "Fall of Serenity",
-                        "Horn",
-                        "Fleshworks",
-                        "Jungle Rot",
-                        "HatedotCom",
-                        "Servant",
-                        "Apep",
-                        "Vomitory",
-                        "Psycrotted",
-                        "Dark Oath",
-                        "Temple of Dread",
-                        "Torture Killer",
-                        "Confession by Silence",
-                        "V8 Wankers",
-                        "Chaos and Confusion",
-                        "Iron Priest",
-                        "Non Est Deus",
-                    ],
+        )
+        records = json.loads(bodies["v1"])
+        diff = diff_artists(
+            before=[] if previous is None else json.loads(previous), after=records
+        )
+        # The patch exists before the manifest advertises its sequence, so the
+        # feed never has a gap that consumers would wait on
+        change = None
+        if not diff.is_empty():
+            try:
+                change = change_feed.append(
+                    festival=festival, after=sequence, diff=diff, now=time.time()
+                )
+            except Exception as e:
+                logger.error(f"Failed to publish the change of {festival}", exc_info=e)
+        publications[festival] = (bodies, len(artists), change)
+        # History follows the scraped lineup, so an artist whose lookup failed was
+        # still seen and is not reported as removed
+        _record_history(
+            history_store,
+            festival=festival,
+            artist_names=artist_names,
+            ids={artist.search_name: artist.id for artist in artists},
+        )
+        retry_queue_store.save(retry_queues[festival])
+        summary[festival] = {"artists": len(artists)}
+        stale = [artist for artist in artists if artist.stale]
+        metrics.increment("PublishedArtists", len(artists), festival=festival)
+        metrics.increment("StaleArtists", len(stale), festival=festival)
+        if len(stale) > 0:
+            summary[festival]["stale"] = len(stale)
+        if len(retry_queues[festival].entries) > 0:
+            summary[festival]["retry_queue"] = len(retry_queues[festival].entries)
+    changes = []
+    if len(publications) > 0:
+        try:
+            manifest_store.commit(
+                functools.partial(
+                    _record_publications, publications=publications, now=time.time()
                 )
             )
+            changes = [c for _, _, c in publications.values() if c is not None]
+        except Exception as e:
+            logger.error("Failed to commit the manifest", exc_info=e)
+    for change in changes:
+        change_feed.notify(change)
+        metrics.increment("LineupChanges", festival=change.festival)
+        logger.info(f"Published {change.key}")
+    timetable_publisher = TimetablePublisher(s3=s3, bucket_name=bucket_name)
+    for festival, slots in (timetables or {}).items():
+        if len(slots) == 0:
+            continue
+        try:
+            timetable_publisher.publish(Timetable.build(festival=festival, slots=slots))
+        except Exception as e:
+            logger.error(f"Failed to publish the timetable of {festival}", exc_info=e)
+    if len(published) > 0:
+        try:
+            CatalogPublisher(s3=s3, bucket_name=bucket_name).publish(
+                published=published
+            )
+        except Exception as e:
+            logger.error("Failed to publish the artist catalog", exc_info=e)
+    image_mirror = image_mirror_from_env(s3=s3)
+    if image_mirror is not None and len(published) > 0:
+        records = [record for body in published.values() for record in json.loads(body)]
+        try:
+            stats = await image_mirror.mirror(records, http=http, deadline=deadline)
+            summary["images"] = stats.to_dict()
+            metrics.increment("MirroredImages", stats.downloaded)
+            metrics.increment("MirroredImageFailures", stats.failed)
+        except Exception as e:
+            logger.error("Failed to mirror artist images", exc_info=e)
+        finally:
+            image_mirror.close()
+    if http.stats is not None:
+        summary["http"] = http.stats.to_dict()
+        logger.info(f"HTTP {summary['http']}")
+    if http.cache is not None:
+        summary["http_cache"] = http.cache.stats.to_dict()
+        metrics.increment("HttpCacheHits", http.cache.stats.hits)
+        metrics.increment("HttpCacheRevalidated", http.cache.stats.revalidated)
+        metrics.increment("HttpCacheMisses", http.cache.stats.misses)
+        logger.info(f"HTTP cache {summary['http_cache']}")
+    return summary
+
+
+async def _isolate_festival(festival: str, resolve):
+    try:
+        return await resolve
     except Exception as e:
-        logger.error("Error while retrieving artists", exc_info=e)
+        logger.error(
+            f"Failed to resolve {festival}, keeping its previous outputs", exc_info=e
+        )
+        current_metrics().increment("FestivalFailures", festival=festival)
+        return None
+
 
-    wacken_artists: list[ArtistInformation] = wacken_task.result()
-    wacken_body = []
-    for artist in wacken_artists:
-        wacken_body.append(
-            {"id": artist.id, "artist": artist.name, "image": artist.image_url}
+async def _resolve_festival(
+    *,
+    source: FestivalSource,
+    spotify_client: SpotifyClient,
+    github_client: GitHubClient,
+    checkpoint: Checkpoint,
+    retry_queue: RetryQueue,
+    deadline: Deadline,
+    run_request: RunRequest,
+    executor: Executor,
+    http: HttpStack,
+    max_age: float,
+    shared_searches: SharedSearches | None = None,
+    timetables: dict[str, list[Slot]] | None = None,
+) -> tuple[str, list[str], list[ArtistInformation] | None]:
+    with (
+        current_metrics().timer("FestivalDuration", festival=source.name),
+        span("festival", festival=source.name) as festival_span,
+    ):
+        lineup = run_request.lineups.get(source.name, source.lineup)
+        artist_names = await get_lineup(
+            source=source,
+            artists=None if lineup is None else list(lineup),
+            executor=executor,
+            http=http,
+            timetables=timetables,
         )
-    s3.upload(
-        bucket_name=os.getenv("FESTIVAL_ARTISTS_BUCKET"),
-        key="wacken.json",
-        json=json.dumps(wacken_body),
-    )
+        festival_span.set_attribute("lineup.artists", len(artist_names))
+        fingerprint = lineup_fingerprint(artist_names)
+        now = time.time()
+        if (
+            run_request.may_skip_unchanged()
+            and checkpoint.is_unchanged(
+                fingerprint=fingerprint, now=now, max_age=max_age
+            )
+            and len(retry_queue.due_names(now=now)) == 0
+        ):
+            festival_span.set_attribute("festival.skipped", True)
+            return fingerprint, artist_names, None
 
-    dong_artists: list[ArtistInformation] = dong_task.result()
-    dong_body = []
-    for artist in dong_artists:
-        dong_body.append(
-            {"id": artist.id, "artist": artist.name, "image": artist.image_url}
+        artists = await get_festival_artists(
+            source=source,
+            spotify_client=spotify_client,
+            github_client=github_client,
+            artists=artist_names,
+            checkpoint=checkpoint,
+            retry_queue=retry_queue,
+            deadline=deadline,
+            run_request=run_request,
+            executor=executor,
+            http=http,
+            shared_searches=shared_searches,
         )
-    s3.upload(
-        bucket_name=os.getenv("FESTIVAL_ARTISTS_BUCKET"),
-        key="dong.json",
-        json=json.dumps(dong_body),
-    )
+        return fingerprint, artist_names, artists
 
-    rude_artists: list[ArtistInformation] = rude_task.result()
-    rude_body = []
-    for artist in rude_artists:
-        rude_body.append(
-            {"id": artist.id, "artist": artist.name, "image": artist.image_url}
+
+def _record_history(
+    history_store: HistoryStore,
+    *,
+    festival: str,
+    artist_names: list[str],
+    ids: dict[str, str | None],
+) -> None:
+    try:
+        history = history_store.load(festival=festival)
+        history.record(artist_names=artist_names, ids=ids, now=time.time())
+        history_store.save(history)
+    except Exception as e:
+        logger.error(f"Failed to record the lineup history of {festival}", exc_info=e)
+
+
+def _record_publications(
+    manifest: Manifest,
+    *,
+    publications: dict[str, tuple[dict[str, str], int, Change | None]],
+    now: float,
+) -> None:
+    for festival, (bodies, artists, change) in publications.items():
+        manifest.update(festival=festival, bodies=bodies, artists=artists, now=now)
+        if change is not None:
+            manifest.advance_sequence(festival, change.sequence)
+
+
+async def _publish(
+    *,
+    s3: S3,
+    executor: Executor,
+    checkpoint_store: CheckpointStore,
+    checkpoint: Checkpoint,
+    key: str,
+    artists: list[ArtistInformation],
+    versions: list[str] | None = None,
+) -> dict[str, str]:
+    bodies = {}
+    for version in ["v1"] if versions is None else versions:
+        bodies[version] = await executor.run(SERIALIZERS[version], artists)
+    with current_metrics().timer("UploadDuration", festival=checkpoint.festival):
+        for version, body in bodies.items():
+            s3.upload(
+                bucket_name=checkpoint_store.bucket_name,
+                key=versioned_key(key, version),
+                json=body,
+            )
+
+    checkpoint.update(artists=artists, now=time.time())
+    checkpoint_store.save(checkpoint)
+    return bodies
+
+
+def _fan_out(*, run_request: RunRequest, invoker: LambdaInvoker | LocalInvoker) -> dict:
+    summary = {}
+    for festival in run_request.festivals:
+        summary[festival] = invoker.invoke(
+            payload=run_request.for_festival(festival).to_event()
         )
-    s3.upload(
-        bucket_name=os.getenv("FESTIVAL_ARTISTS_BUCKET"),
-        key="rude.json",
-        json=json.dumps(rude_body),
-    )
+    return summary
+
+
+def _run_profiled(handle, *, s3: S3, run_request: RunRequest) -> dict:
+    from src.profiling import RunProfiler, profile_name, profile_writer_from_env
+
+    profiler = RunProfiler(name=profile_name(festivals=run_request.festivals))
+    try:
+        return profiler.run(handle)
+    finally:
+        try:
+            location = profile_writer_from_env(s3=s3).write(profiler.profile)
+            logger.info(f"Wrote profile to {location}")
+        except Exception as e:
+            logger.error("Failed to write profile", exc_info=e)
 
 
 def handler(event, context):
+    import boto3
+
     _configure_logger()
+    run_request = RunRequest.from_event(event)
+    if run_request.fan_out:
+        invoker = LambdaInvoker(
+            lambda_client=boto3.client("lambda"),
+            function_name=os.environ["AWS_LAMBDA_FUNCTION_NAME"],
+        )
+        return {"fan_out": _fan_out(run_request=run_request, invoker=invoker)}
+
     s3 = S3(s3_client=(boto3.client("s3")))
     ssm = Ssm(ssm_client=(boto3.client("ssm", "eu-west-1")))
-    spotify_client = SpotifyClient(ssm=ssm)
-    github_client = GitHubClient(ssm=ssm)
-
-    asyncio.run(
-        _handle(s3=s3, spotify_client=spotify_client, github_client=github_client)
+    executor = Executor.from_env()
+    recorder = recorder_from_env(s3=s3)
+    archive = search_archive_from_env(s3=s3)
+    http = HttpStack(
+        middlewares=[TracingMiddleware()],
+        cache=cache_from_env(s3=s3),
+        stats=HttpStatsMiddleware(),
+        recorder=None if recorder is None else recorder.middleware,
+        transport=replay_from_env(),
     )
+    metrics = Metrics.from_env()
+    tracer = Tracer.from_env()
+
+    with metrics.activate(), tracer.activate():
+        try:
+            with tracer.span("run", festivals=",".join(run_request.festivals)):
+                spotify_client = SpotifyClient(
+                    ssm=ssm, executor=executor, http=http, archive=archive
+                )
+                github_client = GitHubClient(ssm=ssm, http=http)
+                handle = _handle(
+                    s3=s3,
+                    spotify_client=spotify_client,
+                    github_client=github_client,
+                    deadline=Deadline.from_context(context),
+                    run_request=run_request,
+                    executor=executor,
+                    http=http,
+                )
+                if run_request.profile or os.environ.get("PROFILE", "0") != "0":
+                    return _run_profiled(handle, s3=s3, run_request=run_request)
+                return asyncio.run(handle)
+        finally:
+            executor.shutdown()
+            if archive is not None:
+                archive.flush()
+            if recorder is not None:
+                recorder.save()
+            metrics.flush()
+            tracer.flush()
@@ -0,0 +1,119 @@
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+
+TIME_BUDGET_MS = 300
+MODULE_BUDGET = 250
+LAZY_MODULES = ["boto3", "botocore", "bs4", "aiometer"]
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MARKER = "loaded-modules:"
+
+
+@dataclass
+class ImportedModule:
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    cumulative_us: int
+    loaded_modules: list[str]
+    imports: list[ImportedModule]
+
+    @property
+    def cumulative_ms(self) -> float:
+        return self.cumulative_us / 1000
+
+    def heaviest(self, count: int) -> list[ImportedModule]:
+        return sorted(self.imports, key=lambda i: i.self_us, reverse=True)[:count]
+
+
+def profile_import(module: str) -> ImportProfile:
+    code = (
+        "import sys\n"
+        "before = set(sys.modules)\n"
+        f"import {module}\n"
+        f"print({_MARKER!r} + ','.join(sorted(set(sys.modules) - before)))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=_PROJECT_ROOT,
+        check=True,
+    )
+
+    imports = []
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        imported = ImportedModule(
+            name=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative),
+        )
+        imports.append(imported)
+        if name.rstrip() == f" {module}":
+            cumulative_us = imported.cumulative_us
+
+    loaded_modules = []
+    for line in completed.stdout.splitlines():
+        if line.startswith(_MARKER):
+            loaded_modules = [m for m in line[len(_MARKER) :].split(",") if m]
+
+    return ImportProfile(
+        module=module,
+        cumulative_us=cumulative_us,
+        loaded_modules=loaded_modules,
+        imports=imports,
+    )
+
+
+def fastest_import(module: str, *, rounds: int) -> ImportProfile:
+    profiles = [profile_import(module) for _ in range(rounds)]
+    return min(profiles, key=lambda profile: profile.cumulative_us)
+
+
+def time_budget_ms() -> float:
+    return float(os.environ.get("IMPORT_TIME_BUDGET_MS", TIME_BUDGET_MS))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile the cold import of a module")
+    parser.add_argument("module", nargs="?", default="handler")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=time_budget_ms())
+    parser.add_argument("--max-modules", type=int, default=MODULE_BUDGET)
+    args = parser.parse_args()
+
+    profile = profile_import(args.module)
+    print(
+        f"import {profile.module}: {profile.cumulative_ms:.1f} ms, "
+        f"{len(profile.loaded_modules)} modules"
+    )
+    for imported in profile.heaviest(args.top):
+        print(f"{imported.self_us / 1000:8.1f} ms  {imported.name}")
+
+    eager = [m for m in LAZY_MODULES if m in profile.loaded_modules]
+    if eager:
+        print(f"Modules that should be imported lazily: {', '.join(eager)}")
+    if (
+        profile.cumulative_ms > args.max_ms
+        or len(profile.loaded_modules) > args.max_modules
+        or eager
+    ):
+        print("Import budget exceeded")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
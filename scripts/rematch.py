@@ -0,0 +1,108 @@
+import argparse
+import json
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time
+
+from src.adapter.search_archive import (
+    ArchivedSearch,
+    DirectoryArchiveStore,
+    S3ArchiveStore,
+    SearchArchive,
+)
+from src.adapter.spotify import select_artist
+from src.festivals.bands import GENRES
+
+
+@dataclass
+class MatchChange:
+    query: str
+    market: str
+    before: dict
+    after: dict
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "market": self.market,
+            "before": self.before,
+            "after": self.after,
+        }
+
+
+def rematch(
+    searches: Iterable[ArchivedSearch], *, genres: list[str]
+) -> tuple[int, list[MatchChange]]:
+    count = 0
+    changes = []
+    for search in searches:
+        count += 1
+        after = select_artist(
+            name=search.query, genres=genres, search_response=search.response
+        ).to_selection()
+        if after != search.selected:
+            changes.append(
+                MatchChange(
+                    query=search.query,
+                    market=search.market,
+                    before=search.selected,
+                    after=after,
+                )
+            )
+    return count, changes
+
+
+def _archive(location: str, *, bucket: str | None) -> SearchArchive:
+    if location == "s3":
+        import boto3
+
+        from src.adapter.s3 import S3
+
+        return SearchArchive(
+            store=S3ArchiveStore(s3=S3(boto3.client("s3")), bucket_name=bucket)
+        )
+    return SearchArchive(
+        store=DirectoryArchiveStore(directory=location.removeprefix("dir:"))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-run artist matching over archived Spotify search responses"
+    )
+    parser.add_argument("archive", help="dir:<path> or s3")
+    parser.add_argument("--bucket", help="festival bucket for an s3 archive")
+    parser.add_argument("--json", action="store_true", help="print changes as JSON")
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="only re-match searches from this date (YYYY-MM-DD) on",
+    )
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="rebuild the archive index from all runs first",
+    )
+    arguments = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    archive = _archive(arguments.archive, bucket=arguments.bucket)
+    if arguments.rebuild_index:
+        print(f"Indexed {archive.rebuild_index()} archived searches")
+    since = None
+    if arguments.since is not None:
+        since = datetime.combine(arguments.since, time.min, UTC).timestamp()
+    count, changes = rematch(archive.searches(since=since), genres=GENRES)
+    if arguments.json:
+        print(json.dumps([change.to_dict() for change in changes], indent=2))
+        return
+    for change in changes:
+        print(f"{change.query} ({change.market})")
+        print(f"  before: {change.before}")
+        print(f"  after:  {change.after}")
+    print(f"{len(changes)} of {count} archived searches would change")
+
+
+if __name__ == "__main__":
+    main()
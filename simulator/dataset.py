@@ -0,0 +1,51 @@
+import json
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from benchmarks.scale import (
+    artist_names,
+    dong_body,
+    rude_body,
+    spotify_response,
+    wacken_body,
+)
+
+RENDERERS: dict[str, Callable[[list[str]], str]] = {
+    "wacken": wacken_body,
+    "dong": dong_body,
+    "rude": rude_body,
+}
+
+
+@dataclass
+class Dataset:
+    lineups: dict[str, list[str]]
+    spotify: dict[str, dict] = field(default_factory=dict)
+    issues: list[dict] = field(default_factory=list)
+
+    @classmethod
+    def synthetic(cls, *, artists: int, festivals: list[str] | None = None):
+        names = artist_names(artists)
+        festivals = list(RENDERERS) if festivals is None else festivals
+        return cls(
+            lineups={festival: names for festival in festivals},
+            spotify={name: spotify_response(name) for name in names},
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "Dataset":
+        with open(path) as f:
+            document = json.load(f)
+        return cls(
+            lineups=document["lineups"],
+            spotify=document.get("spotify", {}),
+            issues=document.get("issues", []),
+        )
+
+    def lineup_body(self, festival: str) -> str | None:
+        if festival not in self.lineups or festival not in RENDERERS:
+            return None
+        return RENDERERS[festival](self.lineups[festival])
+
+    def search(self, name: str) -> dict:
+        return self.spotify.get(name, {"artists": {"items": []}})
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from benchmarks.stubs import InMemoryS3, StubSsm
+from handler import _handle
+from simulator.server import base_urls
+from src.adapter.github import GitHubClient
+from src.adapter.http import HttpStack
+from src.adapter.http_stats import HttpStatsMiddleware
+from src.adapter.spotify import SpotifyClient
+from src.executor import Executor
+from src.festivals.run_request import RunRequest
+from src.metrics import Metrics
+
+
+def drive(*, url: str, festivals: list[str], http: HttpStack | None = None) -> dict:
+    os.environ.update(base_urls(url))
+    if http is None:
+        http = HttpStack(stats=HttpStatsMiddleware())
+    ssm = StubSsm()
+    executor = Executor.from_env()
+    start = time.perf_counter()
+    try:
+        with Metrics().activate():
+            summary = asyncio.run(
+                _handle(
+                    s3=InMemoryS3(),
+                    spotify_client=SpotifyClient(ssm=ssm, executor=executor, http=http),
+                    github_client=GitHubClient(ssm=ssm, http=http),
+                    run_request=RunRequest(festivals=festivals),
+                    executor=executor,
+                    http=http,
+                )
+            )
+    finally:
+        executor.shutdown()
+    summary["duration_s"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the scraper against a running simulator"
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--festivals", nargs="+", default=["wacken", "dong", "rude"])
+    arguments = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    summary = drive(url=arguments.url, festivals=arguments.festivals)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
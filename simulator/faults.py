@@ -0,0 +1,117 @@
+import json
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+
+class Service(StrEnum):
+    ACCOUNTS = "accounts"
+    SPOTIFY = "spotify"
+    GITHUB = "github"
+    FESTIVALS = "festivals"
+    IMAGES = "images"
+
+
+class Distribution(StrEnum):
+    FIXED = "fixed"
+    UNIFORM = "uniform"
+    LOGNORMAL = "lognormal"
+
+
+@dataclass(frozen=True)
+class Latency:
+    distribution: Distribution = Distribution.FIXED
+    ms: float = 0
+    spread: float = 0
+
+    @classmethod
+    def from_dict(cls, document: dict) -> "Latency":
+        return cls(
+            distribution=Distribution(document.get("distribution", Distribution.FIXED)),
+            ms=document.get("ms", 0),
+            spread=document.get("spread", 0),
+        )
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == Distribution.UNIFORM:
+            milliseconds = rng.uniform(self.ms - self.spread, self.ms + self.spread)
+        elif self.distribution == Distribution.LOGNORMAL:
+            milliseconds = self.ms * rng.lognormvariate(0, self.spread)
+        else:
+            milliseconds = self.ms
+        return max(milliseconds, 0) / 1000
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    per_second: float
+    burst: int
+
+    @classmethod
+    def from_dict(cls, document: dict) -> "RateLimit":
+        per_second = document["per_second"]
+        return cls(
+            per_second=per_second,
+            burst=document.get("burst", max(int(per_second), 1)),
+        )
+
+
+@dataclass(frozen=True)
+class Faults:
+    latency: Latency = Latency()
+    error_rate: float = 0
+    throttle_rate: float = 0
+    rate_limit: RateLimit | None = None
+
+    @classmethod
+    def from_dict(cls, document: dict) -> "Faults":
+        rate_limit = document.get("rate_limit")
+        return cls(
+            latency=Latency.from_dict(document.get("latency", {})),
+            error_rate=document.get("error_rate", 0),
+            throttle_rate=document.get("throttle_rate", 0),
+            rate_limit=None if rate_limit is None else RateLimit.from_dict(rate_limit),
+        )
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    services: dict[Service, Faults] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, document: dict) -> "FaultProfile":
+        return cls(
+            services={
+                Service(name): Faults.from_dict(faults)
+                for name, faults in document.items()
+            }
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "FaultProfile":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def for_service(self, service: Service) -> Faults:
+        return self.services.get(service, Faults())
+
+
+class TokenBucket:
+    def __init__(self, *, rate_limit: RateLimit, clock: Callable[[], float]):
+        self.rate_limit = rate_limit
+        self.clock = clock
+        self.tokens = float(rate_limit.burst)
+        self.updated = clock()
+
+    def acquire(self) -> float | None:
+        now = self.clock()
+        self.tokens = min(
+            float(self.rate_limit.burst),
+            self.tokens + (now - self.updated) * self.rate_limit.per_second,
+        )
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate_limit.per_second
@@ -0,0 +1,31 @@
+import hashlib
+import struct
+import zlib
+
+DEFAULT_SIZE = 64
+MAX_SIZE = 640
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    checksum = zlib.crc32(kind + data)
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", checksum)
+
+
+def png(*, width: int, height: int, color: tuple[int, int, int]) -> bytes:
+    row = b"\x00" + bytes(color) * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(row * height))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def image_body(path: str) -> bytes:
+    # Every path gets its own solid color so distinct URLs have distinct
+    # content, and a trailing number like Spotify's /640 sets the size.
+    digest = hashlib.sha256(path.encode("utf-8")).digest()
+    last = path.rstrip("/").rsplit("/", 1)[-1]
+    size = min(int(last), MAX_SIZE) if last.isdigit() else DEFAULT_SIZE
+    return png(width=size, height=size, color=(digest[0], digest[1], digest[2]))
@@ -0,0 +1,133 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+import httpx
+
+from simulator.dataset import Dataset
+from simulator.faults import FaultProfile
+from simulator.service import Simulator
+
+
+def base_urls(url: str) -> dict[str, str]:
+    url = url.rstrip("/")
+    return {
+        "SPOTIFY_ACCOUNTS_URL": f"{url}/accounts",
+        "SPOTIFY_API_URL": f"{url}/spotify",
+        "GITHUB_API_URL": f"{url}/github",
+        "FESTIVAL_BASE_URL": f"{url}/festivals",
+        "SPOTIFY_IMAGE_URL": f"{url}/images",
+    }
+
+
+def _request_handler(simulator: Simulator) -> type[BaseHTTPRequestHandler]:
+    class RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length) if length > 0 else b""
+            if self.path == "/_stats":
+                response = httpx.Response(200, json=simulator.stats_dict())
+            else:
+                request = httpx.Request(
+                    self.command,
+                    f"http://{self.headers.get('Host', 'simulator')}{self.path}",
+                    headers=dict(self.headers),
+                    content=body,
+                )
+                reply = simulator.respond(request)
+                time.sleep(reply.delay)
+                response = reply.response
+            content = response.content
+            self.send_response(response.status_code)
+            self.send_header(
+                "Content-Type", response.headers.get("Content-Type", "text/plain")
+            )
+            if "Retry-After" in response.headers:
+                self.send_header("Retry-After", response.headers["Retry-After"])
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = _handle
+        do_POST = _handle
+        do_PATCH = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return RequestHandler
+
+
+class SimulatorServer:
+    def __init__(self, *, simulator: Simulator, host: str = "127.0.0.1", port: int = 0):
+        self.simulator = simulator
+        self.server = ThreadingHTTPServer((host, port), _request_handler(simulator))
+        self.server.daemon_threads = True
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SimulatorServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate Spotify, GitHub and the festival sites"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--dataset", help="JSON file with lineups and search results")
+    parser.add_argument("--faults", help="JSON file with latency and fault settings")
+    parser.add_argument("--seed", type=int)
+    arguments = parser.parse_args()
+
+    if arguments.dataset is not None:
+        dataset = Dataset.from_file(arguments.dataset)
+    else:
+        dataset = Dataset.synthetic(artists=arguments.artists)
+    faults = None
+    if arguments.faults is not None:
+        faults = FaultProfile.from_file(arguments.faults)
+    simulator = Simulator(dataset=dataset, faults=faults, seed=arguments.seed)
+    server = SimulatorServer(
+        simulator=simulator, host=arguments.host, port=arguments.port
+    )
+
+    for name, value in base_urls(server.url).items():
+        print(f"export {name}={value}")
+    print(f"Statistics at {server.url}/_stats", flush=True)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+        print(json.dumps(simulator.stats_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
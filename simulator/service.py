@@ -0,0 +1,193 @@
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+from simulator.dataset import Dataset
+from simulator.faults import FaultProfile, Service, TokenBucket
+from simulator.images import image_body
+
+ISSUE_PATH = re.compile(r"^/github/repos/[^/]+/[^/]+/issues(?:/(?P<number>\d+))?$")
+
+
+@dataclass
+class Reply:
+    delay: float
+    response: httpx.Response
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    injected: Counter = field(default_factory=Counter)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statuses": {str(status): n for status, n in sorted(self.statuses.items())},
+            "injected": dict(self.injected),
+        }
+
+
+def _error(status: int, message: str, headers: dict | None = None) -> httpx.Response:
+    return httpx.Response(
+        status,
+        json={"error": {"status": status, "message": message}},
+        headers=headers,
+    )
+
+
+class Simulator:
+    def __init__(
+        self,
+        *,
+        dataset: Dataset,
+        faults: FaultProfile | None = None,
+        seed: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.dataset = dataset
+        self.faults = FaultProfile() if faults is None else faults
+        self.rng = random.Random(seed)
+        self.buckets = {
+            service: TokenBucket(rate_limit=faults.rate_limit, clock=clock)
+            for service, faults in self.faults.services.items()
+            if faults.rate_limit is not None
+        }
+        self.stats = {service: ServiceStats() for service in Service}
+        self.lineup_bodies: dict[str, str | None] = {}
+        self.lock = threading.Lock()
+
+    def respond(self, request: httpx.Request) -> Reply:
+        with self.lock:
+            service = _service(request.url.path)
+            if service is None:
+                return Reply(delay=0, response=httpx.Response(404))
+            reply = self._respond(service, request)
+            stats = self.stats[service]
+            stats.requests += 1
+            stats.statuses[reply.response.status_code] += 1
+            return reply
+
+    def _respond(self, service: Service, request: httpx.Request) -> Reply:
+        faults = self.faults.for_service(service)
+        delay = faults.latency.sample(self.rng)
+        stats = self.stats[service]
+        if service in self.buckets:
+            retry_after = self.buckets[service].acquire()
+            if retry_after is not None:
+                stats.injected["rate_limited"] += 1
+                return Reply(
+                    delay=delay,
+                    response=_error(
+                        429,
+                        "API rate limit exceeded",
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    ),
+                )
+        if self.rng.random() < faults.throttle_rate:
+            stats.injected["throttled"] += 1
+            return Reply(
+                delay=delay,
+                response=_error(
+                    429, "API rate limit exceeded", headers={"Retry-After": "1"}
+                ),
+            )
+        if self.rng.random() < faults.error_rate:
+            stats.injected["errors"] += 1
+            return Reply(delay=delay, response=_error(503, "Service unavailable"))
+        return Reply(delay=delay, response=self._route(service, request))
+
+    def _route(self, service: Service, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if service == Service.ACCOUNTS and path == "/accounts/api/token":
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": "simulated",
+                    "token_type": "bearer",
+                    "expires_in": 3600,
+                },
+            )
+        if service == Service.SPOTIFY and path == "/spotify/v1/search":
+            return httpx.Response(
+                200, json=self.dataset.search(request.url.params.get("q", ""))
+            )
+        if service == Service.FESTIVALS:
+            festival = path.removeprefix("/festivals/")
+            if festival not in self.lineup_bodies:
+                self.lineup_bodies[festival] = self.dataset.lineup_body(festival)
+            body = self.lineup_bodies[festival]
+            if body is None:
+                return httpx.Response(404, text="Not found")
+            return httpx.Response(200, text=body)
+        if service == Service.IMAGES:
+            return httpx.Response(
+                200,
+                content=image_body(path.removeprefix("/images")),
+                headers={"Content-Type": "image/png"},
+            )
+        match = ISSUE_PATH.match(path) if service == Service.GITHUB else None
+        if match is not None:
+            return self._issues(request, number=match.group("number"))
+        return _error(404, "Not found")
+
+    def _issues(self, request: httpx.Request, *, number: str | None):
+        issues = self.dataset.issues
+        if number is None and request.method == "GET":
+            return httpx.Response(200, json=issues)
+        if number is None and request.method == "POST":
+            issue = {"number": len(issues) + 1, "state": "open", **_json(request)}
+            issues.append(issue)
+            return httpx.Response(201, json=issue)
+        if number is not None and request.method == "PATCH":
+            for issue in issues:
+                if str(issue["number"]) == number:
+                    issue.update(_json(request))
+                    return httpx.Response(200, json=issue)
+        return _error(404, "Not found")
+
+    def stats_dict(self) -> dict:
+        with self.lock:
+            return {service: s.to_dict() for service, s in self.stats.items()}
+
+    def transport(self) -> "SimulatorTransport":
+        return SimulatorTransport(simulator=self)
+
+
+def _service(path: str) -> Service | None:
+    for service in Service:
+        if path.startswith(f"/{service}/"):
+            return service
+    return None
+
+
+def _json(request: httpx.Request) -> dict:
+    content = request.content
+    return {} if len(content) == 0 else json.loads(content)
+
+
+class SimulatorTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    def __init__(self, *, simulator: Simulator):
+        self.simulator = simulator
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        reply = self.simulator.respond(request)
+        time.sleep(reply.delay)
+        return reply.response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        reply = self.simulator.respond(request)
+        await asyncio.sleep(reply.delay)
+        return reply.response
@@ -3,12 +3,16 @@ import os
 from dataclasses import dataclass
 from typing import Mapping
 
-import httpx
-
+from src.adapter.http import HttpStack
 from src.adapter.ssm import Ssm
+from src.metrics import current_metrics
+from src.tracing import span
 
 logger = logging.getLogger(__name__)
 
+API_URL = "https://api.github.com"
+REPOSITORY = "kruspe/festival-scraper"
+
 
 @dataclass
 class GitHubIssue:
@@ -17,7 +21,7 @@ class GitHubIssue:
 
 
 class GitHubClient:
-    def __init__(self, *, ssm: Ssm):
+    def __init__(self, *, ssm: Ssm, http: HttpStack | None = None):
         github_token = os.environ.get("GITHUB_TOKEN_PARAMETER_NAME")
         github_secret = ssm.get_parameters(
             parameter_names=[
@@ -25,25 +29,33 @@ class GitHubClient:
             ]
         )
         self.token = github_secret[github_token]
+        self.issues_url = (
+            f"{os.environ.get('GITHUB_API_URL', API_URL)}/repos/{REPOSITORY}/issues"
+        )
+        self.client = (HttpStack() if http is None else http).client(cached=True)
         self.created_issues = self._retrieve_bands_with_created_issues()
 
     def create_issue(self, *, artist_name: str) -> None:
         if artist_name.lower() in self.created_issues:
             logger.info(f"PR for {artist_name} already exists")
             return
-        response = httpx.post(
-            "https://api.github.com/repos/kruspe/festival-scraper/issues",
-            headers={
-                "Accept": "application/vnd.github+json",
-                "Authorization": f"Bearer {self.token}",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-            json={
-                "title": f"Search for ArtistInformation manually: {artist_name}",
-                "body": f"Could not find ArtistInformation for {artist_name}. Please look them up manually.",
-                "assignees": ["kruspe"],
-            },
-        )
+        with (
+            span("github.create_issue", **{"artist.name": artist_name}),
+            current_metrics().timer("GitHubDuration"),
+        ):
+            response = self.client.post(
+                self.issues_url,
+                headers={
+                    "Accept": "application/vnd.github+json",
+                    "Authorization": f"Bearer {self.token}",
+                    "X-GitHub-Api-Version": "2022-11-28",
+                },
+                json={
+                    "title": f"Search for ArtistInformation manually: {artist_name}",
+                    "body": f"Could not find ArtistInformation for {artist_name}. Please look them up manually.",
+                    "assignees": ["kruspe"],
+                },
+            )
         if response.status_code != 201:
             logger.error(
                 "GitHub request to create PR returned status "
@@ -56,16 +68,22 @@ class GitHubClient:
     def close_issue(self, *, artist_name: str) -> None:
         if artist_name.lower() not in self.created_issues.keys():
             return
-        close_issue_url = f"https://api.github.com/repos/kruspe/festival-scraper/issues/{self.created_issues[artist_name.lower()].issue_number}"
-        response = httpx.patch(
-            close_issue_url,
-            headers={
-                "Accept": "application/vnd.github+json",
-                "Authorization": f"Bearer {self.token}",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-            json={"state": "closed", "state_reason": "completed"},
+        close_issue_url = (
+            f"{self.issues_url}/{self.created_issues[artist_name.lower()].issue_number}"
         )
+        with (
+            span("github.close_issue", **{"artist.name": artist_name}),
+            current_metrics().timer("GitHubDuration"),
+        ):
+            response = self.client.patch(
+                close_issue_url,
+                headers={
+                    "Accept": "application/vnd.github+json",
+                    "Authorization": f"Bearer {self.token}",
+                    "X-GitHub-Api-Version": "2022-11-28",
+                },
+                json={"state": "closed", "state_reason": "completed"},
+            )
 
         if response.status_code != 200:
             logger.error(
@@ -78,14 +96,15 @@ class GitHubClient:
             raise GitHubException("Failed to close PR")
 
     def _retrieve_bands_with_created_issues(self) -> Mapping[str, GitHubIssue]:
-        response = httpx.get(
-            "https://api.github.com/repos/kruspe/festival-scraper/issues",
-            headers={
-                "Accept": "application/vnd.github+json",
-                "Authorization": f"Bearer {self.token}",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-        )
+        with current_metrics().timer("GitHubDuration"):
+            response = self.client.get(
+                self.issues_url,
+                headers={
+                    "Accept": "application/vnd.github+json",
+                    "Authorization": f"Bearer {self.token}",
+                    "X-GitHub-Api-Version": "2022-11-28",
+                },
+            )
 
         if response.status_code != 200:
             logger.error(
@@ -0,0 +1,89 @@
+import httpx
+
+
+class Middleware:
+    def on_request(self, request: httpx.Request) -> httpx.Response | None:
+        return None
+
+    def on_response(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> httpx.Response:
+        return response
+
+    def on_error(self, request: httpx.Request, error: Exception) -> None:
+        return None
+
+
+class _MiddlewareTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    def __init__(self, *, inner, middleware: Middleware):
+        self.inner = inner
+        self.middleware = middleware
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.middleware.on_request(request)
+        if response is None:
+            try:
+                response = self.inner.handle_request(request)
+                response.read()
+            except Exception as e:
+                self.middleware.on_error(request, e)
+                raise
+        return self.middleware.on_response(request, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.middleware.on_request(request)
+        if response is None:
+            try:
+                response = await self.inner.handle_async_request(request)
+                await response.aread()
+            except Exception as e:
+                self.middleware.on_error(request, e)
+                raise
+        return self.middleware.on_response(request, response)
+
+    def close(self) -> None:
+        self.inner.close()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class HttpStack:
+    def __init__(
+        self,
+        *,
+        middlewares: list[Middleware] | None = None,
+        cache: Middleware | None = None,
+        stats: Middleware | None = None,
+        recorder: Middleware | None = None,
+        transport: httpx.BaseTransport | httpx.AsyncBaseTransport | None = None,
+    ):
+        self.middlewares = [] if middlewares is None else middlewares
+        self.transport = transport
+        self.cache = cache
+        self.stats = stats
+        self.recorder = recorder
+
+    def client(self, *, cached: bool = False, **kwargs) -> httpx.Client:
+        transport = httpx.HTTPTransport() if self.transport is None else self.transport
+        for middleware in reversed(self._middlewares(cached=cached)):
+            transport = _MiddlewareTransport(inner=transport, middleware=middleware)
+        return httpx.Client(transport=transport, **kwargs)
+
+    def async_client(self, *, cached: bool = False, **kwargs) -> httpx.AsyncClient:
+        transport = (
+            httpx.AsyncHTTPTransport() if self.transport is None else self.transport
+        )
+        for middleware in reversed(self._middlewares(cached=cached)):
+            transport = _MiddlewareTransport(inner=transport, middleware=middleware)
+        return httpx.AsyncClient(transport=transport, **kwargs)
+
+    def _middlewares(self, *, cached: bool) -> list[Middleware]:
+        middlewares = list(self.middlewares)
+        if cached and self.cache is not None:
+            middlewares.append(self.cache)
+        if self.stats is not None:
+            middlewares.append(self.stats)
+        if self.recorder is not None:
+            middlewares.append(self.recorder)
+        return middlewares
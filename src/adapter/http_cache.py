@@ -0,0 +1,302 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from src.adapter.http import Middleware
+from src.adapter.s3 import S3
+from src.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+# The stored content is already decoded by httpx, so the framing headers of the
+# original response no longer describe it
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _stored_headers(headers) -> list[tuple[str, str]]:
+    return [
+        (name, value)
+        for name, value in httpx.Headers(headers).multi_items()
+        if name.lower() not in _DROPPED_HEADERS
+    ]
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    content: bytes
+    stored_at: float
+    vary: dict[str, str | None] = field(default_factory=dict)
+
+    def header(self, name: str) -> str | None:
+        return httpx.Headers(self.headers).get(name)
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            status_code=self.status_code,
+            headers=_stored_headers(self.headers),
+            content=self.content,
+            request=request,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "url": self.url,
+                "status_code": self.status_code,
+                "headers": self.headers,
+                "content": base64.b64encode(self.content).decode("ascii"),
+                "stored_at": self.stored_at,
+                "vary": self.vary,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, body: str) -> "CacheEntry":
+        entry = json.loads(body)
+        return cls(
+            url=entry["url"],
+            status_code=entry["status_code"],
+            headers=[(name, value) for name, value in entry["headers"]],
+            content=base64.b64decode(entry["content"]),
+            stored_at=entry["stored_at"],
+            vary=entry["vary"],
+        )
+
+
+class MemoryCacheStore:
+    def __init__(self):
+        self.entries: dict[str, CacheEntry] = {}
+
+    def get(self, key: str) -> CacheEntry | None:
+        return self.entries.get(key)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self.entries[key] = entry
+
+
+class DiskCacheStore:
+    def __init__(self, *, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> CacheEntry | None:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as file:
+            return CacheEntry.from_json(file.read())
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with open(self._path(key), "w", encoding="utf-8") as file:
+            file.write(entry.to_json())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{_hash(key)}.json")
+
+
+class S3CacheStore:
+    def __init__(self, *, s3: S3, bucket_name: str, prefix: str = "http-cache/"):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    def get(self, key: str) -> CacheEntry | None:
+        body = self.s3.download(bucket_name=self.bucket_name, key=self._key(key))
+        if body is None:
+            return None
+        return CacheEntry.from_json(body)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self.s3.upload(
+            bucket_name=self.bucket_name, key=self._key(key), json=entry.to_json()
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{_hash(key)}.json"
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.revalidated + self.misses
+        if lookups == 0:
+            return 0
+        return (self.hits + self.revalidated) / lookups
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 3),
+        }
+
+
+class CachingMiddleware(Middleware):
+    def __init__(self, *, store, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.clock = clock
+        self.stats = CacheStats()
+
+    def on_request(self, request: httpx.Request) -> httpx.Response | None:
+        if request.method != "GET" or "no-store" in _directives(request.headers):
+            return None
+
+        entry = self.store.get(_cache_key(request))
+        if entry is None or not _vary_matches(entry, request):
+            self.stats.misses += 1
+            current_span().set_attribute("http.cache", "miss")
+            return None
+        if self._is_fresh(entry) and "no-cache" not in _directives(request.headers):
+            request.extensions["http_cache_hit"] = True
+            self.stats.hits += 1
+            current_span().set_attribute("http.cache", "hit")
+            return entry.to_response(request)
+
+        request.extensions["http_cache_entry"] = entry
+        if entry.header("ETag") is not None:
+            request.headers["If-None-Match"] = entry.header("ETag")
+        if entry.header("Last-Modified") is not None:
+            request.headers["If-Modified-Since"] = entry.header("Last-Modified")
+        return None
+
+    def on_response(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> httpx.Response:
+        if request.extensions.get("http_cache_hit"):
+            return response
+        entry = request.extensions.get("http_cache_entry")
+        if entry is not None and response.status_code == 304:
+            self.stats.revalidated += 1
+            current_span().set_attribute("http.cache", "revalidated")
+            headers = httpx.Headers(entry.headers)
+            headers.update(response.headers)
+            entry.headers = _stored_headers(headers)
+            entry.stored_at = self.clock()
+            self.store.set(_cache_key(request), entry)
+            return entry.to_response(request)
+        if entry is not None:
+            self.stats.misses += 1
+            current_span().set_attribute("http.cache", "miss")
+
+        if request.method == "GET" and _is_storable(response):
+            vary = {}
+            for name in response.headers.get("Vary", "").split(","):
+                if name.strip() != "":
+                    vary[name.strip().lower()] = _vary_value(request, name.strip())
+            # Private responses are only served again for the same credentials
+            if "private" in _directives(response.headers):
+                vary["authorization"] = _vary_value(request, "Authorization")
+            self.store.set(
+                _cache_key(request),
+                CacheEntry(
+                    url=str(request.url),
+                    status_code=response.status_code,
+                    headers=_stored_headers(response.headers),
+                    content=response.content,
+                    stored_at=self.clock(),
+                    vary=vary,
+                ),
+            )
+        return response
+
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        directives = _directives(entry.headers)
+        if "no-cache" in directives:
+            return False
+        age = self.clock() - entry.stored_at + (_seconds(entry.header("Age")) or 0)
+        if "max-age" in directives:
+            max_age = _seconds(directives["max-age"])
+            return max_age is not None and age < max_age
+        if entry.header("Expires") is not None and entry.header("Date") is not None:
+            try:
+                lifetime = (
+                    parsedate_to_datetime(entry.header("Expires"))
+                    - parsedate_to_datetime(entry.header("Date"))
+                ).total_seconds()
+            except (TypeError, ValueError):
+                return False
+            return age < lifetime
+        return False
+
+
+def _cache_key(request: httpx.Request) -> str:
+    return f"GET {request.url}"
+
+
+def _hash(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _directives(headers) -> dict[str, str | None]:
+    directives = {}
+    for directive in httpx.Headers(headers).get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name != "":
+            directives[name.lower()] = value.strip('"') if value else None
+    return directives
+
+
+def _seconds(value: str | None) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _vary_matches(entry: CacheEntry, request: httpx.Request) -> bool:
+    if "*" in entry.vary:
+        return False
+    return all(
+        _vary_value(request, name) == value for name, value in entry.vary.items()
+    )
+
+
+def _vary_value(request: httpx.Request, name: str) -> str | None:
+    # Only a hash is kept so credentials sent in Authorization never reach the store
+    value = request.headers.get(name)
+    return None if value is None else _hash(value)
+
+
+def _is_storable(response: httpx.Response) -> bool:
+    directives = _directives(response.headers)
+    if response.status_code != 200 or "no-store" in directives:
+        return False
+    return (
+        "ETag" in response.headers
+        or "Last-Modified" in response.headers
+        or "max-age" in directives
+    )
+
+
+def cache_from_env(*, s3: S3) -> CachingMiddleware | None:
+    cache = os.environ.get("HTTP_CACHE", "")
+    if cache == "":
+        return None
+    if cache == "memory":
+        return CachingMiddleware(store=MemoryCacheStore())
+    if cache == "s3":
+        return CachingMiddleware(
+            store=S3CacheStore(s3=s3, bucket_name=os.environ["FESTIVAL_ARTISTS_BUCKET"])
+        )
+    if cache.startswith("disk:"):
+        return CachingMiddleware(
+            store=DiskCacheStore(directory=cache.removeprefix("disk:"))
+        )
+    raise ValueError(f"Unknown HTTP_CACHE {cache}, expected memory, s3 or disk:<dir>")
@@ -0,0 +1,282 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import httpx
+
+from src.adapter.http import Middleware
+from src.adapter.s3 import S3
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+# The recorded content is already decoded, so these would no longer describe it
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+# Cassettes end up on disk and in S3 as fixtures, so credentials never reach them
+_SECRET_HEADERS = {"authorization", "proxy-authorization", "set-cookie"}
+_SECRET_FIELDS = ("access_token", "refresh_token", "id_token")
+REDACTED = "REDACTED"
+
+
+@dataclass
+class Interaction:
+    method: str
+    url: str
+    body_hash: str | None
+    status_code: int
+    headers: list[tuple[str, str]]
+    content: bytes
+    started: float
+    duration: float
+
+    @property
+    def key(self) -> tuple[str, str, str | None]:
+        return self.method, self.url, self.body_hash
+
+    def to_dict(self) -> dict:
+        interaction = {
+            "method": self.method,
+            "url": self.url,
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "started": round(self.started, 6),
+            "duration": round(self.duration, 6),
+        }
+        if self.body_hash is not None:
+            interaction["body_hash"] = self.body_hash
+        try:
+            interaction["text"] = self.content.decode("utf-8")
+        except UnicodeDecodeError:
+            interaction["base64"] = base64.b64encode(self.content).decode("ascii")
+        return interaction
+
+    @classmethod
+    def from_dict(cls, interaction: dict) -> "Interaction":
+        if "text" in interaction:
+            content = interaction["text"].encode("utf-8")
+        else:
+            content = base64.b64decode(interaction["base64"])
+        return cls(
+            method=interaction["method"],
+            url=interaction["url"],
+            body_hash=interaction.get("body_hash"),
+            status_code=interaction["status_code"],
+            headers=[(name, value) for name, value in interaction["headers"]],
+            content=content,
+            started=interaction["started"],
+            duration=interaction["duration"],
+        )
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            status_code=self.status_code,
+            headers=self.headers,
+            content=self.content,
+            request=request,
+        )
+
+
+def _body_hash(request: httpx.Request) -> str | None:
+    # Request headers are never recorded and bodies only as a hash, so credentials stay out of cassettes
+    content = request.content
+    if len(content) == 0:
+        return None
+    return hashlib.sha256(content).hexdigest()
+
+
+def _key(request: httpx.Request) -> tuple[str, str, str | None]:
+    return request.method, str(request.url), _body_hash(request)
+
+
+def write_cassette(interactions: list[Interaction]) -> bytes:
+    lines = [json.dumps({"version": CASSETTE_VERSION})]
+    lines += [json.dumps(i.to_dict(), separators=(",", ":")) for i in interactions]
+    return gzip.compress("\n".join(lines).encode("utf-8"))
+
+
+def read_cassette(body: bytes) -> list[Interaction]:
+    header, *lines = gzip.decompress(body).decode("utf-8").splitlines()
+    version = json.loads(header)["version"]
+    if version != CASSETTE_VERSION:
+        raise CassetteException(f"Unsupported cassette version {version}")
+    return [Interaction.from_dict(json.loads(line)) for line in lines]
+
+
+class RecordingMiddleware(Middleware):
+    def __init__(self, *, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started_at = clock()
+        self.interactions: list[Interaction] = []
+
+    def on_request(self, request: httpx.Request) -> httpx.Response | None:
+        request.extensions["recording_started"] = self.clock()
+        return None
+
+    def on_response(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> httpx.Response:
+        started = request.extensions["recording_started"]
+        self.interactions.append(
+            Interaction(
+                method=request.method,
+                url=str(request.url),
+                body_hash=_body_hash(request),
+                status_code=response.status_code,
+                headers=[
+                    (name, REDACTED if name.lower() in _SECRET_HEADERS else value)
+                    for name, value in response.headers.multi_items()
+                    if name.lower() not in _DROPPED_HEADERS
+                ],
+                content=_redact(response.content),
+                started=started - self.started_at,
+                duration=self.clock() - started,
+            )
+        )
+        return response
+
+
+def _redact(content: bytes) -> bytes:
+    if not any(f'"{name}"'.encode() in content for name in _SECRET_FIELDS):
+        return content
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(body, dict):
+        return content
+    for name in _SECRET_FIELDS:
+        if name in body:
+            body[name] = REDACTED
+    return json.dumps(body).encode("utf-8")
+
+
+class FileCassetteWriter:
+    def __init__(self, *, path: str):
+        self.path = path
+
+    def write(self, interactions: list[Interaction]) -> str:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(write_cassette(interactions))
+        return self.path
+
+
+class S3CassetteWriter:
+    def __init__(self, *, s3: S3, bucket_name: str, prefix: str = "cassettes/"):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    def write(self, interactions: list[Interaction]) -> str:
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        key = f"{self.prefix}{timestamp}.jsonl.gz"
+        self.s3.upload_bytes(
+            bucket_name=self.bucket_name, key=key, body=write_cassette(interactions)
+        )
+        return f"s3://{self.bucket_name}/{key}"
+
+
+class Recorder:
+    def __init__(self, *, writer: FileCassetteWriter | S3CassetteWriter):
+        self.writer = writer
+        self.middleware = RecordingMiddleware()
+
+    def save(self) -> None:
+        try:
+            location = self.writer.write(self.middleware.interactions)
+            logger.info(
+                f"Recorded {len(self.middleware.interactions)} requests to {location}"
+            )
+        except Exception as e:
+            logger.error("Failed to write cassette", exc_info=e)
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    def __init__(self, *, interactions: list[Interaction], speed: float = 0):
+        self.speed = speed
+        self.remaining: dict[tuple, deque[Interaction]] = defaultdict(deque)
+        self.last: dict[tuple, Interaction] = {}
+        for interaction in interactions:
+            self.remaining[interaction.key].append(interaction)
+
+    @classmethod
+    def from_file(cls, path: str, *, speed: float = 0) -> "ReplayTransport":
+        with open(path, "rb") as f:
+            return cls(interactions=read_cassette(f.read()), speed=speed)
+
+    def _next(self, request: httpx.Request) -> Interaction:
+        key = _key(request)
+        if len(self.remaining[key]) > 0:
+            self.last[key] = self.remaining[key].popleft()
+        if key not in self.last:
+            raise CassetteMissException(
+                f"No recorded response for {request.method} {request.url}",
+                request=request,
+            )
+        return self.last[key]
+
+    def _delay(self, interaction: Interaction) -> float:
+        if self.speed <= 0:
+            return 0
+        return interaction.duration / self.speed
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        interaction = self._next(request)
+        time.sleep(self._delay(interaction))
+        return interaction.to_response(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        interaction = self._next(request)
+        await asyncio.sleep(self._delay(interaction))
+        return interaction.to_response(request)
+
+
+def _setting() -> tuple[str, str]:
+    setting = os.environ.get("HTTP_CASSETTE", "")
+    mode, _, location = setting.partition(":")
+    if setting != "" and (mode not in ("record", "replay") or location == ""):
+        raise ValueError(
+            f"Unknown HTTP_CASSETTE {setting}, expected record:<path>, record:s3 or replay:<path>"
+        )
+    return mode, location
+
+
+def recorder_from_env(*, s3: S3) -> Recorder | None:
+    mode, location = _setting()
+    if mode != "record":
+        return None
+    if location == "s3":
+        return Recorder(
+            writer=S3CassetteWriter(
+                s3=s3, bucket_name=os.environ["FESTIVAL_ARTISTS_BUCKET"]
+            )
+        )
+    return Recorder(writer=FileCassetteWriter(path=location))
+
+
+def replay_from_env() -> ReplayTransport | None:
+    mode, location = _setting()
+    if mode != "replay":
+        return None
+    speed = float(os.environ.get("HTTP_REPLAY_SPEED", "0"))
+    return ReplayTransport.from_file(location, speed=speed)
+
+
+class CassetteException(Exception):
+    pass
+
+
+class CassetteMissException(httpx.TransportError):
+    pass
@@ -0,0 +1,157 @@
+import logging
+import math
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+from src.adapter.http import Middleware
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+_START = "http_stats_start"
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{16,}|[0-9A-Za-z]{22})$")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if len(values) == 0:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def endpoint(request: httpx.Request) -> str:
+    segments = [
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in request.url.path.split("/")
+    ]
+    return f"{request.method} {'/'.join(segments)}"
+
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    errors: int = 0
+    status_codes: dict[str, int] = field(default_factory=dict)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    reused_connections: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+
+    def add(
+        self,
+        *,
+        latency_ms: float,
+        status_code: int | None,
+        bytes_sent: int,
+        bytes_received: int,
+        reused: bool,
+    ) -> None:
+        self.requests += 1
+        self.latencies_ms.append(latency_ms)
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        if reused:
+            self.reused_connections += 1
+        if status_code is None:
+            self.errors += 1
+        else:
+            key = str(status_code)
+            self.status_codes[key] = self.status_codes.get(key, 0) + 1
+
+    def histogram(self) -> dict[str, int]:
+        buckets = {f"le_{bound}": 0 for bound in LATENCY_BUCKETS_MS}
+        buckets["le_inf"] = 0
+        for latency in self.latencies_ms:
+            bound = next((b for b in LATENCY_BUCKETS_MS if latency <= b), None)
+            buckets["le_inf" if bound is None else f"le_{bound}"] += 1
+        return buckets
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "status_codes": dict(self.status_codes),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "reused_connections": self.reused_connections,
+            "latency_ms": {
+                "p50": round(percentile(self.latencies_ms, 0.5), 3),
+                "p95": round(percentile(self.latencies_ms, 0.95), 3),
+                "p99": round(percentile(self.latencies_ms, 0.99), 3),
+                "max": round(max(self.latencies_ms, default=0), 3),
+                "histogram": self.histogram(),
+            },
+        }
+
+
+@dataclass
+class HostStats(RequestStats):
+    endpoints: dict[str, RequestStats] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            **super().to_dict(),
+            "endpoints": {name: e.to_dict() for name, e in self.endpoints.items()},
+        }
+
+
+class HttpStatsMiddleware(Middleware):
+    def __init__(self, *, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.hosts: dict[str, HostStats] = {}
+        self._streams: dict[int, object] = {}
+
+    def on_request(self, request: httpx.Request) -> httpx.Response | None:
+        request.extensions[_START] = self.clock()
+        return None
+
+    def on_response(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> httpx.Response:
+        self._record(
+            request,
+            status_code=response.status_code,
+            bytes_received=len(response.content),
+            reused=self._is_reused(response),
+        )
+        return response
+
+    def on_error(self, request: httpx.Request, error: Exception) -> None:
+        logger.warning(f"Request to {request.url.host} failed: {error!r}")
+        self._record(request, status_code=None, bytes_received=0, reused=False)
+
+    def to_dict(self) -> dict:
+        return {host: stats.to_dict() for host, stats in sorted(self.hosts.items())}
+
+    def _record(
+        self,
+        request: httpx.Request,
+        *,
+        status_code: int | None,
+        bytes_received: int,
+        reused: bool,
+    ) -> None:
+        latency_ms = (self.clock() - request.extensions.pop(_START)) * 1000
+        host = self.hosts.setdefault(request.url.host, HostStats())
+        endpoint_stats = host.endpoints.setdefault(endpoint(request), RequestStats())
+        for stats in (host, endpoint_stats):
+            stats.add(
+                latency_ms=latency_ms,
+                status_code=status_code,
+                bytes_sent=len(request.content),
+                bytes_received=bytes_received,
+                reused=reused,
+            )
+
+    def _is_reused(self, response: httpx.Response) -> bool:
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return False
+        if id(stream) in self._streams:
+            return True
+        self._streams[id(stream)] = stream
+        return False
@@ -0,0 +1,35 @@
+import httpx
+
+from src.adapter.http import Middleware
+from src.tracing import current_tracer
+
+_SPAN = "tracing_span"
+
+
+class TracingMiddleware(Middleware):
+    def on_request(self, request: httpx.Request) -> httpx.Response | None:
+        tracer = current_tracer()
+        span = tracer.start_span(
+            f"{request.method} {request.url.host}",
+            **{
+                "http.method": request.method,
+                "http.host": request.url.host,
+                "http.path": request.url.path,
+            },
+        )
+        request.extensions[_SPAN] = (tracer, span, tracer.use_span(span))
+        return None
+
+    def on_response(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> httpx.Response:
+        tracer, span, token = request.extensions.pop(_SPAN)
+        span.set_attribute("http.status_code", response.status_code)
+        tracer.release_span(token)
+        tracer.end_span(span)
+        return response
+
+    def on_error(self, request: httpx.Request, error: Exception) -> None:
+        tracer, span, token = request.extensions.pop(_SPAN)
+        tracer.release_span(token)
+        tracer.end_span(span, error=error)
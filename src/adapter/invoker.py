@@ -0,0 +1,39 @@
+import json
+import logging
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class LambdaInvoker:
+    def __init__(self, *, lambda_client, function_name: str) -> None:
+        self.lambda_client = lambda_client
+        self.function_name = function_name
+
+    def invoke(self, *, payload: dict) -> Any:
+        response = self.lambda_client.invoke(
+            FunctionName=self.function_name,
+            InvocationType="Event",
+            Payload=json.dumps(payload).encode("utf-8"),
+        )
+        if response["StatusCode"] != 202:
+            logger.error(
+                f"Invoking {self.function_name} returned status {response['StatusCode']}"
+            )
+            raise InvokerException(f"Failed to invoke {self.function_name}")
+        return None
+
+
+class LocalInvoker:
+    def __init__(self, *, handler: Callable[[dict, Any], Any]) -> None:
+        self.handler = handler
+        self.payloads: list[dict] = []
+
+    def invoke(self, *, payload: dict) -> Any:
+        self.payloads.append(payload)
+        return self.handler(payload, None)
+
+
+class InvokerException(Exception):
+    pass
@@ -1,18 +1,109 @@
 import logging
 
-from botocore.exceptions import ClientError
+from src.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# S3 answers a failed IfMatch/IfNoneMatch with 412, or 409 when a concurrent
+# conditional write to the same key is still in flight
+CONFLICT_CODES = {"PreconditionFailed", "ConditionalRequestConflict"}
+
 
 class S3:
     def __init__(self, s3_client) -> None:
         super().__init__()
         self.s3 = s3_client
 
-    def upload(self, *, bucket_name: str, key: str, json: str):
+    def upload(
+        self,
+        *,
+        bucket_name: str,
+        key: str,
+        json: str,
+        cache_control: str | None = None,
+        if_match: str | None = None,
+        if_none_match: str | None = None,
+    ):
+        from botocore.exceptions import ClientError
+
+        attributes = {"s3.bucket": bucket_name, "s3.key": key, "s3.bytes": len(json)}
+        arguments = {
+            "Bucket": bucket_name,
+            "Key": key,
+            "Body": json,
+            "ContentType": "application/json",
+        }
+        if cache_control is not None:
+            arguments["CacheControl"] = cache_control
+        if if_match is not None:
+            arguments["IfMatch"] = if_match
+        if if_none_match is not None:
+            arguments["IfNoneMatch"] = if_none_match
+        with span("s3.put", **attributes):
+            try:
+                self.s3.put_object(**arguments)
+            except ClientError as e:
+                if e.response["Error"]["Code"] in CONFLICT_CODES:
+                    raise S3ConflictException(f"{key} was changed concurrently") from e
+                logger.error(e)
+                raise
+
+    def upload_bytes(
+        self,
+        *,
+        bucket_name: str,
+        key: str,
+        body: bytes,
+        content_type: str | None = None,
+        cache_control: str | None = None,
+    ):
+        from botocore.exceptions import ClientError
+
+        arguments = {"Bucket": bucket_name, "Key": key, "Body": body}
+        if content_type is not None:
+            arguments["ContentType"] = content_type
+        if cache_control is not None:
+            arguments["CacheControl"] = cache_control
+        with span("s3.put", **{"s3.bucket": bucket_name, "s3.key": key}):
+            try:
+                self.s3.put_object(**arguments)
+            except ClientError as e:
+                logger.error(e)
+                raise
+
+    def download(self, *, bucket_name: str, key: str) -> str | None:
+        body = self.download_bytes(bucket_name=bucket_name, key=key)
+        return None if body is None else body.decode("utf-8")
+
+    def download_bytes(self, *, bucket_name: str, key: str) -> bytes | None:
+        body, _ = self._get(bucket_name=bucket_name, key=key)
+        return body
+
+    def download_with_etag(
+        self, *, bucket_name: str, key: str
+    ) -> tuple[str | None, str | None]:
+        body, etag = self._get(bucket_name=bucket_name, key=key)
+        return None if body is None else body.decode("utf-8"), etag
+
+    def _get(self, *, bucket_name: str, key: str) -> tuple[bytes | None, str | None]:
+        from botocore.exceptions import ClientError
+
         try:
-            self.s3.put_object(Bucket=bucket_name, Key=key, Body=json)
+            response = self.s3.get_object(Bucket=bucket_name, Key=key)
         except ClientError as e:
+            if e.response["Error"]["Code"] == "NoSuchKey":
+                return None, None
             logger.error(e)
             raise
+        return response["Body"].read(), response["ETag"]
+
+    def list_keys(self, *, bucket_name: str, prefix: str) -> list[str]:
+        keys = []
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            keys += [item["Key"] for item in page.get("Contents", [])]
+        return keys
+
+
+class S3ConflictException(Exception):
+    pass
@@ -0,0 +1,299 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from src.adapter.s3 import S3, S3ConflictException
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".jsonl.gz"
+RUNS_PREFIX = "runs/"
+INDEX_KEY = "index.json"
+MAX_INDEX_ATTEMPTS = 5
+
+
+def archive_key(*, query: str, market: str) -> str:
+    normalized = " ".join(query.lower().split())
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"{market}/{digest}"
+
+
+def run_key(now: float) -> str:
+    # Keys sort chronologically, so later runs replace earlier searches on read
+    started = datetime.fromtimestamp(now, UTC)
+    return f"{RUNS_PREFIX}{started:%Y/%m/%d/%H%M%S.%f}-{uuid.uuid4().hex[:8]}{SUFFIX}"
+
+
+@dataclass
+class ArchivedSearch:
+    query: str
+    market: str
+    searched_at: float
+    response: dict
+    selected: dict
+
+    @property
+    def key(self) -> str:
+        return archive_key(query=self.query, market=self.market)
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "market": self.market,
+            "searched_at": self.searched_at,
+            "response": self.response,
+            "selected": self.selected,
+        }
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "ArchivedSearch":
+        return cls(
+            query=entry["query"],
+            market=entry["market"],
+            searched_at=entry["searched_at"],
+            response=entry["response"],
+            selected=entry["selected"],
+        )
+
+
+def encode_searches(searches: list[ArchivedSearch]) -> bytes:
+    lines = [json.dumps(search.to_dict(), separators=(",", ":")) for search in searches]
+    return gzip.compress("\n".join(lines).encode("utf-8"))
+
+
+def decode_searches(body: bytes) -> list[ArchivedSearch]:
+    lines = gzip.decompress(body).decode("utf-8").splitlines()
+    return [ArchivedSearch.from_dict(json.loads(line)) for line in lines if line]
+
+
+@dataclass
+class IndexEntry:
+    run: str
+    searched_at: float
+
+
+class SearchIndex:
+    def __init__(self, *, entries: dict[str, IndexEntry], etag: str | None = None):
+        self.entries = entries
+        self.etag = etag
+
+    def record(self, key: str, entry: IndexEntry) -> None:
+        known = self.entries.get(key)
+        if known is None or known.searched_at <= entry.searched_at:
+            self.entries[key] = entry
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                key: {"run": entry.run, "searched_at": entry.searched_at}
+                for key, entry in sorted(self.entries.items())
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, body: str | None, *, etag: str | None) -> "SearchIndex":
+        entries = {}
+        if body is not None:
+            for key, entry in json.loads(body).items():
+                entries[key] = IndexEntry(
+                    run=entry["run"], searched_at=entry["searched_at"]
+                )
+        return cls(entries=entries, etag=etag)
+
+
+class DirectoryArchiveStore:
+    def __init__(self, *, directory: str):
+        self.directory = directory
+
+    def put(self, key: str, body: bytes) -> None:
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+
+    def get(self, key: str) -> bytes | None:
+        path = os.path.join(self.directory, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def list_keys(self) -> list[str]:
+        keys = []
+        for root, _, files in os.walk(os.path.join(self.directory, RUNS_PREFIX)):
+            for name in files:
+                if name.endswith(SUFFIX):
+                    path = os.path.join(root, name)
+                    keys.append(os.path.relpath(path, self.directory))
+        return sorted(keys)
+
+    def load_index(self) -> SearchIndex:
+        body = self.get(INDEX_KEY)
+        return SearchIndex.from_json(
+            None if body is None else body.decode("utf-8"), etag=None
+        )
+
+    def save_index(self, index: SearchIndex) -> None:
+        # A local archive has a single writer, so the index is written unconditionally
+        self.put(INDEX_KEY, index.to_json().encode("utf-8"))
+
+
+class S3ArchiveStore:
+    def __init__(self, *, s3: S3, bucket_name: str, prefix: str = "search-archive/"):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    def put(self, key: str, body: bytes) -> None:
+        self.s3.upload_bytes(
+            bucket_name=self.bucket_name, key=f"{self.prefix}{key}", body=body
+        )
+
+    def get(self, key: str) -> bytes | None:
+        return self.s3.download_bytes(
+            bucket_name=self.bucket_name, key=f"{self.prefix}{key}"
+        )
+
+    def list_keys(self) -> list[str]:
+        keys = self.s3.list_keys(
+            bucket_name=self.bucket_name, prefix=f"{self.prefix}{RUNS_PREFIX}"
+        )
+        return sorted(key.removeprefix(self.prefix) for key in keys)
+
+    def load_index(self) -> SearchIndex:
+        body, etag = self.s3.download_with_etag(
+            bucket_name=self.bucket_name, key=f"{self.prefix}{INDEX_KEY}"
+        )
+        return SearchIndex.from_json(body, etag=etag)
+
+    def save_index(self, index: SearchIndex) -> None:
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=f"{self.prefix}{INDEX_KEY}",
+            json=index.to_json(),
+            if_match=index.etag,
+            if_none_match="*" if index.etag is None else None,
+        )
+
+
+class SearchArchive:
+    def __init__(self, *, store: DirectoryArchiveStore | S3ArchiveStore):
+        self.store = store
+        self.pending: dict[str, ArchivedSearch] = {}
+        self.index: SearchIndex | None = None
+        self.runs: dict[str, dict[str, ArchivedSearch]] = {}
+
+    def add(self, *, query: str, market: str, response: dict, selected: dict) -> None:
+        search = ArchivedSearch(
+            query=query,
+            market=market,
+            searched_at=time.time(),
+            response=response,
+            selected=selected,
+        )
+        self.pending[search.key] = search
+
+    def get(self, *, query: str, market: str) -> ArchivedSearch | None:
+        key = archive_key(query=query, market=market)
+        if key in self.pending:
+            return self.pending[key]
+        entry = self._index().entries.get(key)
+        if entry is None:
+            return None
+        return self._run(entry.run).get(key)
+
+    def searches(self, *, since: float | None = None) -> Iterator[ArchivedSearch]:
+        # Only the runs that hold the latest search of a query are read
+        runs = defaultdict(list)
+        for key, entry in self._index().entries.items():
+            if since is None or entry.searched_at >= since:
+                runs[entry.run].append(key)
+        for run, keys in sorted(runs.items()):
+            searches = self._run(run)
+            for key in keys:
+                if key in searches:
+                    yield searches[key]
+
+    def flush(self) -> None:
+        # One run object plus the index keeps the flush to a few small requests
+        # inside the deadline reserve, however many artists were searched
+        if len(self.pending) == 0:
+            return
+        run = run_key(time.time())
+        entries = {
+            key: IndexEntry(run=run, searched_at=search.searched_at)
+            for key, search in self.pending.items()
+        }
+        try:
+            self.store.put(run, encode_searches(list(self.pending.values())))
+            self._commit_index(entries)
+            logger.info(f"Archived {len(self.pending)} search responses")
+        except Exception as e:
+            logger.error("Failed to archive search responses", exc_info=e)
+        self.pending = {}
+
+    def rebuild_index(self) -> int:
+        # Recovers searches of runs whose index update failed
+        entries = {}
+        for run in self.store.list_keys():
+            for key, search in self._run(run).items():
+                known = entries.get(key)
+                if known is None or known.searched_at <= search.searched_at:
+                    entries[key] = IndexEntry(run=run, searched_at=search.searched_at)
+        self._commit_index(entries)
+        return len(entries)
+
+    def _commit_index(self, entries: dict[str, IndexEntry]) -> None:
+        for attempt in range(1, MAX_INDEX_ATTEMPTS + 1):
+            index = self.store.load_index()
+            for key, entry in entries.items():
+                index.record(key, entry)
+            try:
+                self.store.save_index(index)
+                self.index = index
+                return
+            except S3ConflictException:
+                logger.warning(
+                    f"{INDEX_KEY} changed concurrently, retrying ({attempt}/{MAX_INDEX_ATTEMPTS})"
+                )
+        raise S3ConflictException(
+            f"{INDEX_KEY} kept changing for {MAX_INDEX_ATTEMPTS} attempts"
+        )
+
+    def _index(self) -> SearchIndex:
+        if self.index is None:
+            self.index = self.store.load_index()
+        return self.index
+
+    def _run(self, run: str) -> dict[str, ArchivedSearch]:
+        if run not in self.runs:
+            body = self.store.get(run)
+            searches = [] if body is None else decode_searches(body)
+            self.runs[run] = {search.key: search for search in searches}
+        return self.runs[run]
+
+
+def search_archive_from_env(*, s3: S3) -> SearchArchive | None:
+    setting = os.environ.get("SEARCH_ARCHIVE", "")
+    if setting == "":
+        return None
+    if setting == "s3":
+        return SearchArchive(
+            store=S3ArchiveStore(
+                s3=s3, bucket_name=os.environ["FESTIVAL_ARTISTS_BUCKET"]
+            )
+        )
+    if setting.startswith("dir:"):
+        return SearchArchive(
+            store=DirectoryArchiveStore(directory=setting.removeprefix("dir:"))
+        )
+    raise ValueError(f"Unknown SEARCH_ARCHIVE {setting}, expected s3 or dir:<path>")
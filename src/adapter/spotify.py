@@ -5,10 +5,19 @@ from dataclasses import dataclass
 
 import httpx
 
+from src.adapter.http import HttpStack
+from src.adapter.search_archive import SearchArchive
 from src.adapter.ssm import Ssm
+from src.executor import Executor
+from src.metrics import current_metrics
+from src.tracing import current_span
 
 logger = logging.getLogger(__name__)
 
+ACCOUNTS_URL = "https://accounts.spotify.com"
+API_URL = "https://api.spotify.com"
+MARKET = "DE"
+
 
 @dataclass
 class ArtistInformation:
@@ -16,10 +25,26 @@ class ArtistInformation:
     name: str
     search_name: str
     image_url: str | None
+    stale: bool = False
+
+    def to_selection(self) -> dict:
+        return {"id": self.id, "name": self.name, "image_url": self.image_url}
 
 
 class SpotifyClient:
-    def __init__(self, *, ssm: Ssm):
+    def __init__(
+        self,
+        *,
+        ssm: Ssm,
+        executor: Executor | None = None,
+        http: HttpStack | None = None,
+        archive: SearchArchive | None = None,
+    ):
+        if http is None:
+            http = HttpStack()
+        self.archive = archive
+        self.accounts_url = os.environ.get("SPOTIFY_ACCOUNTS_URL", ACCOUNTS_URL)
+        self.api_url = os.environ.get("SPOTIFY_API_URL", API_URL)
         client_id_parameter_name = os.environ.get("SPOTIFY_CLIENT_ID_PARAMETER_NAME")
         client_secret_parameter_name = os.environ.get(
             "SPOTIFY_CLIENT_SECRET_PARAMETER_NAME"
@@ -32,8 +57,10 @@ class SpotifyClient:
         )
         self.client_id = spotify_secrets[client_id_parameter_name]
         self.client_secret = spotify_secrets[client_secret_parameter_name]
-        self.token = self._get_token()
-        self.client = httpx.AsyncClient()
+        with http.client() as token_client:
+            self.token = self._get_token(client=token_client)
+        self.client = http.async_client()
+        self.executor = Executor() if executor is None else executor
         self.exception_map = {
             "9mm Headshot": ArtistInformation(
                 id="0nUPTibxuWvP3nGFOyDOQl",
@@ -271,13 +298,13 @@ class SpotifyClient:
             ),
         }
 
-    def _get_token(self) -> str:
+    def _get_token(self, *, client: httpx.Client) -> str:
         encoded_credentials = b64encode(
             f"{self.client_id}:{self.client_secret}".encode()
         )
         encoded_spotify_basic_auth = f"Basic {encoded_credentials.decode('utf-8')}"
-        spotify_token_response = httpx.post(
-            "https://accounts.spotify.com/api/token",
+        spotify_token_response = client.post(
+            f"{self.accounts_url}/api/token",
             data="grant_type=client_credentials",
             headers={
                 "Authorization": encoded_spotify_basic_auth,
@@ -300,85 +327,112 @@ class SpotifyClient:
 
     async def search_artist(self, *, name: str, genres: list[str]) -> ArtistInformation:
         if name in self.exception_map:
+            current_span().set_attribute("spotify.override", True)
             return self.exception_map[name]
         search_response = await self.client.get(
-            "https://api.spotify.com/v1/search",
-            params={"type": "artist", "q": name, "market": "DE"},
+            f"{self.api_url}/v1/search",
+            params={"type": "artist", "q": name, "market": MARKET},
             headers={"Authorization": "Bearer " + self.token},
         )
         search_response_status_code = search_response.status_code
-        search_response_json = search_response.json()
+        if search_response_status_code == 429:
+            current_metrics().increment("SpotifyThrottles")
         if search_response_status_code != 200:
             logger.error(
                 "Spotify search returned status "
                 + str(search_response_status_code)
                 + ", "
-                + str(search_response_json)
+                + _error_body(search_response)
             )
             raise SpotifyException("Spotify search response is invalid")
+        try:
+            search_response_json = search_response.json()
+        except ValueError as e:
+            logger.error(f"Spotify search returned an invalid body for {name}")
+            raise SpotifyException("Spotify search response is invalid") from e
 
-        found_artists = search_response_json["artists"]["items"]
-        if len(found_artists) == 0:
-            logger.error(f"No artists found for {name}")
-            return ArtistInformation(
-                id=None, name=name, search_name=name, image_url=None
+        artist = await self.executor.run(
+            select_artist,
+            name=name,
+            genres=genres,
+            search_response=search_response_json,
+        )
+        if self.archive is not None:
+            self.archive.add(
+                query=name,
+                market=MARKET,
+                response=search_response_json,
+                selected=artist.to_selection(),
             )
+        return artist
 
-        best_matches = []
-        for artist in found_artists:
-            if artist["name"].lower().strip() != name.lower():
-                continue
-            if len(artist["genres"]) > 0:
-                for genre in genres:
-                    for artist_genre in artist["genres"]:
-                        if genre.lower() in artist_genre.lower():
-                            best_matches.append(artist)
-                            break
-            else:
-                best_matches.append(artist)
 
-        if len(best_matches) == 0:
-            return self._handle_not_found_artist(
-                name=name, spotify_response=search_response_json
-            )
+def _error_body(response: httpx.Response) -> str:
+    try:
+        return str(response.json())
+    except ValueError:
+        return response.text
 
-        matching_information: list[ArtistInformation] = []
-        for match in best_matches:
-            if len(match["images"]) > 0:
-                for image in reversed(match["images"]):
-                    if image["width"] >= 300 or image["height"] >= 300:
-                        matching_information.append(
-                            ArtistInformation(
-                                id=match["id"],
-                                name=match["name"],
-                                search_name=name,
-                                image_url=image["url"],
-                            )
-                        )
+
+def select_artist(
+    *, name: str, genres: list[str], search_response
+) -> ArtistInformation:
+    found_artists = search_response["artists"]["items"]
+    if len(found_artists) == 0:
+        logger.error(f"No artists found for {name}")
+        return ArtistInformation(id=None, name=name, search_name=name, image_url=None)
+
+    best_matches = []
+    for artist in found_artists:
+        if artist["name"].lower().strip() != name.lower():
+            continue
+        if len(artist["genres"]) > 0:
+            for genre in genres:
+                for artist_genre in artist["genres"]:
+                    if genre.lower() in artist_genre.lower():
+                        best_matches.append(artist)
                         break
+        else:
+            best_matches.append(artist)
 
-        if len(matching_information) == 0:
-            return self._handle_not_found_artist(
-                name=name, spotify_response=search_response_json
-            )
+    if len(best_matches) == 0:
+        return _handle_not_found_artist(name=name, spotify_response=search_response)
 
-        return ArtistInformation(
-            id=matching_information[0].id,
-            name=matching_information[0].name.strip(),
-            search_name=name,
-            image_url=matching_information[0].image_url,
-        )
+    matching_information: list[ArtistInformation] = []
+    for match in best_matches:
+        if len(match["images"]) > 0:
+            for image in reversed(match["images"]):
+                if image["width"] >= 300 or image["height"] >= 300:
+                    matching_information.append(
+                        ArtistInformation(
+                            id=match["id"],
+                            name=match["name"],
+                            search_name=name,
+                            image_url=image["url"],
+                        )
+                    )
+                    break
+
+    if len(matching_information) == 0:
+        return _handle_not_found_artist(name=name, spotify_response=search_response)
+
+    return ArtistInformation(
+        id=matching_information[0].id,
+        name=matching_information[0].name.strip(),
+        search_name=name,
+        image_url=matching_information[0].image_url,
+    )
 
-    @staticmethod
-    def _handle_not_found_artist(*, name: str, spotify_response) -> ArtistInformation:
+
+def _handle_not_found_artist(*, name: str, spotify_response) -> ArtistInformation:
+    logger.error(
+        f"Unable to find information for '{name}'! Here are the interesting parts of the search result"
+    )
+    for item in spotify_response["artists"]["items"]:
         logger.error(
-            f"Unable to find information for '{name}'! Here are the interesting parts of the search result"
+            f"SpotifyName '{item['name']}', Id: '{item['id']}', Genres: {item['genres']}', Image URL: {item['images']}"
         )
-        for item in spotify_response["artists"]["items"]:
-            logger.error(
-                f"SpotifyName '{item['name']}', Id: '{item['id']}', Genres: {item['genres']}', Image URL: {item['images']}"
-            )
-        return ArtistInformation(id=None, name=name, search_name=name, image_url=None)
+    return ArtistInformation(id=None, name=name, search_name=name, image_url=None)
 
 
 class SpotifyException(Exception):
@@ -0,0 +1,58 @@
+import asyncio
+import functools
+import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor as PoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import StrEnum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorKind(StrEnum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class Executor:
+    def __init__(
+        self,
+        *,
+        kind: ExecutorKind = ExecutorKind.INLINE,
+        max_workers: int | None = None,
+    ):
+        self.kind = kind
+        self.max_workers = max_workers
+        self._pool: PoolExecutor | None = None
+
+    @classmethod
+    def from_env(cls) -> "Executor":
+        max_workers = os.environ.get("EXECUTOR_MAX_WORKERS")
+        return cls(
+            kind=ExecutorKind(os.environ.get("EXECUTOR_KIND", ExecutorKind.THREAD)),
+            max_workers=None if max_workers is None else int(max_workers),
+        )
+
+    async def run(self, function: Callable[..., Any], /, *args, **kwargs) -> Any:
+        if self.kind == ExecutorKind.INLINE:
+            return function(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_pool(), functools.partial(function, *args, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_pool(self) -> PoolExecutor:
+        if self._pool is None:
+            logger.info(f"Starting {self.kind} pool with {self.max_workers} workers")
+            if self.kind == ExecutorKind.PROCESS:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._pool
@@ -1,73 +1,129 @@
+import asyncio
+import dataclasses
 import functools
 import logging
-import re
+import math
+import time
+from collections.abc import Awaitable, Callable
 
-import aiometer
 import httpx
-from bs4 import BeautifulSoup
 
 from src.adapter.github import GitHubClient
-from src.adapter.spotify import ArtistInformation, SpotifyClient
+from src.adapter.http import HttpStack
+from src.adapter.spotify import ArtistInformation, SpotifyClient, SpotifyException
+from src.executor import Executor
+from src.festivals.checkpoint import Checkpoint
+from src.festivals.deadline import Deadline
+from src.festivals.retry_queue import RetryQueue
+from src.festivals.run_request import RunRequest
+from src.festivals.sources import FestivalSource, get_source
+from src.festivals.timetable import Slot
+from src.metrics import current_metrics
+from src.tracing import current_span, span
 
 logger = logging.getLogger(__name__)
 
+GENRES = [
+    "Metal",
+    "Rock",
+    "Core",
+    "Heavy",
+    "MetalCore",
+    "Thrash",
+    "Punk",
+    "Medieval",
+    "Neue Deutsche Welle",
+    "Celtic",
+]
+MAX_CONSECUTIVE_FAILURES = 5
 
-async def get_wacken_artists(
-    *, spotify_client: SpotifyClient, github_client: GitHubClient
+
+class SharedSearches:
+    def __init__(self):
+        self.searches: dict[str, asyncio.Future[ArtistInformation]] = {}
+
+    async def search(
+        self,
+        artist_name: str,
+        search: Callable[[], Awaitable[ArtistInformation]],
+    ) -> ArtistInformation:
+        # Festivals resolving the same artist concurrently share a single lookup,
+        # shielded so a cancelled festival does not cancel it for the others.
+        if artist_name in self.searches:
+            current_metrics().increment("SharedSearchHits")
+        else:
+            self.searches[artist_name] = asyncio.ensure_future(search())
+        return await asyncio.shield(self.searches[artist_name])
+
+
+async def get_festival_artists(
+    *,
+    source: FestivalSource,
+    spotify_client: SpotifyClient,
+    github_client: GitHubClient,
+    artists: list[str] | None = None,
+    checkpoint: Checkpoint | None = None,
+    retry_queue: RetryQueue | None = None,
+    deadline: Deadline | None = None,
+    run_request: RunRequest | None = None,
+    executor: Executor | None = None,
+    http: HttpStack | None = None,
+    shared_searches: SharedSearches | None = None,
 ) -> list[ArtistInformation]:
-    artist_names = []
-    response = httpx.get(
-        "https://www.wacken.com/fileadmin/Json/bandlist-concert.json",
-        timeout=20,
+    artist_names = await get_lineup(
+        source=source, artists=artists, executor=executor, http=http
     )
 
-    if response.status_code == 200:
-        artists = response.json()
-        for artist in artists:
-            if (
-                artist["artist"]["title"] != "Metal Disco"
-                and artist["artist"]["title"] != "Metal Yoga"
-                and artist["artist"]["title"] != "Maschine's Late Night Show"
-                and artist["artist"]["title"] != "Metal Karate"
-            ):
-                artist_names.append(artist["artist"]["title"])
-
-    logger.info("Wacken Artists %s", artist_names)
+    logger.info("%s Artists %s", source.name, artist_names)
     artist_information = await _retrieve_images(
         spotify_client=spotify_client,
         github_client=github_client,
         artist_names=artist_names,
+        checkpoint=checkpoint,
+        retry_queue=retry_queue,
+        deadline=deadline,
+        run_request=run_request,
+        max_at_once=source.max_at_once,
+        max_per_second=source.max_per_second,
+        shared_searches=shared_searches,
     )
     return artist_information
 
 
-async def get_dong_artists(
-    *, spotify_client: SpotifyClient, github_client: GitHubClient
+async def get_wacken_artists(
+    *,
+    spotify_client: SpotifyClient,
+    github_client: GitHubClient,
+    checkpoint: Checkpoint | None = None,
+    deadline: Deadline | None = None,
+    run_request: RunRequest | None = None,
 ) -> list[ArtistInformation]:
-    artist_names = []
-    response = httpx.get("https://www.dongopenair.de/bands/")
-
-    if response.status_code == 200:
-        parsed_html = BeautifulSoup(response.text, features="html.parser")
-        artist_links = parsed_html.find_all("a")
-        for artist_link in artist_links:
-            if (
-                artist_link.get("href") is not None
-                and artist_link.get("href").startswith(
-                    "https://www.dongopenair.de/band-details/?band="
-                )
-                and not re.match("^\\d\\d:\\d\\d", artist_link.text.strip())
-                and artist_link.text.strip() != ""
-            ):
-                artist_names.append(artist_link.text.strip())
+    return await get_festival_artists(
+        source=get_source("wacken"),
+        spotify_client=spotify_client,
+        github_client=github_client,
+        checkpoint=checkpoint,
+        deadline=deadline,
+        run_request=run_request,
+    )
 
-    logger.info("DONG Artists %s", artist_names)
-    artist_information = await _retrieve_images(
+
+async def get_dong_artists(
+    *,
+    spotify_client: SpotifyClient,
+    github_client: GitHubClient,
+    checkpoint: Checkpoint | None = None,
+    deadline: Deadline | None = None,
+    run_request: RunRequest | None = None,
+) -> list[ArtistInformation]:
+    return await get_festival_artists(
+        source=get_source("dong"),
         spotify_client=spotify_client,
         github_client=github_client,
-        artist_names=artist_names,
+        checkpoint=checkpoint,
+        deadline=deadline,
+        run_request=run_request,
     )
-    return artist_information
 
 
 async def get_rude_artists(
@@ -75,34 +131,72 @@ async def get_rude_artists(
     spotify_client: SpotifyClient,
     github_client: GitHubClient,
     artists: list[str] = None,
+    checkpoint: Checkpoint | None = None,
+    deadline: Deadline | None = None,
+    run_request: RunRequest | None = None,
 ) -> list[ArtistInformation]:
-    artist_names = []
-
-    if artists is not None:
-        artist_names = artists
-    else:
-        response = httpx.get("https://www.rockunterdeneichen.de/bands/")
-
-        if response.status_code == 200:
-            parsed_html = BeautifulSoup(response.text, features="html.parser")
-            artist_html_list = parsed_html.find_all(
-                "div", attrs={"class": "cb-article-meta"}
-            )
-            for element in artist_html_list:
-                found_artist = (
-                    element.find_next("h2").find_next("a").text.split(" (")[0]
-                )
-                if found_artist == "RUNNING ORDER 2024":
-                    continue
-                artist_names.append(found_artist)
-
-    logger.info("RUDE Artists %s", artist_names)
-    artist_information = await _retrieve_images(
+    return await get_festival_artists(
+        source=get_source("rude"),
         spotify_client=spotify_client,
         github_client=github_client,
-        artist_names=artist_names,
+        artists=artists,
+        checkpoint=checkpoint,
+        deadline=deadline,
+        run_request=run_request,
     )
-    return artist_information
+
+
+async def get_lineup(
+    *,
+    source: FestivalSource,
+    artists: list[str] | None = None,
+    executor: Executor | None = None,
+    http: HttpStack | None = None,
+    timetables: dict[str, list[Slot]] | None = None,
+) -> list[str]:
+    if executor is None:
+        executor = Executor()
+    if http is None:
+        http = HttpStack()
+    if artists is None:
+        artists = await _fetch_lineup(
+            source=source, executor=executor, http=http, timetables=timetables
+        )
+    return [
+        artist_name for artist_name in artists if not source.is_excluded(artist_name)
+    ]
+
+
+async def _fetch_lineup(
+    *,
+    source: FestivalSource,
+    executor: Executor,
+    http: HttpStack,
+    timetables: dict[str, list[Slot]] | None = None,
+) -> list[str]:
+    metrics = current_metrics()
+    async with http.async_client(cached=True, timeout=source.timeout) as client:
+        with metrics.timer("FetchDuration", festival=source.name):
+            response = await client.get(source.fetch_url)
+
+    if response.status_code != 200:
+        logger.error(
+            f"{source.name} lineup request returned status {response.status_code}"
+        )
+        metrics.increment("FetchFailures", festival=source.name)
+        # An empty lineup would be published as if every artist had been dropped
+        raise LineupFetchException(
+            f"{source.name} lineup request returned status {response.status_code}"
+        )
+    with metrics.timer("ParseDuration", festival=source.name):
+        if timetables is not None and source.parse_with_timetable is not None:
+            artists, timetables[source.name] = await executor.run(
+                source.parse_with_timetable, response.text
+            )
+        else:
+            artists = await executor.run(source.parse, response.text)
+    metrics.increment("LineupArtists", len(artists), festival=source.name)
+    return artists
 
 
 async def _retrieve_images(
@@ -110,37 +204,167 @@ async def _retrieve_images(
     spotify_client: SpotifyClient,
     github_client: GitHubClient,
     artist_names: list[str],
+    checkpoint: Checkpoint | None = None,
+    retry_queue: RetryQueue | None = None,
+    deadline: Deadline | None = None,
+    run_request: RunRequest | None = None,
+    max_at_once: int = 100,
+    max_per_second: float | None = 5,
+    shared_searches: SharedSearches | None = None,
 ) -> list[ArtistInformation]:
-    artist_information = await aiometer.run_all(
-        [
-            functools.partial(
-                spotify_client.search_artist,
-                name=artist_name,
-                genres=[
-                    "Metal",
-                    "Rock",
-                    "Core",
-                    "Heavy",
-                    "MetalCore",
-                    "Thrash",
-                    "Punk",
-                    "Medieval",
-                    "Neue Deutsche Welle",
-                    "Celtic",
-                ],
+    import aiometer
+
+    if checkpoint is None:
+        checkpoint = Checkpoint(festival="")
+    if deadline is None:
+        deadline = Deadline()
+    if run_request is None:
+        run_request = RunRequest()
+    if retry_queue is None:
+        retry_queue = RetryQueue(festival=checkpoint.festival, max_attempts=1)
+    if shared_searches is None:
+        shared_searches = SharedSearches()
+
+    artist_names = [artist_name for artist_name in artist_names if artist_name != ""]
+    now = time.time()
+    for artist_name in list(retry_queue.entries):
+        if artist_name not in artist_names:
+            retry_queue.record_success(artist_name)
+    lookup_names = [
+        artist_name
+        for artist_name in _prioritise(
+            artist_names=artist_names, checkpoint=checkpoint, retry_queue=retry_queue
+        )
+        if run_request.should_look_up(artist_name=artist_name, checkpoint=checkpoint)
+        and retry_queue.is_due(artist_name, now=now)
+    ]
+
+    metrics = current_metrics()
+    festival = checkpoint.festival or None
+    consecutive_failures = 0
+
+    async def search_artist(artist_name: str) -> ArtistInformation | Exception | None:
+        with span("search_artist", **{"artist.name": artist_name}) as search_span:
+            result = await _search_artist(artist_name)
+            if result is None:
+                search_span.set_attribute("artist.outcome", "deadline")
+            elif isinstance(result, Exception):
+                search_span.set_attribute("artist.outcome", "error")
+            elif result.id is None:
+                search_span.set_attribute("artist.outcome", "not_found")
+            else:
+                search_span.set_attribute("artist.outcome", "found")
+                search_span.set_attribute("artist.id", result.id)
+            return result
+
+    async def _search_artist(
+        artist_name: str,
+    ) -> ArtistInformation | Exception | None:
+        nonlocal consecutive_failures
+        if deadline.is_running_low():
+            metrics.increment("DeadlineSkips", festival=festival)
+            return None
+        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+            metrics.increment("SpotifyCircuitOpen", festival=festival)
+            current_span().set_attribute("spotify.circuit_open", True)
+            return SpotifyException("Spotify is unavailable, lookup not attempted")
+        metrics.increment("SpotifySearches", festival=festival)
+        try:
+            with metrics.timer("SpotifySearchDuration", festival=festival):
+                artist_info = await shared_searches.search(
+                    artist_name,
+                    functools.partial(
+                        spotify_client.search_artist, name=artist_name, genres=GENRES
+                    ),
+                )
+        except (SpotifyException, httpx.HTTPError) as e:
+            metrics.increment("SpotifyFailures", festival=festival)
+            consecutive_failures += 1
+            return e
+        consecutive_failures = 0
+        return artist_info
+
+    # Lookups are scheduled one second of rate budget at a time, so once the
+    # deadline runs low the remaining names are not queued behind the rate limit.
+    chunk_size = max(1, len(lookup_names))
+    if max_per_second is not None:
+        chunk_size = max(1, math.ceil(max_per_second))
+    artist_information = []
+    for start in range(0, len(lookup_names), chunk_size):
+        if deadline.is_running_low():
+            metrics.increment(
+                "DeadlineSkips", len(lookup_names) - start, festival=festival
             )
-            for artist_name in artist_names
-            if artist_name != ""
-        ],
-        max_at_once=100,
-        max_per_second=5,
-    )
+            break
+        chunk = lookup_names[start : start + chunk_size]
+        chunk_started = time.monotonic()
+        artist_information += await aiometer.run_all(
+            [functools.partial(search_artist, artist_name) for artist_name in chunk],
+            max_at_once=max_at_once,
+            max_per_second=max_per_second,
+        )
+        if max_per_second is not None and start + chunk_size < len(lookup_names):
+            await asyncio.sleep(
+                chunk_started + len(chunk) / max_per_second - time.monotonic()
+            )
+    artist_information += [None] * (len(lookup_names) - len(artist_information))
 
-    result = []
-    for artist_info in artist_information:
+    found_artists = {}
+    skipped_names = []
+    for artist_name, artist_info in zip(lookup_names, artist_information):
+        if artist_info is None:
+            skipped_names.append(artist_name)
+            continue
+        if isinstance(artist_info, Exception):
+            logger.warning(
+                f"Lookup of {artist_name} failed, queued for retry: {artist_info!r}"
+            )
+            retry_queue.record_failure(artist_name, error=repr(artist_info), now=now)
+            continue
         if artist_info.id is None:
-            github_client.create_issue(artist_name=artist_info.search_name)
+            retry_queue.record_failure(artist_name, error="not found", now=now)
+            if retry_queue.should_escalate(artist_name):
+                github_client.create_issue(artist_name=artist_info.search_name)
             continue
+        retry_queue.record_success(artist_name)
         github_client.close_issue(artist_name=artist_info.search_name)
-        result.append(artist_info)
-    return result
+        found_artists[artist_name] = artist_info
+
+    metrics.increment("RetryQueued", len(retry_queue.entries), festival=festival)
+    if len(skipped_names) > 0:
+        logger.warning(
+            f"Deadline reached, skipped lookups for {len(skipped_names)} artists: {skipped_names}"
+        )
+    for artist_name in artist_names:
+        if artist_name in found_artists:
+            continue
+        last_known_good = checkpoint.last_known_good(artist_name)
+        if last_known_good is None:
+            continue
+        if artist_name in retry_queue.entries:
+            last_known_good = dataclasses.replace(last_known_good, stale=True)
+        found_artists[artist_name] = last_known_good
+
+    return [
+        found_artists[artist_name]
+        for artist_name in artist_names
+        if artist_name in found_artists
+    ]
+
+
+def _prioritise(
+    *, artist_names: list[str], checkpoint: Checkpoint, retry_queue: RetryQueue
+) -> list[str]:
+    # Lineups are published in billing order, so a stable sort keeps headliners
+    # first within retries, new artists and refreshes.
+    return sorted(
+        dict.fromkeys(artist_names),
+        key=lambda artist_name: (
+            artist_name not in retry_queue.entries,
+            not checkpoint.is_new(artist_name),
+        ),
+    )
+
+
+class LineupFetchException(Exception):
+    pass
@@ -0,0 +1,115 @@
+import json
+import logging
+from dataclasses import dataclass, field
+
+from src.adapter.s3 import S3, S3ConflictException
+from src.festivals.sources import get_source, source_names
+from src.metrics import current_metrics
+
+logger = logging.getLogger(__name__)
+
+ARTISTS_KEY = "artists.json"
+FESTIVALS_KEY = "artist-festivals.json"
+MAX_PUBLISH_ATTEMPTS = 5
+
+
+def lineup_key(festival: str) -> str:
+    return f"lineups/{festival}.json"
+
+
+@dataclass
+class Catalog:
+    artists: dict[str, dict] = field(default_factory=dict)
+    lineups: dict[str, dict] = field(default_factory=dict)
+    festivals: dict[str, list[str]] = field(default_factory=dict)
+
+
+def build_catalog(outputs: dict[str, list[dict]]) -> Catalog:
+    catalog = Catalog()
+    for festival in sorted(outputs):
+        ids = []
+        unresolved = []
+        for record in outputs[festival]:
+            artist_id = record["id"]
+            if artist_id is None:
+                unresolved.append(record["artist"])
+                continue
+            if artist_id in ids:
+                continue
+            ids.append(artist_id)
+            known = catalog.artists.get(artist_id)
+            # A fresh lookup from one festival beats a stale fallback from another
+            if known is None or (known.get("stale") and not record.get("stale")):
+                entry = {"artist": record["artist"], "image": record["image"]}
+                if record.get("stale"):
+                    entry["stale"] = True
+                catalog.artists[artist_id] = entry
+            catalog.festivals.setdefault(artist_id, []).append(festival)
+        lineup = {"festival": festival, "artists": ids}
+        if len(unresolved) > 0:
+            lineup["unresolved"] = unresolved
+        catalog.lineups[festival] = lineup
+    return catalog
+
+
+class CatalogPublisher:
+    def __init__(self, *, s3: S3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    def publish(self, *, published: dict[str, str]) -> Catalog:
+        # Concurrent invocations each see the outputs they published themselves,
+        # so artists.json is written last and only if it is unchanged since the
+        # outputs were read. The invocation that loses rebuilds from fresh outputs.
+        for attempt in range(1, MAX_PUBLISH_ATTEMPTS + 1):
+            _, etag = self.s3.download_with_etag(
+                bucket_name=self.bucket_name, key=ARTISTS_KEY
+            )
+            catalog = self._build(published=published)
+            try:
+                self._upload(catalog, etag=etag)
+            except S3ConflictException:
+                current_metrics().increment("CatalogConflicts")
+                logger.warning(
+                    f"{ARTISTS_KEY} changed concurrently, retrying ({attempt}/{MAX_PUBLISH_ATTEMPTS})"
+                )
+                continue
+            logger.info(
+                f"Published catalog with {len(catalog.artists)} artists for {len(catalog.lineups)} festivals"
+            )
+            return catalog
+        raise S3ConflictException(
+            f"{ARTISTS_KEY} kept changing for {MAX_PUBLISH_ATTEMPTS} attempts"
+        )
+
+    def _build(self, *, published: dict[str, str]) -> Catalog:
+        outputs = {}
+        for festival in source_names():
+            body = published.get(festival)
+            if body is None:
+                body = self.s3.download(
+                    bucket_name=self.bucket_name, key=get_source(festival).output_key
+                )
+            if body is not None:
+                outputs[festival] = json.loads(body)
+        return build_catalog(outputs)
+
+    def _upload(self, catalog: Catalog, *, etag: str | None) -> None:
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=FESTIVALS_KEY,
+            json=json.dumps(catalog.festivals),
+        )
+        for festival, lineup in catalog.lineups.items():
+            self.s3.upload(
+                bucket_name=self.bucket_name,
+                key=lineup_key(festival),
+                json=json.dumps(lineup),
+            )
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=ARTISTS_KEY,
+            json=json.dumps(catalog.artists),
+            if_match=etag,
+            if_none_match="*" if etag is None else None,
+        )
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from src.adapter.s3 import S3, S3ConflictException
+
+logger = logging.getLogger(__name__)
+
+CHANGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MAX_APPEND_ATTEMPTS = 5
+
+
+def change_key(festival: str, sequence: int) -> str:
+    return f"changes/{festival}/{sequence}.json"
+
+
+def record_key(record: dict) -> str:
+    return record["id"] if record["id"] is not None else record["artist"]
+
+
+@dataclass
+class LineupDiff:
+    added: list[dict] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[dict] = field(default_factory=list)
+    order: list[str] | None = None
+
+    def is_empty(self) -> bool:
+        return (
+            len(self.added) + len(self.removed) + len(self.changed) == 0
+            and self.order is None
+        )
+
+
+def diff_artists(*, before: list[dict], after: list[dict]) -> LineupDiff:
+    previous = {record_key(record): record for record in before}
+    current = {record_key(record): record for record in after}
+    diff = LineupDiff()
+    for key, record in current.items():
+        if key not in previous:
+            diff.added.append(record)
+        elif previous[key] != record:
+            diff.changed.append(record)
+    diff.removed = [key for key in previous if key not in current]
+    # Billing order only travels with the patch when appending the added
+    # artists to the remaining ones would not reproduce it
+    appended = [key for key in previous if key in current]
+    appended += [record_key(record) for record in diff.added]
+    if appended != list(current):
+        diff.order = list(current)
+    return diff
+
+
+@dataclass
+class Change:
+    festival: str
+    sequence: int
+    created_at: str
+    diff: LineupDiff
+
+    @property
+    def key(self) -> str:
+        return change_key(self.festival, self.sequence)
+
+    def to_dict(self) -> dict:
+        change = {"festival": self.festival, "sequence": self.sequence}
+        change["created_at"] = self.created_at
+        if len(self.diff.added) > 0:
+            change["added"] = self.diff.added
+        if len(self.diff.removed) > 0:
+            change["removed"] = self.diff.removed
+        if len(self.diff.changed) > 0:
+            change["changed"] = self.diff.changed
+        if self.diff.order is not None:
+            change["order"] = self.diff.order
+        return change
+
+
+def apply_change(records: list[dict], change: dict) -> list[dict]:
+    removed = set(change.get("removed", []))
+    changed = {record_key(record): record for record in change.get("changed", [])}
+    result = [
+        changed.get(record_key(record), record)
+        for record in records
+        if record_key(record) not in removed
+    ]
+    result += change.get("added", [])
+    if "order" in change:
+        position = {key: i for i, key in enumerate(change["order"])}
+        result.sort(key=lambda record: position[record_key(record)])
+    return result
+
+
+class FileNotifier:
+    def __init__(self, *, path: str):
+        self.path = path
+
+    def notify(self, change: Change) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(change.to_dict()) + "\n")
+
+
+class SnsNotifier:
+    def __init__(self, *, topic_arn: str, sns_client=None):
+        self.topic_arn = topic_arn
+        self.sns_client = sns_client
+
+    def notify(self, change: Change) -> None:
+        if self.sns_client is None:
+            import boto3
+
+            self.sns_client = boto3.client("sns")
+        self.sns_client.publish(
+            TopicArn=self.topic_arn,
+            Subject=f"Lineup change {change.festival} #{change.sequence}",
+            Message=json.dumps(change.to_dict(), separators=(",", ":")),
+            MessageAttributes={
+                "festival": {"DataType": "String", "StringValue": change.festival}
+            },
+        )
+
+
+def notifier_from_env() -> FileNotifier | SnsNotifier | None:
+    setting = os.environ.get("CHANGE_NOTIFIER", "")
+    if setting == "":
+        return None
+    if setting.startswith("file:"):
+        return FileNotifier(path=setting.removeprefix("file:"))
+    if setting.startswith("sns:"):
+        return SnsNotifier(topic_arn=setting.removeprefix("sns:"))
+    raise ValueError(
+        f"Unknown CHANGE_NOTIFIER {setting}, expected file:<path> or sns:<topic arn>"
+    )
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        *,
+        s3: S3,
+        bucket_name: str,
+        notifier: FileNotifier | SnsNotifier | None = None,
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.notifier = notifier
+
+    def publish(
+        self, *, festival: str, sequence: int, diff: LineupDiff, now: float
+    ) -> Change:
+        change = self.write(festival=festival, sequence=sequence, diff=diff, now=now)
+        self.notify(change)
+        return change
+
+    def append(
+        self, *, festival: str, after: int, diff: LineupDiff, now: float
+    ) -> Change:
+        # A patch left behind by a run whose manifest commit failed describes a
+        # list that was published, so the next patch follows it
+        for sequence in range(after + 1, after + 1 + MAX_APPEND_ATTEMPTS):
+            try:
+                return self.write(
+                    festival=festival, sequence=sequence, diff=diff, now=now
+                )
+            except S3ConflictException:
+                logger.warning(f"Change {sequence} of {festival} already exists")
+        raise S3ConflictException(
+            f"No free change sequence of {festival} after {after}"
+        )
+
+    def write(
+        self, *, festival: str, sequence: int, diff: LineupDiff, now: float
+    ) -> Change:
+        change = Change(
+            festival=festival,
+            sequence=sequence,
+            created_at=datetime.fromtimestamp(now, UTC).isoformat(),
+            diff=diff,
+        )
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=change.key,
+            json=json.dumps(change.to_dict(), separators=(",", ":")),
+            cache_control=CHANGE_CACHE_CONTROL,
+            if_none_match="*",
+        )
+        return change
+
+    def notify(self, change: Change) -> None:
+        if self.notifier is None:
+            return
+        try:
+            self.notifier.notify(change)
+        except Exception as e:
+            logger.error(f"Failed to notify about {change.key}", exc_info=e)
+
+    def load(self, *, festival: str, sequence: int) -> dict | None:
+        body = self.s3.download(
+            bucket_name=self.bucket_name, key=change_key(festival, sequence)
+        )
+        return None if body is None else json.loads(body)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+
+from src.adapter.s3 import S3
+from src.adapter.spotify import ArtistInformation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+def lineup_fingerprint(artist_names: list[str]) -> str:
+    normalized = sorted({" ".join(name.split()).casefold() for name in artist_names})
+    return hashlib.sha256("\n".join(normalized).encode()).hexdigest()
+
+
+@dataclass
+class Checkpoint:
+    festival: str
+    artists: dict[str, ArtistInformation] = field(default_factory=dict)
+    resolved_at: dict[str, float] = field(default_factory=dict)
+    fingerprint: str | None = None
+
+    def is_new(self, artist_name: str) -> bool:
+        return artist_name not in self.artists
+
+    def last_known_good(self, artist_name: str) -> ArtistInformation | None:
+        if artist_name in self.artists:
+            return self.artists[artist_name]
+        for search_name, artist in self.artists.items():
+            if search_name.casefold() == artist_name.casefold():
+                return artist
+        return None
+
+    def update(self, *, artists: list[ArtistInformation], now: float) -> None:
+        resolved_at = {}
+        for artist in artists:
+            if artist.stale:
+                resolved_at[artist.search_name] = self.resolved_at.get(
+                    artist.search_name, 0
+                )
+            elif self.artists.get(artist.search_name) is artist:
+                resolved_at[artist.search_name] = self.resolved_at.get(
+                    artist.search_name, now
+                )
+            else:
+                resolved_at[artist.search_name] = now
+        self.artists = {artist.search_name: artist for artist in artists}
+        self.resolved_at = resolved_at
+
+    def is_unchanged(self, *, fingerprint: str, now: float, max_age: float) -> bool:
+        if self.fingerprint is None or self.fingerprint != fingerprint:
+            return False
+        return all(
+            now - self.resolved_at.get(search_name, 0) < max_age
+            for search_name in self.artists
+        )
+
+
+class CheckpointStore:
+    def __init__(self, *, s3: S3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    @staticmethod
+    def key(festival: str) -> str:
+        return f"checkpoints/{festival}.json"
+
+    def load(self, *, festival: str, output_key: str | None = None) -> Checkpoint:
+        body = self.s3.download(bucket_name=self.bucket_name, key=self.key(festival))
+        if body is None and output_key is not None:
+            return self._load_from_output(festival=festival, output_key=output_key)
+        if body is None:
+            return Checkpoint(festival=festival)
+
+        document = json.loads(body)
+        artists = {}
+        resolved_at = {}
+        for search_name, artist in document["artists"].items():
+            artists[search_name] = ArtistInformation(
+                id=artist["id"],
+                name=artist["artist"],
+                search_name=search_name,
+                image_url=artist["image"],
+            )
+            if "resolved_at" in artist:
+                resolved_at[search_name] = artist["resolved_at"]
+        logger.info(f"Loaded checkpoint for {festival} with {len(artists)} artists")
+        return Checkpoint(
+            festival=festival,
+            artists=artists,
+            resolved_at=resolved_at,
+            fingerprint=document.get("fingerprint"),
+        )
+
+    def _load_from_output(self, *, festival: str, output_key: str) -> Checkpoint:
+        body = self.s3.download(bucket_name=self.bucket_name, key=output_key)
+        if body is None:
+            return Checkpoint(festival=festival)
+
+        artists = {}
+        for artist in json.loads(body):
+            artists[artist["artist"]] = ArtistInformation(
+                id=artist["id"],
+                name=artist["artist"],
+                search_name=artist["artist"],
+                image_url=artist["image"],
+            )
+        logger.info(
+            f"Seeded checkpoint for {festival} with {len(artists)} artists from {output_key}"
+        )
+        return Checkpoint(festival=festival, artists=artists)
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        artists = {}
+        for search_name, artist in checkpoint.artists.items():
+            artists[search_name] = {
+                "id": artist.id,
+                "artist": artist.name,
+                "image": artist.image_url,
+            }
+            if search_name in checkpoint.resolved_at:
+                artists[search_name]["resolved_at"] = checkpoint.resolved_at[
+                    search_name
+                ]
+        document = {"festival": checkpoint.festival, "artists": artists}
+        if checkpoint.fingerprint is not None:
+            document["fingerprint"] = checkpoint.fingerprint
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=self.key(checkpoint.festival),
+            json=json.dumps(document),
+        )
@@ -0,0 +1,44 @@
+import math
+import os
+import time
+from collections.abc import Callable
+
+# Left for publishing and the uploads after the run: the search archive writes
+# one run object and its index, the HTTP cassette, metrics and traces one object each
+DEFAULT_RESERVE_SECONDS = 15
+
+
+class Deadline:
+    def __init__(
+        self,
+        *,
+        remaining_millis: Callable[[], int] | None = None,
+        reserve_seconds: float | None = None,
+    ):
+        self.remaining_millis = remaining_millis
+        if reserve_seconds is None:
+            reserve_seconds = float(
+                os.environ.get("DEADLINE_RESERVE_SECONDS", DEFAULT_RESERVE_SECONDS)
+            )
+        self.reserve_seconds = reserve_seconds
+
+    @classmethod
+    def from_context(cls, context) -> "Deadline":
+        remaining_millis = getattr(context, "get_remaining_time_in_millis", None)
+        return cls(remaining_millis=remaining_millis)
+
+    @classmethod
+    def after(cls, *, seconds: float, reserve_seconds: float = 0) -> "Deadline":
+        end = time.monotonic() + seconds
+        return cls(
+            remaining_millis=lambda: int((end - time.monotonic()) * 1000),
+            reserve_seconds=reserve_seconds,
+        )
+
+    def remaining_seconds(self) -> float:
+        if self.remaining_millis is None:
+            return math.inf
+        return self.remaining_millis() / 1000
+
+    def is_running_low(self) -> bool:
+        return self.remaining_seconds() <= self.reserve_seconds
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+
+@dataclass(frozen=True)
+class Selector:
+    tag: str
+    attribute: str | None = None
+    prefix: str = ""
+    class_name: str | None = None
+
+    def matches(self, tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        if tag != self.tag:
+            return False
+        attributes = dict(attrs)
+        if (
+            self.class_name is not None
+            and self.class_name not in (attributes.get("class") or "").split()
+        ):
+            return False
+        if self.attribute is not None:
+            value = attributes.get(self.attribute)
+            if value is None or not value.startswith(self.prefix):
+                return False
+        return True
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, selectors: tuple[Selector, ...]):
+        super().__init__()
+        self.selectors = selectors
+        self.position = 0
+        self.depth = 0
+        self.text: list[str] = []
+        self.results: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth > 0:
+            if tag == self.selectors[-1].tag:
+                self.depth += 1
+            return
+        if self.position > 0 and self.selectors[0].matches(tag, attrs):
+            self.position = 0
+        if not self.selectors[self.position].matches(tag, attrs):
+            return
+        if self.position < len(self.selectors) - 1:
+            self.position += 1
+            return
+        self.depth = 1
+        self.text = []
+
+    def handle_endtag(self, tag):
+        if self.depth == 0 or tag != self.selectors[-1].tag:
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            self.results.append("".join(self.text))
+            self.position = 0
+
+    def handle_data(self, data):
+        if self.depth > 0:
+            self.text.append(data)
+
+
+def extract_text(body: str, *selectors: Selector) -> list[str]:
+    # Streams the document and only keeps the text of elements reached through
+    # the selector chain, each selector matching the next element after the
+    # previous match like BeautifulSoup's find_next.
+    extractor = _TextExtractor(selectors)
+    extractor.feed(body)
+    extractor.close()
+    if extractor.depth > 0:
+        extractor.results.append("".join(extractor.text))
+    return extractor.results
+
+
+class _AnyTextExtractor(HTMLParser):
+    def __init__(self, selectors: tuple[Selector, ...]):
+        super().__init__()
+        self.selectors = selectors
+        self.match = 0
+        self.depth = 0
+        self.text: list[str] = []
+        self.results: list[tuple[int, str]] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth > 0:
+            if tag == self.selectors[self.match].tag:
+                self.depth += 1
+            return
+        for index, selector in enumerate(self.selectors):
+            if selector.matches(tag, attrs):
+                self.match = index
+                self.depth = 1
+                self.text = []
+                return
+
+    def handle_endtag(self, tag):
+        if self.depth == 0 or tag != self.selectors[self.match].tag:
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            self.results.append((self.match, "".join(self.text)))
+
+    def handle_data(self, data):
+        if self.depth > 0:
+            self.text.append(data)
+
+
+def extract_any_text(body: str, *selectors: Selector) -> list[tuple[int, str]]:
+    # Unlike extract_text, every selector stands on its own and the results keep
+    # document order, tagged with the index of the selector that matched.
+    extractor = _AnyTextExtractor(selectors)
+    extractor.feed(body)
+    extractor.close()
+    if extractor.depth > 0:
+        extractor.results.append((extractor.match, "".join(extractor.text)))
+    return extractor.results
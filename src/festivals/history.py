@@ -0,0 +1,154 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from src.adapter.s3 import S3
+from src.festivals.changes import ChangeFeed, apply_change
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(now: float) -> str:
+    return datetime.fromtimestamp(now, UTC).isoformat()
+
+
+def history_key(artist_name: str) -> str:
+    # Normalised like the lineup fingerprint, so a respelled name is the same artist
+    return " ".join(artist_name.split()).casefold()
+
+
+@dataclass
+class ArtistSeen:
+    artist: str
+    first_seen: str
+    last_seen: str
+    removed_at: str | None = None
+    id: str | None = None
+
+    def to_dict(self) -> dict:
+        seen = {
+            "artist": self.artist,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+        }
+        if self.id is not None:
+            seen["id"] = self.id
+        if self.removed_at is not None:
+            seen["removed_at"] = self.removed_at
+        return seen
+
+    @classmethod
+    def from_dict(cls, seen: dict) -> "ArtistSeen":
+        return cls(
+            artist=seen["artist"],
+            first_seen=seen["first_seen"],
+            last_seen=seen["last_seen"],
+            removed_at=seen.get("removed_at"),
+            id=seen.get("id"),
+        )
+
+
+@dataclass
+class HistoryIndex:
+    festival: str
+    artists: dict[str, ArtistSeen] = field(default_factory=dict)
+
+    def record(
+        self,
+        *,
+        artist_names: list[str],
+        ids: dict[str, str | None] | None = None,
+        now: float,
+    ) -> None:
+        seen_at = _timestamp(now)
+        present = set()
+        for artist_name in artist_names:
+            key = history_key(artist_name)
+            present.add(key)
+            artist_id = None if ids is None else ids.get(artist_name)
+            seen = self.artists.get(key)
+            if seen is None:
+                self.artists[key] = ArtistSeen(
+                    artist=artist_name,
+                    first_seen=seen_at,
+                    last_seen=seen_at,
+                    id=artist_id,
+                )
+                continue
+            seen.artist = artist_name
+            seen.last_seen = seen_at
+            seen.removed_at = None
+            # A failed lookup keeps the id an earlier run resolved
+            if artist_id is not None:
+                seen.id = artist_id
+        for key, seen in self.artists.items():
+            if key not in present and seen.removed_at is None:
+                seen.removed_at = seen_at
+
+    def announced_since(self, since: float) -> list[tuple[str, ArtistSeen]]:
+        cutoff = _timestamp(since)
+        announced = [
+            (key, seen)
+            for key, seen in self.artists.items()
+            if seen.first_seen >= cutoff and seen.removed_at is None
+        ]
+        return sorted(announced, key=lambda entry: entry[1].first_seen)
+
+    def removed_since(self, since: float) -> list[tuple[str, ArtistSeen]]:
+        cutoff = _timestamp(since)
+        removed = [
+            (key, seen)
+            for key, seen in self.artists.items()
+            if seen.removed_at is not None and seen.removed_at >= cutoff
+        ]
+        return sorted(removed, key=lambda entry: entry[1].removed_at)
+
+
+class HistoryStore:
+    def __init__(self, *, s3: S3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    @staticmethod
+    def key(festival: str) -> str:
+        return f"history/{festival}.json"
+
+    def load(self, *, festival: str) -> HistoryIndex:
+        body = self.s3.download(bucket_name=self.bucket_name, key=self.key(festival))
+        if body is None:
+            return HistoryIndex(festival=festival)
+        document = json.loads(body)
+        return HistoryIndex(
+            festival=festival,
+            artists={
+                key: ArtistSeen.from_dict(seen)
+                for key, seen in document["artists"].items()
+            },
+        )
+
+    def save(self, index: HistoryIndex) -> None:
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=self.key(index.festival),
+            json=json.dumps(
+                {
+                    "festival": index.festival,
+                    "artists": {
+                        key: seen.to_dict() for key, seen in index.artists.items()
+                    },
+                },
+                separators=(",", ":"),
+            ),
+        )
+
+
+def lineup_at(feed: ChangeFeed, *, festival: str, sequence: int) -> list[dict]:
+    records = []
+    for number in range(1, sequence + 1):
+        change = feed.load(festival=festival, sequence=number)
+        if change is None:
+            logger.warning(f"Missing change {number} of {festival}, history has a gap")
+            continue
+        records = apply_change(records, change)
+    return records
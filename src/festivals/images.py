@@ -0,0 +1,279 @@
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from src.adapter.http import HttpStack
+from src.adapter.s3 import S3
+from src.executor import Executor, ExecutorKind
+from src.festivals.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+IMAGE_INDEX_KEY = "images/index.json"
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_SIZES = (160, 320)
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+
+def image_key(digest: str, extension: str) -> str:
+    return f"images/{digest}.{extension}"
+
+
+def variant_key(digest: str, size: int) -> str:
+    return f"images/{digest}/{size}.webp"
+
+
+def render_variants(body: bytes, sizes: tuple[int, ...]) -> dict[int, bytes]:
+    from PIL import Image
+
+    variants = {}
+    with Image.open(io.BytesIO(body)) as image:
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for size in sizes:
+            variant = image.copy()
+            variant.thumbnail((size, size))
+            buffer = io.BytesIO()
+            variant.save(buffer, format="WEBP", quality=80)
+            variants[size] = buffer.getvalue()
+    return variants
+
+
+@dataclass
+class MirroredImage:
+    source: str
+    hash: str
+    extension: str
+    sizes: list[int] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "hash": self.hash,
+            "key": image_key(self.hash, self.extension),
+            "variants": {
+                str(size): variant_key(self.hash, size) for size in self.sizes
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "MirroredImage":
+        return cls(
+            source=entry["source"],
+            hash=entry["hash"],
+            extension=entry["key"].rsplit(".", 1)[-1],
+            sizes=[int(size) for size in entry["variants"]],
+        )
+
+
+@dataclass
+class MirrorStats:
+    downloaded: int = 0
+    unchanged: int = 0
+    deduplicated: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "downloaded": self.downloaded,
+            "unchanged": self.unchanged,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
+
+class ImageMirror:
+    def __init__(
+        self,
+        *,
+        s3: S3,
+        bucket_name: str,
+        executor: Executor,
+        sizes: tuple[int, ...] = DEFAULT_SIZES,
+        max_at_once: int = 8,
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.executor = executor
+        self.sizes = sizes
+        self.max_at_once = max_at_once
+
+    def load_index(self) -> dict[str, MirroredImage]:
+        body = self.s3.download(bucket_name=self.bucket_name, key=IMAGE_INDEX_KEY)
+        if body is None:
+            return {}
+        return {
+            artist_id: MirroredImage.from_dict(entry)
+            for artist_id, entry in json.loads(body).items()
+        }
+
+    def save_index(self, index: dict[str, MirroredImage]) -> None:
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=IMAGE_INDEX_KEY,
+            json=json.dumps(
+                {
+                    artist_id: image.to_dict()
+                    for artist_id, image in sorted(index.items())
+                },
+                separators=(",", ":"),
+            ),
+        )
+
+    async def mirror(
+        self,
+        records: list[dict],
+        *,
+        http: HttpStack,
+        deadline: Deadline | None = None,
+    ) -> MirrorStats:
+        import aiometer
+
+        if deadline is None:
+            deadline = Deadline()
+        stats = MirrorStats()
+        index = self.load_index()
+        sources = {}
+        for record in records:
+            if record["id"] is None or record["image"] is None:
+                continue
+            known = index.get(record["id"])
+            if known is not None and known.source == record["image"]:
+                stats.unchanged += 1
+                continue
+            sources[record["id"]] = record["image"]
+        if len(sources) == 0:
+            return stats
+
+        urls = list(dict.fromkeys(sources.values()))
+        known_hashes = {image.hash: image for image in index.values()}
+        async with http.async_client(timeout=10) as client:
+            mirrored = await aiometer.run_all(
+                [
+                    functools.partial(
+                        self._mirror_image,
+                        client=client,
+                        source=source,
+                        known_hashes=known_hashes,
+                        stats=stats,
+                        deadline=deadline,
+                    )
+                    for source in urls
+                ],
+                max_at_once=self.max_at_once,
+            )
+        images = dict(zip(urls, mirrored))
+        for artist_id, source in sources.items():
+            if images[source] is not None:
+                index[artist_id] = images[source]
+        self.save_index(index)
+        logger.info(f"Mirrored images {stats.to_dict()}")
+        return stats
+
+    async def _mirror_image(
+        self,
+        *,
+        client,
+        source: str,
+        known_hashes: dict[str, MirroredImage],
+        stats: MirrorStats,
+        deadline: Deadline,
+    ) -> MirroredImage | None:
+        # Skipped images stay out of the index, so the next run mirrors them
+        if deadline.is_running_low():
+            stats.skipped += 1
+            return None
+        try:
+            response = await client.get(fetch_url(source))
+        except Exception as e:
+            logger.error(f"Failed to download image {source}", exc_info=e)
+            stats.failed += 1
+            return None
+        if response.status_code != 200:
+            logger.error(f"Image {source} returned status {response.status_code}")
+            stats.failed += 1
+            return None
+        stats.downloaded += 1
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        known = known_hashes.get(digest)
+        if known is not None:
+            stats.deduplicated += 1
+            return MirroredImage(
+                source=source,
+                hash=digest,
+                extension=known.extension,
+                sizes=known.sizes,
+            )
+
+        content_type = response.headers.get("Content-Type", "image/jpeg")
+        content_type = content_type.split(";")[0].strip()
+        image = MirroredImage(
+            source=source,
+            hash=digest,
+            extension=EXTENSIONS.get(content_type, "img"),
+            sizes=list(self.sizes),
+        )
+        try:
+            variants = await self.executor.run(render_variants, body, self.sizes)
+        except Exception as e:
+            logger.error(f"Failed to resize image {source}", exc_info=e)
+            stats.failed += 1
+            return None
+        self.s3.upload_bytes(
+            bucket_name=self.bucket_name,
+            key=image_key(digest, image.extension),
+            body=body,
+            content_type=content_type,
+            cache_control=IMAGE_CACHE_CONTROL,
+        )
+        for size, variant in variants.items():
+            self.s3.upload_bytes(
+                bucket_name=self.bucket_name,
+                key=variant_key(digest, size),
+                body=variant,
+                content_type="image/webp",
+                cache_control=IMAGE_CACHE_CONTROL,
+            )
+        known_hashes[digest] = image
+        return image
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+def fetch_url(source: str) -> str:
+    base_url = os.environ.get("SPOTIFY_IMAGE_URL")
+    if base_url is None:
+        return source
+    parts = urlsplit(source)
+    return f"{base_url.rstrip('/')}{parts.path}"
+
+
+def image_mirror_from_env(*, s3: S3) -> ImageMirror | None:
+    setting = os.environ.get("IMAGE_MIRROR", "")
+    if setting == "":
+        return None
+    if setting != "s3":
+        raise ValueError(f"Unknown IMAGE_MIRROR {setting}, expected s3")
+    max_workers = os.environ.get("IMAGE_MIRROR_WORKERS")
+    sizes = os.environ.get("IMAGE_MIRROR_SIZES")
+    return ImageMirror(
+        s3=s3,
+        bucket_name=os.environ["FESTIVAL_ARTISTS_BUCKET"],
+        executor=Executor(
+            kind=ExecutorKind(
+                os.environ.get("IMAGE_MIRROR_EXECUTOR_KIND", ExecutorKind.THREAD)
+            ),
+            max_workers=None if max_workers is None else int(max_workers),
+        ),
+        sizes=DEFAULT_SIZES
+        if sizes is None
+        else tuple(int(size) for size in sizes.split(",")),
+    )
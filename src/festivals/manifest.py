@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TypeVar
+
+from src.adapter.s3 import S3, S3ConflictException
+from src.metrics import current_metrics
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_KEY = "manifest.json"
+MANIFEST_CACHE_CONTROL = "public, max-age=60"
+OBJECT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MAX_COMMIT_ATTEMPTS = 5
+
+T = TypeVar("T")
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def object_key(digest: str) -> str:
+    return f"objects/{digest}.json"
+
+
+@dataclass
+class ManifestEntry:
+    hash: str
+    artists: int
+    updated_at: str
+    versions: dict[str, str] = field(default_factory=dict)
+    sequence: int = 0
+
+    def to_dict(self) -> dict:
+        entry = {
+            "hash": self.hash,
+            "key": object_key(self.hash),
+            "artists": self.artists,
+            "updated_at": self.updated_at,
+            "sequence": self.sequence,
+        }
+        for version, digest in self.versions.items():
+            entry[version] = {"hash": digest, "key": object_key(digest)}
+        return entry
+
+
+@dataclass
+class Manifest:
+    festivals: dict[str, ManifestEntry] = field(default_factory=dict)
+    changed: bool = False
+    etag: str | None = None
+
+    def update(
+        self, *, festival: str, bodies: dict[str, str], artists: int, now: float
+    ) -> list[tuple[str, str]]:
+        digests = {version: content_hash(body) for version, body in bodies.items()}
+        versions = {v: digest for v, digest in digests.items() if v != "v1"}
+        current = self.festivals.get(festival)
+        if current is not None and (current.hash, current.versions) == (
+            digests["v1"],
+            versions,
+        ):
+            return []
+        self.festivals[festival] = ManifestEntry(
+            hash=digests["v1"],
+            artists=artists,
+            updated_at=datetime.fromtimestamp(now, UTC).isoformat(),
+            versions=versions,
+            sequence=0 if current is None else current.sequence,
+        )
+        self.changed = True
+        return [
+            (object_key(digest), bodies[version]) for version, digest in digests.items()
+        ]
+
+    def advance_sequence(self, festival: str, sequence: int) -> None:
+        entry = self.festivals[festival]
+        if sequence > entry.sequence:
+            entry.sequence = sequence
+            self.changed = True
+
+
+class ManifestStore:
+    def __init__(self, *, s3: S3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    def load(self) -> Manifest:
+        body, etag = self.s3.download_with_etag(
+            bucket_name=self.bucket_name, key=MANIFEST_KEY
+        )
+        if body is None:
+            return Manifest()
+        festivals = {}
+        for festival, entry in json.loads(body)["festivals"].items():
+            festivals[festival] = ManifestEntry(
+                hash=entry["hash"],
+                artists=entry["artists"],
+                updated_at=entry["updated_at"],
+                versions={
+                    version: value["hash"]
+                    for version, value in entry.items()
+                    if isinstance(value, dict)
+                },
+                sequence=entry.get("sequence", 0),
+            )
+        return Manifest(festivals=festivals, etag=etag)
+
+    def publish_objects(self, objects: list[tuple[str, str]]) -> None:
+        for key, body in objects:
+            self.s3.upload(
+                bucket_name=self.bucket_name,
+                key=key,
+                json=body,
+                cache_control=OBJECT_CACHE_CONTROL,
+            )
+
+    def save(self, manifest: Manifest) -> None:
+        document = {
+            "version": 1,
+            "festivals": {
+                festival: entry.to_dict()
+                for festival, entry in sorted(manifest.festivals.items())
+            },
+        }
+        # Invocations for different festivals run concurrently, so the manifest is
+        # only replaced if nobody else wrote it since it was loaded
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=MANIFEST_KEY,
+            json=json.dumps(document, separators=(",", ":")),
+            cache_control=MANIFEST_CACHE_CONTROL,
+            if_match=manifest.etag,
+            if_none_match="*" if manifest.etag is None else None,
+        )
+        manifest.changed = False
+
+    def commit(self, change: Callable[[Manifest], T]) -> T:
+        for attempt in range(1, MAX_COMMIT_ATTEMPTS + 1):
+            manifest = self.load()
+            result = change(manifest)
+            if not manifest.changed:
+                return result
+            try:
+                self.save(manifest)
+                return result
+            except S3ConflictException:
+                current_metrics().increment("ManifestConflicts")
+                logger.warning(
+                    f"{MANIFEST_KEY} changed concurrently, retrying ({attempt}/{MAX_COMMIT_ATTEMPTS})"
+                )
+        raise S3ConflictException(
+            f"{MANIFEST_KEY} kept changing for {MAX_COMMIT_ATTEMPTS} attempts"
+        )
@@ -0,0 +1,85 @@
+import json
+import os
+
+from src.adapter.spotify import ArtistInformation
+
+IMAGE_PREFIX = "https://i.scdn.co/image/"
+OUTPUT_VERSIONS = ("v1", "v2")
+
+
+def serialize_artists(artists: list[ArtistInformation]) -> str:
+    body = []
+    for artist in artists:
+        entry = {"id": artist.id, "artist": artist.name, "image": artist.image_url}
+        if artist.stale:
+            entry["stale"] = True
+        body.append(entry)
+    return json.dumps(body)
+
+
+def serialize_artists_v2(artists: list[ArtistInformation]) -> str:
+    # Columnar rows with the Spotify image host factored out; images that do not
+    # start with the prefix keep their absolute URL.
+    images = []
+    for artist in artists:
+        image = artist.image_url
+        if image is not None and image.startswith(IMAGE_PREFIX):
+            image = image.removeprefix(IMAGE_PREFIX)
+        images.append(image)
+    body = {
+        "v": 2,
+        "p": IMAGE_PREFIX,
+        "i": [artist.id for artist in artists],
+        "a": [artist.name for artist in artists],
+        "m": images,
+    }
+    stale = [index for index, artist in enumerate(artists) if artist.stale]
+    if len(stale) > 0:
+        body["s"] = stale
+    return json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+
+
+def deserialize_artists_v2(body: str) -> list[ArtistInformation]:
+    document = json.loads(body)
+    stale = set(document.get("s", []))
+    artists = []
+    for index, (artist_id, name, image) in enumerate(
+        zip(document["i"], document["a"], document["m"])
+    ):
+        if image is not None and "://" not in image:
+            image = document["p"] + image
+        artists.append(
+            ArtistInformation(
+                id=artist_id,
+                name=name,
+                search_name=name,
+                image_url=image,
+                stale=index in stale,
+            )
+        )
+    return artists
+
+
+def versioned_key(output_key: str, version: str) -> str:
+    if version == "v1":
+        return output_key
+    return f"{version}/{output_key}"
+
+
+def output_versions_from_env() -> list[str]:
+    versions = [
+        version.strip()
+        for version in os.environ.get("OUTPUT_VERSIONS", "v1").split(",")
+        if version.strip() != ""
+    ]
+    for version in versions:
+        if version not in OUTPUT_VERSIONS:
+            raise ValueError(
+                f"Unknown output version {version} in OUTPUT_VERSIONS, expected v1 or v2"
+            )
+    if "v1" not in versions:
+        versions.insert(0, "v1")
+    return versions
+
+
+SERIALIZERS = {"v1": serialize_artists, "v2": serialize_artists_v2}
@@ -0,0 +1,63 @@
+import json
+import re
+
+from src.festivals.extract import Selector, extract_any_text, extract_text
+from src.festivals.timetable import Slot, build_slots
+
+DONG_BAND_LINK = Selector(
+    tag="a",
+    attribute="href",
+    prefix="https://www.dongopenair.de/band-details/?band=",
+)
+DONG_DAY = Selector(tag="p")
+DONG_TIME_SLOT = re.compile("^(\\d\\d):(\\d\\d)\\s+(.+)$")
+RUDE_BAND_TITLE = (
+    Selector(tag="div", class_name="cb-article-meta"),
+    Selector(tag="h2"),
+    Selector(tag="a"),
+)
+
+
+def parse_wacken(body: str) -> list[str]:
+    return [artist["artist"]["title"] for artist in json.loads(body)]
+
+
+def parse_dong(body: str) -> list[str]:
+    artist_names = []
+    for text in extract_text(body, DONG_BAND_LINK):
+        artist_name = text.strip()
+        if artist_name != "" and not re.match("^\\d\\d:\\d\\d", artist_name):
+            artist_names.append(artist_name)
+    return artist_names
+
+
+def parse_rude(body: str) -> list[str]:
+    return [text.split(" (")[0] for text in extract_text(body, *RUDE_BAND_TITLE)]
+
+
+def parse_dong_with_timetable(body: str) -> tuple[list[str], list[Slot]]:
+    # The running order and the band list are on the same page, so both come
+    # out of a single pass over it
+    artist_names = []
+    entries = []
+    day = None
+    for selector, text in extract_any_text(body, DONG_DAY, DONG_BAND_LINK):
+        if selector == 0:
+            text = " ".join(text.split())
+            if text != "":
+                day = text
+            continue
+        artist_name = text.strip()
+        if artist_name != "" and not re.match("^\\d\\d:\\d\\d", artist_name):
+            artist_names.append(artist_name)
+            continue
+        match = DONG_TIME_SLOT.match(" ".join(text.split()))
+        if match is None or day is None:
+            continue
+        hours, minutes, artist_name = match.groups()
+        entries.append((day, None, int(hours) * 60 + int(minutes), artist_name))
+    return artist_names, build_slots(entries)
+
+
+def parse_dong_timetable(body: str) -> list[Slot]:
+    return parse_dong_with_timetable(body)[1]
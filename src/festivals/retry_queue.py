@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+from src.adapter.s3 import S3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_SECONDS = 60 * 60
+MAX_BACKOFF_SECONDS = 24 * 60 * 60
+
+
+@dataclass
+class RetryEntry:
+    attempts: int
+    next_attempt_at: float
+    last_error: str
+
+
+@dataclass
+class RetryQueue:
+    festival: str
+    entries: dict[str, RetryEntry] = field(default_factory=dict)
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS
+
+    @classmethod
+    def from_env(
+        cls, *, festival: str, entries: dict[str, RetryEntry] | None = None
+    ) -> "RetryQueue":
+        return cls(
+            festival=festival,
+            entries={} if entries is None else entries,
+            max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+            backoff_seconds=float(
+                os.getenv("RETRY_BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS)
+            ),
+        )
+
+    def is_due(self, artist_name: str, *, now: float) -> bool:
+        if artist_name not in self.entries:
+            return True
+        return self.entries[artist_name].next_attempt_at <= now
+
+    def due_names(self, *, now: float) -> list[str]:
+        return [name for name in self.entries if self.is_due(name, now=now)]
+
+    def record_failure(self, artist_name: str, *, error: str, now: float) -> None:
+        attempts = 1
+        if artist_name in self.entries:
+            attempts = self.entries[artist_name].attempts + 1
+        backoff = min(self.backoff_seconds * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+        self.entries[artist_name] = RetryEntry(
+            attempts=attempts, next_attempt_at=now + backoff, last_error=error
+        )
+
+    def record_success(self, artist_name: str) -> None:
+        self.entries.pop(artist_name, None)
+
+    def should_escalate(self, artist_name: str) -> bool:
+        return (
+            artist_name in self.entries
+            and self.entries[artist_name].attempts >= self.max_attempts
+        )
+
+
+class RetryQueueStore:
+    def __init__(self, *, s3: S3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    @staticmethod
+    def key(festival: str) -> str:
+        return f"retry-queue/{festival}.json"
+
+    def load(self, *, festival: str) -> RetryQueue:
+        body = self.s3.download(bucket_name=self.bucket_name, key=self.key(festival))
+        if body is None:
+            return RetryQueue.from_env(festival=festival)
+
+        entries = {}
+        for artist_name, entry in json.loads(body)["entries"].items():
+            entries[artist_name] = RetryEntry(
+                attempts=entry["attempts"],
+                next_attempt_at=entry["next_attempt_at"],
+                last_error=entry["last_error"],
+            )
+        logger.info(f"Loaded retry queue for {festival} with {len(entries)} artists")
+        return RetryQueue.from_env(festival=festival, entries=entries)
+
+    def save(self, retry_queue: RetryQueue) -> None:
+        entries = {}
+        for artist_name, entry in retry_queue.entries.items():
+            entries[artist_name] = {
+                "attempts": entry.attempts,
+                "next_attempt_at": entry.next_attempt_at,
+                "last_error": entry.last_error,
+            }
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=self.key(retry_queue.festival),
+            json=json.dumps({"festival": retry_queue.festival, "entries": entries}),
+        )
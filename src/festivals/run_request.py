@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+from src.festivals.checkpoint import Checkpoint
+from src.festivals.sources import source_names
+
+
+class Mode(StrEnum):
+    FULL = "full"
+    INCREMENTAL = "incremental"
+    REFRESH_ONLY = "refresh-only"
+
+
+@dataclass
+class RunRequest:
+    festivals: list[str] = field(default_factory=source_names)
+    artists: list[str] | None = None
+    lineups: dict[str, list[str]] = field(default_factory=dict)
+    mode: Mode = Mode.FULL
+    fan_out: bool = False
+    force: bool = False
+    profile: bool = False
+
+    @classmethod
+    def from_event(cls, event) -> "RunRequest":
+        if not isinstance(event, dict):
+            return cls()
+
+        known_festivals = source_names()
+        festivals = event.get("festivals", known_festivals)
+        if not _is_names(festivals):
+            raise InvalidRunRequestException(
+                f"Invalid festivals {festivals!r}, expected a list of names"
+            )
+        unknown_festivals = [f for f in festivals if f not in known_festivals]
+        if len(unknown_festivals) > 0:
+            raise InvalidRunRequestException(
+                f"Unknown festivals {unknown_festivals}, expected any of {known_festivals}"
+            )
+        artists = event.get("artists")
+        if artists is not None and not _is_names(artists):
+            raise InvalidRunRequestException(
+                f"Invalid artists {artists!r}, expected a list of names"
+            )
+        lineups = event.get("lineups", {})
+        if not isinstance(lineups, dict) or not all(
+            _is_names(names) for names in lineups.values()
+        ):
+            raise InvalidRunRequestException(
+                f"Invalid lineups {lineups!r}, expected lists of names per festival"
+            )
+        unknown_lineups = [f for f in lineups if f not in known_festivals]
+        if len(unknown_lineups) > 0:
+            raise InvalidRunRequestException(
+                f"Unknown lineups {unknown_lineups}, expected any of {known_festivals}"
+            )
+        try:
+            mode = Mode(event.get("mode", Mode.FULL))
+        except ValueError:
+            raise InvalidRunRequestException(
+                f"Unknown mode {event['mode']}, expected any of {[m.value for m in Mode]}"
+            )
+        for flag in ["fan_out", "force", "profile"]:
+            if not isinstance(event.get(flag, False), bool):
+                raise InvalidRunRequestException(
+                    f"Invalid {flag} {event[flag]!r}, expected true or false"
+                )
+
+        return cls(
+            festivals=list(festivals),
+            artists=artists,
+            lineups=lineups,
+            mode=mode,
+            fan_out=event.get("fan_out", False),
+            force=event.get("force", False),
+            profile=event.get("profile", False),
+        )
+
+    def to_event(self) -> dict:
+        event = {"festivals": self.festivals, "mode": self.mode.value}
+        if self.artists is not None:
+            event["artists"] = self.artists
+        if len(self.lineups) > 0:
+            event["lineups"] = self.lineups
+        if self.force:
+            event["force"] = True
+        if self.profile:
+            event["profile"] = True
+        return event
+
+    def for_festival(self, festival: str) -> "RunRequest":
+        lineups = {}
+        if festival in self.lineups:
+            lineups[festival] = self.lineups[festival]
+        return RunRequest(
+            festivals=[festival],
+            artists=self.artists,
+            lineups=lineups,
+            mode=self.mode,
+            force=self.force,
+            profile=self.profile,
+        )
+
+    def covers_whole_lineup(self) -> bool:
+        return self.artists is None and self.mode != Mode.REFRESH_ONLY
+
+    def may_skip_unchanged(self) -> bool:
+        return self.covers_whole_lineup() and not self.force
+
+    def should_look_up(self, *, artist_name: str, checkpoint: Checkpoint) -> bool:
+        if self.artists is not None and artist_name.lower() not in {
+            a.lower() for a in self.artists
+        }:
+            return False
+        if self.mode == Mode.INCREMENTAL:
+            return checkpoint.is_new(artist_name)
+        if self.mode == Mode.REFRESH_ONLY:
+            return not checkpoint.is_new(artist_name)
+        return True
+
+
+def _is_names(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+class InvalidRunRequestException(Exception):
+    pass
@@ -0,0 +1,116 @@
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.festivals.parsers import (
+    parse_dong,
+    parse_dong_with_timetable,
+    parse_rude,
+    parse_wacken,
+)
+from src.festivals.timetable import Slot
+
+
+@dataclass(frozen=True)
+class FestivalSource:
+    name: str
+    url: str
+    parse: Callable[[str], list[str]]
+    excluded_artists: frozenset[str] = frozenset()
+    lineup: tuple[str, ...] | None = None
+    timeout: float = 5
+    max_at_once: int = 100
+    max_per_second: float = 5
+    parse_with_timetable: Callable[[str], tuple[list[str], list[Slot]]] | None = None
+
+    @property
+    def output_key(self) -> str:
+        return f"{self.name}.json"
+
+    @property
+    def fetch_url(self) -> str:
+        base_url = os.environ.get("FESTIVAL_BASE_URL")
+        if base_url is None:
+            return self.url
+        return f"{base_url.rstrip('/')}/{self.name}"
+
+    def is_excluded(self, artist_name: str) -> bool:
+        return artist_name in self.excluded_artists
+
+
+_sources: dict[str, FestivalSource] = {}
+
+
+def register_source(source: FestivalSource) -> FestivalSource:
+    if source.name in _sources:
+        raise SourceException(f"Festival source {source.name} is already registered")
+    _sources[source.name] = source
+    return source
+
+
+def get_source(name: str) -> FestivalSource:
+    if name not in _sources:
+        raise SourceException(f"Unknown festival source {name}")
+    return _sources[name]
+
+
+def source_names() -> list[str]:
+    return list(_sources)
+
+
+class SourceException(Exception):
+    pass
+
+
+WACKEN = register_source(
+    FestivalSource(
+        name="wacken",
+        url="https://www.wacken.com/fileadmin/Json/bandlist-concert.json",
+        parse=parse_wacken,
+        excluded_artists=frozenset(
+            [
+                "Metal Disco",
+                "Metal Yoga",
+                "Maschine's Late Night Show",
+                "Metal Karate",
+            ]
+        ),
+        timeout=20,
+    )
+)
+DONG = register_source(
+    FestivalSource(
+        name="dong",
+        url="https://www.dongopenair.de/bands/",
+        parse=parse_dong,
+        parse_with_timetable=parse_dong_with_timetable,
+    )
+)
+RUDE = register_source(
+    FestivalSource(
+        name="rude",
+        url="https://www.rockunterdeneichen.de/bands/",
+        parse=parse_rude,
+        excluded_artists=frozenset(["RUNNING ORDER 2024"]),
+        lineup=(
+            "Acranius",
+            "Fall of Serenity",
+            "Horn",
+            "Fleshworks",
+            "Jungle Rot",
+            "HatedotCom",
+            "Servant",
+            "Apep",
+            "Vomitory",
+            "Psycrotted",
+            "Dark Oath",
+            "Temple of Dread",
+            "Torture Killer",
+            "Confession by Silence",
+            "V8 Wankers",
+            "Chaos and Confusion",
+            "Iron Priest",
+            "Non Est Deus",
+        ),
+    )
+)
@@ -0,0 +1,163 @@
+import bisect
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+from src.adapter.s3 import S3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOT_MINUTES = 60
+MINUTES_PER_DAY = 24 * 60
+
+
+def timetables_enabled() -> bool:
+    return os.environ.get("TIMETABLES", "1") != "0"
+
+
+def timetable_key(festival: str) -> str:
+    return f"timetables/{festival}.json"
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@dataclass(frozen=True)
+class Slot:
+    artist: str
+    day: str
+    start: int
+    end: int
+    stage: str | None = None
+
+    def overlaps(self, other: "Slot") -> bool:
+        return (
+            self.day == other.day and self.start < other.end and other.start < self.end
+        )
+
+    def to_dict(self) -> dict:
+        slot = {
+            "artist": self.artist,
+            "day": self.day,
+            "start": format_minutes(self.start),
+            "end": format_minutes(self.end),
+        }
+        if self.stage is not None:
+            slot["stage"] = self.stage
+        return slot
+
+
+def build_slots(entries: list[tuple[str, str | None, int, str]]) -> list[Slot]:
+    # Entries are (day, stage, start, artist) in running order. Sets after
+    # midnight belong to the festival day they follow, so their start keeps
+    # counting past 24:00, and every set ends when the next one on its stage
+    # starts.
+    running_orders: dict[tuple[str, str | None], list[tuple[int, str]]] = {}
+    for day, stage, start, artist in entries:
+        running_order = running_orders.setdefault((day, stage), [])
+        while len(running_order) > 0 and start < running_order[-1][0]:
+            start += MINUTES_PER_DAY
+        running_order.append((start, artist))
+
+    slots = []
+    for (day, stage), running_order in running_orders.items():
+        for position, (start, artist) in enumerate(running_order):
+            if position + 1 < len(running_order):
+                end = running_order[position + 1][0]
+            else:
+                end = start + DEFAULT_SLOT_MINUTES
+            slots.append(
+                Slot(artist=artist, day=day, start=start, end=end, stage=stage)
+            )
+    return slots
+
+
+@dataclass
+class DayIndex:
+    bounds: list[int] = field(default_factory=list)
+    playing: list[list[int]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {"bounds": self.bounds, "playing": self.playing}
+
+
+@dataclass
+class Timetable:
+    festival: str
+    slots: list[Slot] = field(default_factory=list)
+    index: dict[str, DayIndex] = field(default_factory=dict)
+    clashes: list[list[int]] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, *, festival: str, slots: list[Slot]) -> "Timetable":
+        days = list(dict.fromkeys(slot.day for slot in slots))
+        slots = sorted(
+            slots,
+            key=lambda slot: (days.index(slot.day), slot.start, slot.stage or ""),
+        )
+        timetable = cls(festival=festival, slots=slots)
+        for day in days:
+            positions = [i for i, slot in enumerate(slots) if slot.day == day]
+            bounds = sorted(
+                {slots[i].start for i in positions} | {slots[i].end for i in positions}
+            )
+            timetable.index[day] = DayIndex(
+                bounds=bounds,
+                playing=[
+                    [i for i in positions if slots[i].start <= bound < slots[i].end]
+                    for bound in bounds[:-1]
+                ],
+            )
+        timetable.clashes = [
+            [j for j, other in enumerate(slots) if j != i and slot.overlaps(other)]
+            for i, slot in enumerate(slots)
+        ]
+        return timetable
+
+    def playing_at(self, *, day: str, minute: int) -> list[Slot]:
+        day_index = self.index.get(day)
+        if day_index is None:
+            return []
+        segment = bisect.bisect_right(day_index.bounds, minute) - 1
+        if segment < 0 or segment >= len(day_index.playing):
+            return []
+        return [self.slots[i] for i in day_index.playing[segment]]
+
+    def clashes_with(self, artist: str) -> list[Slot]:
+        return [
+            self.slots[j]
+            for i, slot in enumerate(self.slots)
+            if slot.artist == artist
+            for j in self.clashes[i]
+        ]
+
+    def to_dict(self) -> dict:
+        slots = []
+        for slot, clashes in zip(self.slots, self.clashes):
+            entry = slot.to_dict()
+            if len(clashes) > 0:
+                entry["clashes"] = clashes
+            slots.append(entry)
+        return {
+            "festival": self.festival,
+            "slots": slots,
+            "index": {day: index.to_dict() for day, index in self.index.items()},
+        }
+
+
+class TimetablePublisher:
+    def __init__(self, *, s3: S3, bucket_name: str):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    def publish(self, timetable: Timetable) -> None:
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=timetable_key(timetable.festival),
+            json=json.dumps(timetable.to_dict(), separators=(",", ":")),
+        )
+        logger.info(
+            f"Published timetable of {timetable.festival} with {len(timetable.slots)} slots"
+        )
@@ -0,0 +1,172 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import TextIO
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "FestivalScraper"
+RUN_DIMENSION = "all"
+MAX_EMF_VALUES = 100
+
+
+class SinkKind(StrEnum):
+    EMF = "emf"
+    JSON = "json"
+    NONE = "none"
+
+
+@dataclass
+class Timing:
+    values_ms: list[float] = field(default_factory=list)
+
+    def add(self, milliseconds: float) -> None:
+        self.values_ms.append(milliseconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": len(self.values_ms),
+            "total_ms": round(sum(self.values_ms), 3),
+            "max_ms": round(max(self.values_ms), 3),
+        }
+
+
+@dataclass
+class MetricSet:
+    festival: str
+    timings: dict[str, Timing] = field(default_factory=dict)
+    counters: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "timings": {name: t.to_dict() for name, t in self.timings.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class EmfSink:
+    def __init__(self, *, stream: TextIO | None = None, namespace: str = NAMESPACE):
+        self.stream = stream
+        self.namespace = namespace
+
+    def emit(self, metric_sets: list[MetricSet], *, timestamp: float) -> None:
+        stream = sys.stdout if self.stream is None else self.stream
+        for metric_set in metric_sets:
+            definitions = []
+            document = {"Festival": metric_set.festival}
+            for name, timing in metric_set.timings.items():
+                definitions.append({"Name": name, "Unit": "Milliseconds"})
+                document[name] = [round(v, 3) for v in timing.values_ms][
+                    :MAX_EMF_VALUES
+                ]
+            for name, value in metric_set.counters.items():
+                definitions.append({"Name": name, "Unit": "Count"})
+                document[name] = value
+            if len(definitions) == 0:
+                continue
+            document["_aws"] = {
+                "Timestamp": int(timestamp * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [["Festival"]],
+                        "Metrics": definitions,
+                    }
+                ],
+            }
+            stream.write(json.dumps(document) + "\n")
+        stream.flush()
+
+
+class JsonSink:
+    def __init__(self, *, stream: TextIO | None = None):
+        self.stream = stream
+
+    def emit(self, metric_sets: list[MetricSet], *, timestamp: float) -> None:
+        stream = sys.stderr if self.stream is None else self.stream
+        document = {
+            "timestamp": timestamp,
+            "metrics": {m.festival: m.to_dict() for m in metric_sets},
+        }
+        stream.write(json.dumps(document) + "\n")
+        stream.flush()
+
+
+class Metrics:
+    def __init__(
+        self,
+        *,
+        sink: EmfSink | JsonSink | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.sink = sink
+        self.clock = clock
+        self.metric_sets: dict[str, MetricSet] = {}
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        kind = SinkKind(os.environ.get("METRICS_SINK", SinkKind.JSON))
+        if kind == SinkKind.EMF:
+            return cls(sink=EmfSink())
+        if kind == SinkKind.JSON:
+            return cls(sink=JsonSink())
+        return cls()
+
+    def _metric_set(self, festival: str | None) -> MetricSet:
+        festival = RUN_DIMENSION if festival is None else festival
+        if festival not in self.metric_sets:
+            self.metric_sets[festival] = MetricSet(festival=festival)
+        return self.metric_sets[festival]
+
+    def record(
+        self, name: str, milliseconds: float, *, festival: str | None = None
+    ) -> None:
+        timings = self._metric_set(festival).timings
+        timings.setdefault(name, Timing()).add(milliseconds)
+
+    def increment(
+        self, name: str, value: float = 1, *, festival: str | None = None
+    ) -> None:
+        counters = self._metric_set(festival).counters
+        counters[name] = counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def timer(self, name: str, *, festival: str | None = None) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, (self.clock() - start) * 1000, festival=festival)
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["Metrics"]:
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def flush(self) -> None:
+        if self.sink is not None and len(self.metric_sets) > 0:
+            try:
+                self.sink.emit(list(self.metric_sets.values()), timestamp=time.time())
+            except Exception as e:
+                logger.error("Failed to emit metrics", exc_info=e)
+        self.metric_sets = {}
+
+
+_current: contextvars.ContextVar[Metrics] = contextvars.ContextVar("metrics")
+
+
+def current_metrics() -> Metrics:
+    # Outside of an active run measurements go to a throwaway instance instead
+    # of piling up in a shared default that is never flushed
+    metrics = _current.get(None)
+    return Metrics() if metrics is None else metrics
@@ -0,0 +1,175 @@
+import asyncio
+import cProfile
+import json
+import logging
+import marshal
+import os
+import time
+import tracemalloc
+from collections.abc import Coroutine
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from src.adapter.s3 import S3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAG_INTERVAL_SECONDS = 0.05
+TOP_FUNCTIONS = 25
+
+
+@dataclass
+class LoopLag:
+    samples_ms: list[float] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        if len(self.samples_ms) == 0:
+            return {"samples": 0, "mean_ms": 0, "max_ms": 0}
+        return {
+            "samples": len(self.samples_ms),
+            "mean_ms": round(sum(self.samples_ms) / len(self.samples_ms), 3),
+            "max_ms": round(max(self.samples_ms), 3),
+        }
+
+
+@dataclass
+class Profile:
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_memory_bytes: int
+    loop_lag: LoopLag
+    stats: dict
+
+    def top_functions(self) -> list[dict]:
+        functions = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in sorted(
+            self.stats.items(), key=lambda item: item[1][3], reverse=True
+        )[:TOP_FUNCTIONS]:
+            functions.append(
+                {
+                    "function": f"{filename}:{line}({function})",
+                    "calls": calls,
+                    "total_s": round(total, 6),
+                    "cumulative_s": round(cumulative, 6),
+                }
+            )
+        return functions
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "loop_lag": self.loop_lag.to_dict(),
+            "top_functions": self.top_functions(),
+        }
+
+    def pstats_bytes(self) -> bytes:
+        return marshal.dumps(self.stats)
+
+
+class DirectoryProfileWriter:
+    def __init__(self, *, directory: str):
+        self.directory = directory
+
+    def write(self, profile: Profile) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile.name)
+        with open(f"{path}.json", "w") as f:
+            json.dump(profile.to_dict(), f)
+        with open(f"{path}.prof", "wb") as f:
+            f.write(profile.pstats_bytes())
+        return path
+
+
+class S3ProfileWriter:
+    def __init__(self, *, s3: S3, bucket_name: str, prefix: str = "profiles/"):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    def write(self, profile: Profile) -> str:
+        key = f"{self.prefix}{profile.name}"
+        self.s3.upload(
+            bucket_name=self.bucket_name,
+            key=f"{key}.json",
+            json=json.dumps(profile.to_dict()),
+        )
+        self.s3.upload_bytes(
+            bucket_name=self.bucket_name,
+            key=f"{key}.prof",
+            body=profile.pstats_bytes(),
+        )
+        return f"s3://{self.bucket_name}/{key}"
+
+
+def profile_writer_from_env(*, s3: S3) -> DirectoryProfileWriter | S3ProfileWriter:
+    setting = os.environ.get("PROFILE_OUTPUT", "dir:/tmp/profiles")
+    if setting == "s3":
+        return S3ProfileWriter(s3=s3, bucket_name=os.environ["FESTIVAL_ARTISTS_BUCKET"])
+    if setting.startswith("dir:"):
+        return DirectoryProfileWriter(directory=setting.removeprefix("dir:"))
+    raise ValueError(f"Unknown PROFILE_OUTPUT {setting}, expected s3 or dir:<path>")
+
+
+class RunProfiler:
+    def __init__(
+        self, *, name: str, lag_interval: float = DEFAULT_LAG_INTERVAL_SECONDS
+    ):
+        self.name = name
+        self.lag_interval = lag_interval
+        self.profile: Profile | None = None
+
+    def run(self, coroutine: Coroutine[Any, Any, Any]) -> Any:
+        loop_lag = LoopLag()
+        profiler = cProfile.Profile()
+        tracing_memory = tracemalloc.is_tracing()
+        if not tracing_memory:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        profiler.enable()
+        try:
+            return asyncio.run(self._monitored(coroutine, loop_lag=loop_lag))
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing_memory:
+                tracemalloc.stop()
+            profiler.create_stats()
+            self.profile = Profile(
+                name=self.name,
+                wall_seconds=wall_seconds,
+                cpu_seconds=cpu_seconds,
+                peak_memory_bytes=peak,
+                loop_lag=loop_lag,
+                stats=profiler.stats,
+            )
+            logger.info(f"Profile {self.name}: {self.profile.to_dict()}")
+
+    async def _monitored(
+        self, coroutine: Coroutine[Any, Any, Any], *, loop_lag: LoopLag
+    ) -> Any:
+        monitor = asyncio.create_task(self._monitor_loop_lag(loop_lag))
+        try:
+            return await coroutine
+        finally:
+            monitor.cancel()
+
+    async def _monitor_loop_lag(self, loop_lag: LoopLag) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            lag = time.perf_counter() - start - self.lag_interval
+            loop_lag.samples_ms.append(max(lag, 0) * 1000)
+
+
+def profile_name(*, festivals: list[str]) -> str:
+    timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    return f"{timestamp}-{'-'.join(festivals)}"
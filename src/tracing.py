@@ -0,0 +1,227 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import secrets
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "festival-scraper"
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: int = STATUS_UNSET
+    status_message: str = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message != "":
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def to_otlp_document(spans: list[Span]) -> dict:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": SERVICE_NAME})
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": SERVICE_NAME},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    def __init__(self, *, path: str):
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(to_otlp_document(spans)) + "\n")
+
+
+class OtlpHttpExporter:
+    def __init__(self, *, endpoint: str, timeout: float = 5):
+        self.endpoint = endpoint.rstrip("/")
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]) -> None:
+        import httpx
+
+        response = httpx.post(
+            f"{self.endpoint}/v1/traces",
+            content=json.dumps(to_otlp_document(spans)),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        if response.status_code >= 300:
+            logger.error(
+                f"Trace collector returned status {response.status_code}, {response.text}"
+            )
+
+
+class Tracer:
+    def __init__(self, *, exporter: FileExporter | OtlpHttpExporter | None = None):
+        self.exporter = exporter
+        self.trace_id = secrets.token_hex(16)
+        self.finished: list[Span] = []
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        setting = os.environ.get("TRACE_EXPORTER", "")
+        if setting == "":
+            return cls()
+        if setting.startswith("file:"):
+            return cls(exporter=FileExporter(path=setting.removeprefix("file:")))
+        if setting.startswith("otlp:"):
+            return cls(
+                exporter=OtlpHttpExporter(endpoint=setting.removeprefix("otlp:"))
+            )
+        raise ValueError(
+            f"Unknown TRACE_EXPORTER {setting}, expected file:<path> or otlp:<url>"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, **attributes) -> Span | _NoopSpan:
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        return Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if isinstance(parent, Span) else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span | _NoopSpan, error: Exception | None = None) -> None:
+        if not isinstance(span, Span):
+            return
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = STATUS_ERROR
+            span.status_message = repr(error)
+        self.finished.append(span)
+
+    def use_span(self, span: Span | _NoopSpan) -> contextvars.Token:
+        return _current_span.set(span)
+
+    def release_span(self, token: contextvars.Token) -> None:
+        _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span | _NoopSpan]:
+        span = self.start_span(name, **attributes)
+        token = self.use_span(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        else:
+            self.end_span(span)
+        finally:
+            self.release_span(token)
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    def flush(self) -> None:
+        if self.exporter is not None and len(self.finished) > 0:
+            try:
+                self.exporter.export(self.finished)
+            except Exception as e:
+                logger.error("Failed to export trace", exc_info=e)
+        self.finished = []
+
+
+# Without an exporter a tracer only hands out the no-op span, so one disabled
+# instance can serve everything that runs outside of an active tracer
+_DISABLED_TRACER = Tracer()
+_current_tracer: contextvars.ContextVar[Tracer] = contextvars.ContextVar("tracer")
+_current_span: contextvars.ContextVar[Span | _NoopSpan] = contextvars.ContextVar(
+    "span", default=NOOP_SPAN
+)
+
+
+def current_tracer() -> Tracer:
+    return _current_tracer.get(_DISABLED_TRACER)
+
+
+def current_span() -> Span | _NoopSpan:
+    return _current_span.get()
+
+
+def span(name: str, **attributes) -> contextlib.AbstractContextManager:
+    return current_tracer().span(name, **attributes)
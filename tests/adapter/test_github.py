@@ -4,7 +4,10 @@ from unittest.mock import Mock, create_autospec
 import pytest
 
 from src.adapter.github import GitHubClient, GitHubException, GitHubIssue
+from src.adapter.http import HttpStack
+from src.adapter.http_cache import CachingMiddleware, MemoryCacheStore
 from src.adapter.ssm import Ssm
+from tests.helpers import Clock
 
 github_token_endpoint = "https://accounts.spotify.com/api/token"
 github_token_response = {
@@ -70,6 +73,51 @@ def test_github_client_initializes_with_created_prs(github_envs, ssm_mock, httpx
     }
 
 
+def test_github_client_revalidates_the_issue_list(github_envs, ssm_mock, httpx_mock):
+    issues_url = "https://api.github.com/repos/kruspe/festival-scraper/issues"
+    httpx_mock.add_response(
+        method="GET",
+        url=issues_url,
+        json=[{"number": "1", "title": "Search for ArtistInformation manually: Vader"}],
+        headers={"ETag": '"issues"', "Cache-Control": "private, max-age=60"},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=issues_url,
+        status_code=304,
+        match_headers={
+            "Authorization": "Bearer gh_pr_token",
+            "If-None-Match": '"issues"',
+        },
+    )
+    clock = Clock()
+    cache = CachingMiddleware(store=MemoryCacheStore(), clock=clock)
+
+    GitHubClient(ssm=ssm_mock, http=HttpStack(cache=cache))
+    clock.now += 61
+    client = GitHubClient(ssm=ssm_mock, http=HttpStack(cache=cache))
+
+    assert client.created_issues == {
+        "vader": GitHubIssue(issue_number="1", artist_name="vader")
+    }
+    assert cache.stats.revalidated == 1
+
+
+def test_github_client_uses_configured_base_url(
+    monkeypatch, github_envs, ssm_mock, httpx_mock
+):
+    monkeypatch.setenv("GITHUB_API_URL", "http://localhost:8080/github")
+    httpx_mock.add_response(
+        method="GET",
+        url="http://localhost:8080/github/repos/kruspe/festival-scraper/issues",
+        json=[],
+    )
+
+    github_client = GitHubClient(ssm=ssm_mock)
+
+    assert github_client.created_issues == {}
+
+
 def test_github_client_initializes_raises_and_logs_exception_during_initialization(
     caplog, github_envs, ssm_mock, httpx_mock
 ):
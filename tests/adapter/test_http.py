@@ -0,0 +1,76 @@
+import httpx
+import pytest
+
+from src.adapter.http import HttpStack, Middleware
+
+
+class RecordingMiddleware(Middleware):
+    def __init__(self, name: str, calls: list[str]):
+        self.name = name
+        self.calls = calls
+
+    def on_request(self, request):
+        self.calls.append(f"{self.name} request")
+
+    def on_response(self, request, response):
+        self.calls.append(f"{self.name} response {response.content.decode()}")
+        return response
+
+
+class ShortCircuitMiddleware(Middleware):
+    def on_request(self, request):
+        return httpx.Response(status_code=200, text="short", request=request)
+
+
+def test_client_runs_middlewares_in_order(httpx_mock):
+    httpx_mock.add_response(url="https://example.com", text="body")
+    calls = []
+    stack = HttpStack(
+        middlewares=[
+            RecordingMiddleware("outer", calls),
+            RecordingMiddleware("inner", calls),
+        ]
+    )
+
+    with stack.client() as client:
+        response = client.get("https://example.com")
+
+    assert response.text == "body"
+    assert calls == [
+        "outer request",
+        "inner request",
+        "inner response body",
+        "outer response body",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_client_runs_middlewares(httpx_mock):
+    httpx_mock.add_response(url="https://example.com", text="body")
+    calls = []
+    stack = HttpStack(middlewares=[RecordingMiddleware("outer", calls)])
+
+    async with stack.async_client() as client:
+        response = await client.get("https://example.com")
+
+    assert response.text == "body"
+    assert calls == ["outer request", "outer response body"]
+
+
+def test_middleware_can_answer_without_network(httpx_mock):
+    stack = HttpStack(middlewares=[ShortCircuitMiddleware()])
+
+    with stack.client() as client:
+        assert client.get("https://example.com").text == "short"
+
+    assert len(httpx_mock.get_requests()) == 0
+
+
+def test_cache_is_only_used_by_cached_clients(httpx_mock):
+    stack = HttpStack(cache=ShortCircuitMiddleware())
+    httpx_mock.add_response(url="https://example.com", text="network")
+
+    with stack.client(cached=True) as client:
+        assert client.get("https://example.com").text == "short"
+    with stack.client() as client:
+        assert client.get("https://example.com").text == "network"
@@ -0,0 +1,248 @@
+import gzip
+
+import boto3
+import httpx
+import pytest
+from moto import mock_aws
+
+from src.adapter.http import HttpStack
+from src.adapter.http_cache import (
+    CacheEntry,
+    CachingMiddleware,
+    DiskCacheStore,
+    MemoryCacheStore,
+    S3CacheStore,
+    cache_from_env,
+)
+from src.adapter.s3 import S3
+from tests.helpers import Clock
+
+url = "https://www.dongopenair.de/bands/"
+
+
+@pytest.fixture
+def clock():
+    yield Clock(1_000.0)
+
+
+@pytest.fixture
+def cache(clock):
+    yield CachingMiddleware(store=MemoryCacheStore(), clock=clock)
+
+
+def test_cache_revalidates_with_etag_and_serves_304_from_cache(cache, httpx_mock):
+    httpx_mock.add_response(url=url, text="lineup", headers={"ETag": '"v1"'})
+    httpx_mock.add_response(
+        url=url, status_code=304, match_headers={"If-None-Match": '"v1"'}
+    )
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        first = client.get(url)
+        second = client.get(url)
+
+    assert first.text == "lineup"
+    assert second.status_code == 200
+    assert second.text == "lineup"
+    assert cache.stats.to_dict() == {
+        "hits": 0,
+        "revalidated": 1,
+        "misses": 1,
+        "hit_ratio": 0.5,
+    }
+
+
+def test_cache_revalidates_with_last_modified(cache, httpx_mock):
+    last_modified = "Wed, 21 Oct 2026 07:28:00 GMT"
+    httpx_mock.add_response(
+        url=url, text="lineup", headers={"Last-Modified": last_modified}
+    )
+    httpx_mock.add_response(
+        url=url,
+        text="new lineup",
+        match_headers={"If-Modified-Since": last_modified},
+    )
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url)
+        assert client.get(url).text == "new lineup"
+
+    assert cache.stats.misses == 2
+
+
+def test_cache_serves_fresh_responses_without_request(cache, clock, httpx_mock):
+    httpx_mock.add_response(
+        url=url, text="lineup", headers={"Cache-Control": "max-age=60"}
+    )
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url)
+        clock.now += 30
+        assert client.get(url).text == "lineup"
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert cache.stats.hits == 1
+
+
+def test_cache_hits_do_not_extend_freshness(cache, clock, httpx_mock):
+    httpx_mock.add_response(
+        url=url,
+        text="lineup",
+        headers={"Cache-Control": "max-age=60"},
+        is_reusable=True,
+    )
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url)
+        clock.now += 40
+        client.get(url)
+        clock.now += 40
+        client.get(url)
+
+    assert len(httpx_mock.get_requests()) == 2
+    assert cache.stats.hits == 1
+
+
+def test_cache_revalidates_gzip_encoded_responses():
+    cache = CachingMiddleware(store=MemoryCacheStore())
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(
+            200,
+            content=gzip.compress(b"lineup"),
+            headers={"ETag": '"v1"', "Content-Encoding": "gzip"},
+        )
+
+    stack = HttpStack(cache=cache, transport=httpx.MockTransport(respond))
+    with stack.client(cached=True) as client:
+        first = client.get(url)
+        second = client.get(url)
+
+    assert first.text == "lineup"
+    assert second.text == "lineup"
+    assert cache.stats.revalidated == 1
+    assert "content-encoding" not in dict(cache.store.entries[f"GET {url}"].headers)
+
+
+def test_cache_does_not_store_uncacheable_responses(cache, httpx_mock):
+    httpx_mock.add_response(
+        url=url,
+        text="lineup",
+        headers={"ETag": '"v1"', "Cache-Control": "no-store"},
+    )
+    httpx_mock.add_response(url=url, text="lineup")
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url)
+        client.get(url)
+
+    assert len(cache.store.entries) == 0
+    assert "If-None-Match" not in httpx_mock.get_requests()[1].headers
+
+
+def test_cache_serves_private_responses_only_for_the_same_credentials(
+    cache, httpx_mock
+):
+    httpx_mock.add_response(
+        url=url,
+        text="issues",
+        headers={"ETag": '"v1"', "Cache-Control": "private"},
+        is_reusable=True,
+    )
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url, headers={"Authorization": "Bearer one"})
+        client.get(url, headers={"Authorization": "Bearer two"})
+        client.get(url, headers={"Authorization": "Bearer two"})
+
+    requests = httpx_mock.get_requests()
+    assert "If-None-Match" not in requests[1].headers
+    assert requests[2].headers["If-None-Match"] == '"v1"'
+    assert "Bearer" not in cache.store.entries[f"GET {url}"].to_json()
+
+
+@pytest.mark.parametrize("max_age", ["max-age", "max-age=soon"])
+def test_cache_treats_malformed_max_age_as_stale(cache, httpx_mock, max_age):
+    httpx_mock.add_response(
+        url=url,
+        text="lineup",
+        headers={"ETag": '"v1"', "Cache-Control": max_age},
+    )
+    httpx_mock.add_response(url=url, status_code=304)
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url)
+        assert client.get(url).text == "lineup"
+
+    assert cache.stats.revalidated == 1
+
+
+def test_cache_respects_vary_without_storing_header_values(cache, httpx_mock):
+    httpx_mock.add_response(
+        url=url,
+        text="issues",
+        headers={"ETag": '"v1"', "Vary": "Authorization"},
+        is_reusable=True,
+    )
+
+    with HttpStack(cache=cache).client(cached=True) as client:
+        client.get(url, headers={"Authorization": "Bearer one"})
+        client.get(url, headers={"Authorization": "Bearer two"})
+
+    assert "If-None-Match" not in httpx_mock.get_requests()[1].headers
+    assert "Bearer" not in cache.store.entries[f"GET {url}"].to_json()
+
+
+def test_disk_cache_store_persists_entries(tmp_path):
+    entry = CacheEntry(
+        url=url,
+        status_code=200,
+        headers=[("ETag", '"v1"')],
+        content=b"lineup",
+        stored_at=1.0,
+    )
+    DiskCacheStore(directory=str(tmp_path)).set(f"GET {url}", entry)
+
+    assert DiskCacheStore(directory=str(tmp_path)).get(f"GET {url}") == entry
+    assert DiskCacheStore(directory=str(tmp_path)).get("GET other") is None
+
+
+@mock_aws
+def test_s3_cache_store_persists_entries():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = S3CacheStore(s3=S3(s3_client), bucket_name="bucket-name")
+    entry = CacheEntry(
+        url=url,
+        status_code=200,
+        headers=[("ETag", '"v1"')],
+        content=b"lineup",
+        stored_at=1.0,
+    )
+
+    store.set(f"GET {url}", entry)
+
+    assert store.get(f"GET {url}") == entry
+    assert store.get("GET other") is None
+
+
+def test_cache_from_env(monkeypatch, tmp_path):
+    assert cache_from_env(s3=None) is None
+
+    monkeypatch.setenv("HTTP_CACHE", "memory")
+    assert isinstance(cache_from_env(s3=None).store, MemoryCacheStore)
+
+    monkeypatch.setenv("HTTP_CACHE", f"disk:{tmp_path}")
+    assert isinstance(cache_from_env(s3=None).store, DiskCacheStore)
+
+    monkeypatch.setenv("HTTP_CACHE", "s3")
+    monkeypatch.setenv("FESTIVAL_ARTISTS_BUCKET", "bucket-name")
+    assert isinstance(cache_from_env(s3=None).store, S3CacheStore)
+
+    monkeypatch.setenv("HTTP_CACHE", "redis")
+    with pytest.raises(ValueError):
+        cache_from_env(s3=None)
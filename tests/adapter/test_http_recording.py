@@ -0,0 +1,150 @@
+import gzip
+import json
+
+import httpx
+import pytest
+
+from src.adapter.http import HttpStack
+from src.adapter.http_recording import (
+    CassetteMissException,
+    FileCassetteWriter,
+    Interaction,
+    RecordingMiddleware,
+    ReplayTransport,
+    read_cassette,
+    recorder_from_env,
+    replay_from_env,
+    write_cassette,
+)
+from tests.helpers import Clock
+
+url = "https://www.dongopenair.de/bands/"
+token_url = "https://accounts.spotify.com/api/token"
+
+
+def _interaction(*, content: bytes = b"lineup", duration: float = 0.5, **kwargs):
+    return Interaction(
+        method=kwargs.get("method", "GET"),
+        url=kwargs.get("url", url),
+        body_hash=kwargs.get("body_hash"),
+        status_code=200,
+        headers=[("Content-Type", "text/html")],
+        content=content,
+        started=0,
+        duration=duration,
+    )
+
+
+def test_recording_captures_responses_without_credentials(httpx_mock):
+    clock = Clock(10.0)
+
+    def lineup_response(request):
+        clock.now += 0.25
+        return httpx.Response(200, text="lineup", headers={"ETag": '"v1"'})
+
+    httpx_mock.add_callback(lineup_response, url=url)
+    httpx_mock.add_response(method="POST", url=token_url, json={"token": "t"})
+    recorder = RecordingMiddleware(clock=clock)
+    clock.now += 0.25
+
+    with HttpStack(recorder=recorder).client() as client:
+        client.get(url)
+        client.post(token_url, data={"grant_type": "client_credentials"})
+
+    lineup, token = recorder.interactions
+    assert lineup.content == b"lineup"
+    assert ("etag", '"v1"') in lineup.headers
+    assert all(name.lower() != "content-length" for name, _ in lineup.headers)
+    assert lineup.started == 0.25
+    assert lineup.duration == 0.25
+    assert lineup.body_hash is None
+    assert token.body_hash is not None
+    assert "client_credentials" not in token.body_hash
+
+
+def test_recording_redacts_tokens_and_auth_headers(httpx_mock):
+    httpx_mock.add_response(
+        method="POST",
+        url=token_url,
+        json={"access_token": "secret-token", "token_type": "bearer"},
+        headers={"Set-Cookie": "session=secret-cookie"},
+    )
+    recorder = RecordingMiddleware()
+
+    with HttpStack(recorder=recorder).client() as client:
+        client.post(token_url, data={"grant_type": "client_credentials"})
+
+    cassette = gzip.decompress(write_cassette(recorder.interactions))
+    assert b"secret-token" not in cassette
+    assert b"secret-cookie" not in cassette
+    (token,) = recorder.interactions
+    assert json.loads(token.content) == {
+        "access_token": "REDACTED",
+        "token_type": "bearer",
+    }
+
+
+def test_cassette_round_trips_text_and_binary_content():
+    interactions = [_interaction(), _interaction(content=b"\xff\xd8 image")]
+
+    assert read_cassette(write_cassette(interactions)) == interactions
+
+
+def test_replay_serves_responses_in_recorded_order_and_repeats_the_last():
+    transport = ReplayTransport(
+        interactions=[_interaction(content=b"first"), _interaction(content=b"second")]
+    )
+
+    with httpx.Client(transport=transport) as client:
+        responses = [client.get(url).text for _ in range(3)]
+
+    assert responses == ["first", "second", "second"]
+
+
+def test_replay_matches_request_bodies(httpx_mock):
+    httpx_mock.add_response(method="POST", url=token_url, text="a")
+    httpx_mock.add_response(method="POST", url=token_url, text="b")
+    recorder = RecordingMiddleware()
+    with HttpStack(recorder=recorder).client() as client:
+        client.post(token_url, content=b"a")
+        client.post(token_url, content=b"b")
+
+    transport = ReplayTransport(interactions=recorder.interactions)
+    with httpx.Client(transport=transport) as client:
+        assert client.post(token_url, content=b"b").text == "b"
+        assert client.post(token_url, content=b"a").text == "a"
+        with pytest.raises(CassetteMissException):
+            client.post(token_url, content=b"c")
+
+
+@pytest.mark.asyncio
+async def test_replay_waits_for_the_recorded_duration_scaled_by_speed():
+    transport = ReplayTransport(interactions=[_interaction(duration=0.2)], speed=10)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get(url)
+
+    assert response.text == "lineup"
+    assert transport._delay(_interaction(duration=0.2)) == pytest.approx(0.02)
+    assert ReplayTransport(interactions=[])._delay(_interaction()) == 0
+
+
+def test_cassette_settings_from_env(monkeypatch, tmp_path):
+    cassette = tmp_path / "run.jsonl.gz"
+    assert recorder_from_env(s3=None) is None
+    assert replay_from_env() is None
+
+    monkeypatch.setenv("HTTP_CASSETTE", f"record:{cassette}")
+    recorder = recorder_from_env(s3=None)
+    assert isinstance(recorder.writer, FileCassetteWriter)
+    assert replay_from_env() is None
+    recorder.save()
+
+    monkeypatch.setenv("HTTP_CASSETTE", f"replay:{cassette}")
+    monkeypatch.setenv("HTTP_REPLAY_SPEED", "2")
+    assert replay_from_env().speed == 2
+    assert recorder_from_env(s3=None) is None
+
+    monkeypatch.setenv("HTTP_CASSETTE", "rewind:somewhere")
+    with pytest.raises(ValueError):
+        replay_from_env()
@@ -0,0 +1,106 @@
+import httpx
+import pytest
+
+from src.adapter.http import HttpStack
+from src.adapter.http_stats import HttpStatsMiddleware, endpoint, percentile
+from tests.adapter.test_http import ShortCircuitMiddleware
+from tests.helpers import Clock
+
+
+def _respond_after(clock: Clock, seconds: float, **kwargs):
+    def respond(request):
+        clock.now += seconds
+        return httpx.Response(**kwargs)
+
+    return respond
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0
+
+
+def test_endpoint_replaces_ids_in_path():
+    assert (
+        endpoint(
+            httpx.Request(
+                "PATCH",
+                "https://api.github.com/repos/kruspe/festival-scraper/issues/12",
+            )
+        )
+        == "PATCH /repos/kruspe/festival-scraper/issues/{id}"
+    )
+    assert (
+        endpoint(httpx.Request("GET", "https://api.spotify.com/v1/search?q=Vader"))
+        == "GET /v1/search"
+    )
+
+
+def test_stats_record_requests_per_host_and_endpoint(httpx_mock):
+    clock = Clock()
+    httpx_mock.add_callback(
+        _respond_after(clock, 0.005, status_code=200, text="abc"),
+        url="https://api.spotify.com/v1/search?q=a",
+    )
+    httpx_mock.add_callback(
+        _respond_after(clock, 0.3, status_code=429),
+        url="https://api.spotify.com/v1/search?q=b",
+    )
+    httpx_mock.add_callback(
+        _respond_after(clock, 0.02, status_code=200, text="lineup"),
+        url="https://www.wacken.com/",
+    )
+    stats = HttpStatsMiddleware(clock=clock)
+
+    with HttpStack(stats=stats).client() as client:
+        client.get("https://api.spotify.com/v1/search?q=a")
+        client.get("https://api.spotify.com/v1/search?q=b")
+        client.post("https://www.wacken.com/", content=b"body")
+
+    report = stats.to_dict()
+    spotify = report["api.spotify.com"]
+    assert spotify["requests"] == 2
+    assert spotify["status_codes"] == {"200": 1, "429": 1}
+    assert spotify["bytes_received"] == 3
+    assert spotify["latency_ms"]["p50"] == 5
+    assert spotify["latency_ms"]["p99"] == 300
+    assert spotify["latency_ms"]["histogram"]["le_10"] == 1
+    assert spotify["latency_ms"]["histogram"]["le_500"] == 1
+    assert spotify["endpoints"]["GET /v1/search"]["requests"] == 2
+    assert report["www.wacken.com"]["bytes_sent"] == 4
+
+
+@pytest.mark.asyncio
+async def test_stats_count_failed_requests(httpx_mock):
+    clock = Clock()
+
+    def time_out(request):
+        clock.now += 6.0
+        raise httpx.ReadTimeout("timed out")
+
+    httpx_mock.add_callback(time_out)
+    stats = HttpStatsMiddleware(clock=clock)
+
+    async with HttpStack(stats=stats).async_client() as client:
+        with pytest.raises(httpx.ReadTimeout):
+            await client.get("https://api.github.com/repos/kruspe/festival-scraper")
+
+    github = stats.to_dict()["api.github.com"]
+    assert github["errors"] == 1
+    assert github["status_codes"] == {}
+    assert github["latency_ms"]["histogram"]["le_inf"] == 1
+
+
+def test_stats_only_see_requests_that_reach_the_network(httpx_mock):
+    stats = HttpStatsMiddleware()
+
+    with HttpStack(cache=ShortCircuitMiddleware(), stats=stats).client(
+        cached=True
+    ) as client:
+        client.get("https://example.com")
+
+    assert stats.to_dict() == {}
@@ -0,0 +1,52 @@
+import httpx
+import pytest
+
+from src.adapter.http import HttpStack
+from src.adapter.http_cache import CachingMiddleware, MemoryCacheStore
+from src.adapter.http_tracing import TracingMiddleware
+from src.tracing import STATUS_ERROR, Tracer
+
+
+class NullExporter:
+    def export(self, spans):
+        pass
+
+
+def test_tracing_middleware_records_request_spans_with_cache_decision(httpx_mock):
+    httpx_mock.add_response(
+        url="https://www.wacken.com/", text="lineup", headers={"ETag": '"v1"'}
+    )
+    httpx_mock.add_response(url="https://www.wacken.com/", status_code=304)
+    tracer = Tracer(exporter=NullExporter())
+    stack = HttpStack(
+        middlewares=[TracingMiddleware()],
+        cache=CachingMiddleware(store=MemoryCacheStore()),
+    )
+
+    with (
+        tracer.activate(),
+        tracer.span("festival") as festival,
+        stack.client(cached=True) as client,
+    ):
+        client.get("https://www.wacken.com/")
+        client.get("https://www.wacken.com/")
+
+    first, second, _ = tracer.finished
+    assert first.name == "GET www.wacken.com"
+    assert first.parent_span_id == festival.span_id
+    assert first.attributes["http.status_code"] == 200
+    assert first.attributes["http.cache"] == "miss"
+    assert second.attributes["http.cache"] == "revalidated"
+
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_marks_failed_requests(httpx_mock):
+    httpx_mock.add_exception(httpx.ConnectError("refused"))
+    tracer = Tracer(exporter=NullExporter())
+
+    with tracer.activate():
+        async with HttpStack(middlewares=[TracingMiddleware()]).async_client() as c:
+            with pytest.raises(httpx.ConnectError):
+                await c.get("https://api.spotify.com/v1/search")
+
+    assert tracer.finished[0].status == STATUS_ERROR
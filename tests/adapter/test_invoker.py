@@ -0,0 +1,42 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from src.adapter.invoker import InvokerException, LambdaInvoker, LocalInvoker
+
+
+def test_lambda_invoker_invokes_function_asynchronously():
+    lambda_client = Mock()
+    lambda_client.invoke.return_value = {"StatusCode": 202}
+    invoker = LambdaInvoker(lambda_client=lambda_client, function_name="scraper")
+
+    invoker.invoke(payload={"festivals": ["wacken"]})
+
+    lambda_client.invoke.assert_called_once_with(
+        FunctionName="scraper",
+        InvocationType="Event",
+        Payload=json.dumps({"festivals": ["wacken"]}).encode("utf-8"),
+    )
+
+
+def test_lambda_invoker_raises_and_logs_when_invocation_fails(caplog):
+    lambda_client = Mock()
+    lambda_client.invoke.return_value = {"StatusCode": 500}
+    invoker = LambdaInvoker(lambda_client=lambda_client, function_name="scraper")
+
+    with pytest.raises(InvokerException):
+        invoker.invoke(payload={})
+
+    assert caplog.records[0].levelname == "ERROR"
+
+
+def test_local_invoker_calls_handler_in_process():
+    handler = Mock(return_value={"wacken": {"artists": 1}})
+    invoker = LocalInvoker(handler=handler)
+
+    result = invoker.invoke(payload={"festivals": ["wacken"]})
+
+    assert result == {"wacken": {"artists": 1}}
+    assert invoker.payloads == [{"festivals": ["wacken"]}]
+    handler.assert_called_once_with({"festivals": ["wacken"]}, None)
@@ -3,7 +3,7 @@ import pytest
 from botocore.exceptions import ClientError
 from moto import mock_aws
 
-from src.adapter.s3 import S3
+from src.adapter.s3 import S3, S3ConflictException
 
 
 @mock_aws
@@ -35,3 +35,84 @@ def test_upload_logs_exception(caplog):
             record.getMessage()
             == "An error occurred (NoSuchBucket) when calling the PutObject operation: The specified bucket does not exist"
         )
+
+
+@mock_aws
+def test_download_returns_object_content():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    s3_client.put_object(Bucket="bucket-name", Key="key", Body="json")
+    s3 = S3(s3_client=s3_client)
+
+    assert s3.download(bucket_name="bucket-name", key="key") == "json"
+
+
+@mock_aws
+def test_download_returns_none_when_key_does_not_exist():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    s3 = S3(s3_client=s3_client)
+
+    assert s3.download(bucket_name="bucket-name", key="key") is None
+
+
+@mock_aws
+def test_download_logs_exception(caplog):
+    s3 = S3(boto3.client("s3"))
+
+    with pytest.raises(ClientError):
+        s3.download(bucket_name="bucket-name", key="key")
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelname == "ERROR"
+
+
+@mock_aws
+def test_download_bytes_and_list_keys():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    s3 = S3(s3_client=s3_client)
+    s3.upload_bytes(bucket_name="bucket-name", key="archive/a", body=b"\xff")
+    s3.upload_bytes(bucket_name="bucket-name", key="archive/b", body=b"b")
+    s3.upload(bucket_name="bucket-name", key="other", json="json")
+
+    assert s3.download_bytes(bucket_name="bucket-name", key="archive/a") == b"\xff"
+    assert s3.download_bytes(bucket_name="bucket-name", key="missing") is None
+    assert s3.list_keys(bucket_name="bucket-name", prefix="archive/") == [
+        "archive/a",
+        "archive/b",
+    ]
+
+
+@mock_aws
+def test_upload_with_conditions_raises_conflict_when_object_changed():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    s3 = S3(s3_client=s3_client)
+    s3.upload(bucket_name="bucket-name", key="key", json="1", if_none_match="*")
+    body, etag = s3.download_with_etag(bucket_name="bucket-name", key="key")
+    assert body == "1"
+
+    with pytest.raises(S3ConflictException):
+        s3.upload(bucket_name="bucket-name", key="key", json="2", if_none_match="*")
+    s3.upload(bucket_name="bucket-name", key="key", json="2", if_match=etag)
+    with pytest.raises(S3ConflictException):
+        s3.upload(bucket_name="bucket-name", key="key", json="3", if_match=etag)
+
+    assert s3.download(bucket_name="bucket-name", key="key") == "2"
+    assert s3.download_with_etag(bucket_name="bucket-name", key="missing") == (
+        None,
+        None,
+    )
@@ -0,0 +1,175 @@
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.adapter.search_archive import (
+    ArchivedSearch,
+    DirectoryArchiveStore,
+    S3ArchiveStore,
+    SearchArchive,
+    archive_key,
+    decode_searches,
+    encode_searches,
+    search_archive_from_env,
+)
+
+response = {"artists": {"items": []}}
+selected = {"id": None, "name": "Bloodbath", "image_url": None}
+
+
+def test_archived_searches_round_trip_compressed():
+    searches = [
+        ArchivedSearch(
+            query=query,
+            market="DE",
+            searched_at=1.5,
+            response=response,
+            selected=selected,
+        )
+        for query in ["Bloodbath", "Horn"]
+    ]
+
+    assert decode_searches(encode_searches(searches)) == searches
+    assert searches[0].key.startswith("DE/")
+
+
+def test_archive_keeps_searches_until_flushed(tmp_path):
+    archive = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    archive.add(query="Bloodbath", market="DE", response=response, selected=selected)
+
+    assert archive.get(query="Bloodbath", market="DE").selected == selected
+    assert list(archive.searches()) == []
+
+    archive.flush()
+
+    assert archive.pending == {}
+    assert [s.query for s in archive.searches()] == ["Bloodbath"]
+    assert archive.get(query="Bloodbath", market="US") is None
+
+
+def test_archive_replaces_earlier_search_of_same_query(tmp_path):
+    archive = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    archive.add(query="Horn", market="DE", response=response, selected=selected)
+    archive.flush()
+    archive.add(query="Horn", market="DE", response={"new": True}, selected={})
+    archive.flush()
+
+    assert [s.response for s in archive.searches()] == [{"new": True}]
+
+
+@mock_aws
+def test_s3_archive_store():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    archive = SearchArchive(
+        store=S3ArchiveStore(s3=S3(s3_client), bucket_name="bucket-name")
+    )
+    archive.add(query="Horn", market="DE", response=response, selected=selected)
+    archive.add(query="Gaerea", market="DE", response=response, selected=selected)
+    archive.flush()
+    archive.flush()
+
+    keys = [
+        o["Key"] for o in s3_client.list_objects_v2(Bucket="bucket-name")["Contents"]
+    ]
+    index, run = sorted(keys)
+    assert index == "search-archive/index.json"
+    assert run.startswith("search-archive/runs/")
+    assert run.endswith(".jsonl.gz")
+    assert sorted(s.query for s in archive.searches()) == ["Gaerea", "Horn"]
+
+
+@mock_aws
+def test_s3_archive_store_merges_concurrently_flushed_indexes():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = S3ArchiveStore(s3=S3(s3_client), bucket_name="bucket-name")
+    other = SearchArchive(store=store)
+    other.add(query="Horn", market="DE", response=response, selected=selected)
+    load_index = store.load_index
+
+    def load_index_then_flush_other():
+        index = load_index()
+        store.load_index = load_index
+        other.flush()
+        return index
+
+    store.load_index = load_index_then_flush_other
+    archive = SearchArchive(store=store)
+    archive.add(query="Gaerea", market="DE", response=response, selected=selected)
+    archive.flush()
+
+    fresh = SearchArchive(store=store)
+    assert sorted(s.query for s in fresh.searches()) == ["Gaerea", "Horn"]
+
+
+class CountingStore(DirectoryArchiveStore):
+    def __init__(self, *, directory: str):
+        super().__init__(directory=directory)
+        self.downloads = []
+
+    def get(self, key: str) -> bytes | None:
+        self.downloads.append(key)
+        return super().get(key)
+
+
+def test_archive_get_only_downloads_the_run_of_the_query(tmp_path):
+    archive = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    for query in ["Horn", "Gaerea", "Bloodbath"]:
+        archive.add(query=query, market="DE", response=response, selected=selected)
+        archive.flush()
+    runs = archive.store.list_keys()
+
+    store = CountingStore(directory=str(tmp_path))
+    search = SearchArchive(store=store).get(query=" gaerea ", market="DE")
+
+    assert search.query == "Gaerea"
+    assert store.downloads == ["index.json", runs[1]]
+
+
+def test_archive_reads_only_runs_since_a_time(tmp_path):
+    archive = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    archive.add(query="Horn", market="DE", response=response, selected=selected)
+    archive.pending[archive_key(query="Horn", market="DE")].searched_at = 100
+    archive.flush()
+    archive.add(query="Gaerea", market="DE", response=response, selected=selected)
+    archive.pending[archive_key(query="Gaerea", market="DE")].searched_at = 200
+    archive.flush()
+
+    store = CountingStore(directory=str(tmp_path))
+    searches = list(SearchArchive(store=store).searches(since=150))
+
+    assert [s.query for s in searches] == ["Gaerea"]
+    assert len(store.downloads) == 2
+
+
+def test_archive_rebuilds_the_index_from_runs(tmp_path):
+    archive = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    archive.add(query="Horn", market="DE", response=response, selected=selected)
+    archive.flush()
+    os.remove(tmp_path / "index.json")
+
+    rebuilt = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    assert list(rebuilt.searches()) == []
+    assert rebuilt.rebuild_index() == 1
+    assert [s.query for s in rebuilt.searches()] == ["Horn"]
+
+
+def test_search_archive_from_env(monkeypatch, tmp_path):
+    assert search_archive_from_env(s3=None) is None
+
+    monkeypatch.setenv("SEARCH_ARCHIVE", f"dir:{tmp_path}")
+    assert isinstance(search_archive_from_env(s3=None).store, DirectoryArchiveStore)
+
+    monkeypatch.setenv("SEARCH_ARCHIVE", "elsewhere")
+    with pytest.raises(ValueError):
+        search_archive_from_env(s3=None)
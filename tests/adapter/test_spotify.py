@@ -4,7 +4,8 @@ from unittest.mock import Mock, create_autospec
 
 import pytest
 
-from src.adapter.spotify import SpotifyClient, SpotifyException, ArtistInformation
+from src.adapter.search_archive import DirectoryArchiveStore, SearchArchive
+from src.adapter.spotify import ArtistInformation, SpotifyClient, SpotifyException
 from src.adapter.ssm import Ssm
 
 spotify_token_endpoint = "https://accounts.spotify.com/api/token"
@@ -72,6 +73,29 @@ async def test_spotify_client_retrieves_token(spotify_envs, ssm_mock, httpx_mock
     )
 
 
+@pytest.mark.asyncio
+async def test_spotify_client_uses_configured_base_urls(
+    monkeypatch, spotify_envs, ssm_mock, httpx_mock
+):
+    monkeypatch.setenv("SPOTIFY_ACCOUNTS_URL", "http://localhost:8080/accounts")
+    monkeypatch.setenv("SPOTIFY_API_URL", "http://localhost:8080/spotify")
+    httpx_mock.add_response(
+        method="POST",
+        url="http://localhost:8080/accounts/api/token",
+        json=spotify_token_response,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="http://localhost:8080/spotify/v1/search?type=artist&q=Bloodbath&market=DE",
+        json={"artists": {"items": []}},
+    )
+
+    spotify_client = SpotifyClient(ssm=ssm_mock)
+    artist = await spotify_client.search_artist(name="Bloodbath", genres=[])
+
+    assert artist.id is None
+
+
 @pytest.mark.asyncio
 async def test_spotify_client_raises_and_logs_exception_when_getting_token_fails(
     caplog, spotify_envs, ssm_mock, httpx_mock
@@ -130,6 +154,51 @@ async def test_search_artist_calls_correct_endpoint(spotify_client, httpx_mock):
     )
 
 
+@pytest.mark.asyncio
+async def test_search_artist_archives_response_and_selection(
+    spotify_envs, ssm_mock, httpx_mock, tmp_path
+):
+    search_response = {
+        "artists": {
+            "items": [
+                {
+                    "id": "RandomSpotifyId",
+                    "genres": ["Swedish Death Metal"],
+                    "images": [
+                        {
+                            "height": 640,
+                            "url": expected_bloodbath_image_url,
+                            "width": 640,
+                        }
+                    ],
+                    "name": "Bloodbath",
+                },
+            ],
+        }
+    }
+    httpx_mock.add_response(
+        method="POST", url=spotify_token_endpoint, json=spotify_token_response
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Bloodbath&market=DE",
+        json=search_response,
+    )
+    archive = SearchArchive(store=DirectoryArchiveStore(directory=str(tmp_path)))
+    spotify_client = SpotifyClient(ssm=ssm_mock, archive=archive)
+
+    await spotify_client.search_artist(name="Bloodbath", genres=["Metal"])
+    archive.flush()
+
+    archived = archive.get(query="Bloodbath", market="DE")
+    assert archived.response == search_response
+    assert archived.selected == {
+        "id": "RandomSpotifyId",
+        "name": "Bloodbath",
+        "image_url": expected_bloodbath_image_url,
+    }
+
+
 @pytest.mark.asyncio
 async def test_search_artist_raises_and_logs_exception_when_search_fails(
     caplog, spotify_client, httpx_mock
@@ -155,6 +224,24 @@ async def test_search_artist_raises_and_logs_exception_when_search_fails(
         )
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status_code,body", [(429, "<html>Too Many Requests</html>"), (502, ""), (200, "")]
+)
+async def test_search_artist_raises_spotify_exception_for_non_json_bodies(
+    spotify_client, httpx_mock, status_code, body
+):
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Bloodbath&market=DE",
+        text=body,
+        status_code=status_code,
+    )
+
+    with pytest.raises(SpotifyException):
+        await spotify_client.search_artist(name="Bloodbath", genres=["Metal"])
+
+
 @pytest.mark.asyncio
 async def test_search_artist_returns_artist_information(spotify_client, httpx_mock):
     artist_name = "Bloodbath"
@@ -1,12 +1,31 @@
+import asyncio
+import dataclasses
+import re
+import time
 from typing import Union
 from unittest.mock import Mock, create_autospec
 
+import httpx
 import pytest
 
 from src.adapter.github import GitHubClient
-from src.adapter.spotify import SpotifyClient, ArtistInformation
+from src.adapter.spotify import ArtistInformation, SpotifyClient
 from src.adapter.ssm import Ssm
-from src.festivals.bands import get_wacken_artists, get_dong_artists, get_rude_artists
+from src.festivals.bands import (
+    MAX_CONSECUTIVE_FAILURES,
+    LineupFetchException,
+    SharedSearches,
+    get_dong_artists,
+    get_festival_artists,
+    get_lineup,
+    get_rude_artists,
+    get_wacken_artists,
+)
+from src.festivals.checkpoint import Checkpoint
+from src.festivals.deadline import Deadline
+from src.festivals.retry_queue import RetryQueue
+from src.festivals.sources import DONG, FestivalSource
+from src.festivals.timetable import Slot
 
 wacken_url = "https://www.wacken.com/fileadmin/Json/bandlist-concert.json"
 dong_url = "https://www.dongopenair.de/bands/"
@@ -149,11 +168,10 @@ async def test_get_wacken_artists_when_call_fails(
 ):
     httpx_mock.add_response(method="GET", url=wacken_url, status_code=500)
 
-    artists = await get_wacken_artists(
-        spotify_client=spotify_client, github_client=github_client
-    )
-
-    assert artists == []
+    with pytest.raises(LineupFetchException):
+        await get_wacken_artists(
+            spotify_client=spotify_client, github_client=github_client
+        )
     assert len(httpx_mock.get_requests()) == 3
     assert httpx_mock.get_requests()[2].url == wacken_url
 
@@ -478,17 +496,79 @@ async def test_get_dong_artists_does_not_return_when_no_a_element_appears(
     ]
 
 
+@pytest.mark.asyncio
+async def test_get_lineup_collects_the_timetable_of_the_same_page(httpx_mock):
+    httpx_mock.add_response(
+        method="GET",
+        url=dong_url,
+        text="""
+            <p>Freitag</p>
+            <ul>
+                <li><a href="https://www.dongopenair.de/band-details/?band=Bloodbath"><div>20:00</div> Bloodbath</a></li>
+                <li><a href="https://www.dongopenair.de/band-details/?band=Vader"><div>21:10</div> Vader</a></li>
+            </ul>
+            <a href="https://www.dongopenair.de/band-details/?band=Bloodbath">Bloodbath</a>
+            <a href="https://www.dongopenair.de/band-details/?band=Vader">Vader</a>
+        """,
+    )
+    timetables = {}
+
+    artist_names = await get_lineup(source=DONG, timetables=timetables)
+
+    assert artist_names == ["Bloodbath", "Vader"]
+    assert timetables == {
+        "dong": [
+            Slot(artist="Bloodbath", day="Freitag", start=1200, end=1270),
+            Slot(artist="Vader", day="Freitag", start=1270, end=1330),
+        ]
+    }
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_lineup_parses_once_when_the_source_has_a_timetable(httpx_mock):
+    httpx_mock.add_response(
+        method="GET",
+        url=dong_url,
+        text="""
+            <p>Freitag</p>
+            <a href="https://www.dongopenair.de/band-details/?band=Vader"><div>21:10</div> Vader</a>
+            <a href="https://www.dongopenair.de/band-details/?band=Vader">Vader</a>
+        """,
+    )
+    source = dataclasses.replace(DONG, parse=Mock(side_effect=AssertionError))
+
+    artist_names = await get_lineup(source=source, timetables={})
+
+    assert artist_names == ["Vader"]
+
+
+@pytest.mark.asyncio
+async def test_get_lineup_skips_the_timetable_without_a_collector(httpx_mock):
+    httpx_mock.add_response(
+        method="GET",
+        url=dong_url,
+        text="""<a href="https://www.dongopenair.de/band-details/?band=Vader">Vader</a>""",
+    )
+    source = dataclasses.replace(
+        DONG, parse_with_timetable=Mock(side_effect=AssertionError)
+    )
+
+    artist_names = await get_lineup(source=source)
+
+    assert artist_names == ["Vader"]
+
+
 @pytest.mark.asyncio
 async def test_get_dong_artists_when_call_fails(
     spotify_client, github_client, httpx_mock
 ):
     httpx_mock.add_response(method="GET", url=dong_url, status_code=500)
 
-    artists = await get_dong_artists(
-        spotify_client=spotify_client, github_client=github_client
-    )
-
-    assert artists == []
+    with pytest.raises(LineupFetchException):
+        await get_dong_artists(
+            spotify_client=spotify_client, github_client=github_client
+        )
 
 
 @pytest.mark.asyncio
@@ -659,11 +739,10 @@ async def test_get_rude_artists_when_call_fails(
 ):
     httpx_mock.add_response(method="GET", url=rude_url, status_code=500)
 
-    artists = await get_rude_artists(
-        spotify_client=spotify_client, github_client=github_client
-    )
-
-    assert artists == []
+    with pytest.raises(LineupFetchException):
+        await get_rude_artists(
+            spotify_client=spotify_client, github_client=github_client
+        )
 
 
 @pytest.mark.asyncio
@@ -713,3 +792,297 @@ async def test_get_rude_artists_closes_opened_issues(
     ]
     assert len(httpx_mock.get_requests()) == 5
     assert httpx_mock.get_requests()[4].method == "PATCH"
+
+
+@pytest.mark.asyncio
+async def test_get_wacken_artists_looks_up_new_artists_first_and_stops_at_deadline(
+    spotify_client, github_client, httpx_mock
+):
+    image_url = "https://some-image-url.com"
+    known_vader = ArtistInformation(
+        id="VaderId", name="Vader", search_name="Vader", image_url=image_url
+    )
+    artist_response = [
+        {"artist": {"title": "Vader"}},
+        {"artist": {"title": "Bloodbath"}},
+    ]
+    httpx_mock.add_response(
+        method="GET", url=wacken_url, json=artist_response, status_code=200
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Bloodbath&market=DE",
+        json=create_spotify_response(
+            artist_id="RandomSpotifyId", artist_name="Bloodbath", image_url=image_url
+        ),
+    )
+
+    def remaining_millis():
+        searched = any(
+            request.url.path == "/v1/search" for request in httpx_mock.get_requests()
+        )
+        return 0 if searched else 60_000
+
+    artists = await get_wacken_artists(
+        spotify_client=spotify_client,
+        github_client=github_client,
+        checkpoint=Checkpoint(festival="wacken", artists={"Vader": known_vader}),
+        deadline=Deadline(remaining_millis=remaining_millis, reserve_seconds=10),
+    )
+
+    assert artists == [
+        known_vader,
+        ArtistInformation(
+            id="RandomSpotifyId",
+            name="Bloodbath",
+            search_name="Bloodbath",
+            image_url=image_url,
+        ),
+    ]
+    assert len(httpx_mock.get_requests()) == 4
+
+
+@pytest.mark.asyncio
+async def test_get_wacken_artists_does_not_schedule_lookups_after_deadline(
+    spotify_client, github_client, httpx_mock
+):
+    httpx_mock.add_response(
+        method="GET",
+        url=wacken_url,
+        json=[{"artist": {"title": f"Band {i}"}} for i in range(30)],
+        status_code=200,
+    )
+
+    started = time.monotonic()
+    artists = await get_wacken_artists(
+        spotify_client=spotify_client,
+        github_client=github_client,
+        deadline=Deadline(remaining_millis=lambda: 0, reserve_seconds=10),
+    )
+
+    assert artists == []
+    assert time.monotonic() - started < 1
+    assert not any(
+        request.url.path == "/v1/search" for request in httpx_mock.get_requests()
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_festival_artists_uses_source_policies(
+    spotify_client, github_client, httpx_mock
+):
+    image_url = "https://some-image-url.com"
+    source = FestivalSource(
+        name="custom",
+        url="https://custom.example/lineup.txt",
+        parse=lambda body: body.splitlines(),
+        excluded_artists=frozenset(["Afterparty"]),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://custom.example/lineup.txt",
+        text="Bloodbath\nAfterparty",
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Bloodbath&market=DE",
+        json=create_spotify_response(
+            artist_id="RandomSpotifyId", artist_name="Bloodbath", image_url=image_url
+        ),
+    )
+
+    artists = await get_festival_artists(
+        source=source, spotify_client=spotify_client, github_client=github_client
+    )
+
+    assert artists == [
+        ArtistInformation(
+            id="RandomSpotifyId",
+            name="Bloodbath",
+            search_name="Bloodbath",
+            image_url=image_url,
+        )
+    ]
+    assert len(httpx_mock.get_requests()) == 4
+
+
+@pytest.mark.asyncio
+async def test_get_festival_artists_queues_failed_lookups_for_retry(
+    spotify_client, github_client, httpx_mock
+):
+    image_url = "https://some-image-url.com"
+    known_vader = ArtistInformation(
+        id="VaderId", name="Vader", search_name="Vader", image_url=image_url
+    )
+    source = FestivalSource(
+        name="custom",
+        url="https://custom.example/lineup.txt",
+        parse=lambda body: body.splitlines(),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://custom.example/lineup.txt",
+        text="Vader\nBloodbath\nMarduk",
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Vader&market=DE",
+        status_code=429,
+        json={"error": {"status": 429, "message": "API rate limit exceeded"}},
+    )
+    httpx_mock.add_exception(
+        httpx.ReadTimeout("timed out"),
+        url="https://api.spotify.com/v1/search?type=artist&q=Bloodbath&market=DE",
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Marduk&market=DE",
+        json=create_spotify_response(artist_name="Marduk"),
+    )
+    retry_queue = RetryQueue(festival="custom", max_attempts=2)
+
+    artists = await get_festival_artists(
+        source=source,
+        spotify_client=spotify_client,
+        github_client=github_client,
+        checkpoint=Checkpoint(festival="custom", artists={"Vader": known_vader}),
+        retry_queue=retry_queue,
+    )
+
+    assert artists == [dataclasses.replace(known_vader, stale=True)]
+    assert sorted(retry_queue.entries) == ["Bloodbath", "Marduk", "Vader"]
+    assert retry_queue.entries["Marduk"].last_error == "not found"
+    assert not any(
+        request.url.host == "api.github.com" and request.method == "POST"
+        for request in httpx_mock.get_requests()
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_festival_artists_retries_due_artists_first_and_escalates(
+    spotify_client, github_client, httpx_mock
+):
+    source = FestivalSource(
+        name="custom",
+        url="https://custom.example/lineup.txt",
+        parse=lambda body: body.splitlines(),
+        max_at_once=1,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://custom.example/lineup.txt",
+        text="Bloodbath\nVader\nMarduk",
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Marduk&market=DE",
+        json=create_spotify_response(artist_name="Marduk"),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.spotify.com/v1/search?type=artist&q=Bloodbath&market=DE",
+        json=create_spotify_response(artist_name="Bloodbath"),
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
+        status_code=201,
+    )
+    retry_queue = RetryQueue(festival="custom", max_attempts=2)
+    retry_queue.record_failure("Marduk", error="not found", now=0)
+    retry_queue.record_failure("Vader", error="timeout", now=time.time())
+
+    await get_festival_artists(
+        source=source,
+        spotify_client=spotify_client,
+        github_client=github_client,
+        retry_queue=retry_queue,
+    )
+
+    searched = [
+        request.url.params["q"]
+        for request in httpx_mock.get_requests()
+        if request.url.host == "api.spotify.com"
+    ]
+    assert searched == ["Marduk", "Bloodbath"]
+    assert retry_queue.entries["Marduk"].attempts == 2
+    assert retry_queue.entries["Vader"].attempts == 1
+    assert httpx_mock.get_requests()[-1].method == "POST"
+
+
+@pytest.mark.asyncio
+async def test_get_festival_artists_stops_searching_when_spotify_keeps_failing(
+    spotify_client, github_client, httpx_mock
+):
+    artist_names = [f"Band {i}" for i in range(MAX_CONSECUTIVE_FAILURES + 3)]
+    source = FestivalSource(
+        name="custom",
+        url="https://custom.example/lineup.txt",
+        parse=lambda body: body.splitlines(),
+        lineup=tuple(artist_names),
+        max_at_once=1,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(r"https://api\.spotify\.com/v1/search\?.*"),
+        status_code=503,
+        json={"error": {"status": 503}},
+        is_reusable=True,
+    )
+    last_known_good = ArtistInformation(
+        id="LastId", name="Band 7", search_name="band 7", image_url=None
+    )
+    retry_queue = RetryQueue(festival="custom")
+
+    artists = await get_festival_artists(
+        source=source,
+        spotify_client=spotify_client,
+        github_client=github_client,
+        artists=artist_names,
+        checkpoint=Checkpoint(festival="custom", artists={"band 7": last_known_good}),
+        retry_queue=retry_queue,
+    )
+
+    searches = [
+        request
+        for request in httpx_mock.get_requests()
+        if request.url.host == "api.spotify.com"
+    ]
+    assert len(searches) == MAX_CONSECUTIVE_FAILURES
+    assert len(retry_queue.entries) == len(artist_names)
+    assert artists == [dataclasses.replace(last_known_good, stale=True)]
+
+
+@pytest.mark.asyncio
+async def test_shared_searches_look_up_each_artist_once():
+    calls = []
+
+    async def search():
+        calls.append("Bloodbath")
+        await asyncio.sleep(0)
+        return ArtistInformation(
+            id="1", name="Bloodbath", search_name="Bloodbath", image_url=None
+        )
+
+    shared_searches = SharedSearches()
+    first, second = await asyncio.gather(
+        shared_searches.search("Bloodbath", search),
+        shared_searches.search("Bloodbath", search),
+    )
+    third = await shared_searches.search("Bloodbath", search)
+
+    assert calls == ["Bloodbath"]
+    assert first is second is third
+
+
+@pytest.mark.asyncio
+async def test_shared_searches_share_failures():
+    async def search():
+        raise httpx.ConnectError("unavailable")
+
+    shared_searches = SharedSearches()
+
+    with pytest.raises(httpx.ConnectError):
+        await shared_searches.search("Bloodbath", search)
+    with pytest.raises(httpx.ConnectError):
+        await shared_searches.search("Bloodbath", search)
@@ -0,0 +1,106 @@
+import json
+
+import boto3
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.festivals.catalog import CatalogPublisher, build_catalog
+from tests.helpers import record
+
+
+def test_build_catalog_deduplicates_artists_across_festivals():
+    catalog = build_catalog(
+        {
+            "wacken": [
+                record("1", "Bloodbath", "https://bloodbath.jpg"),
+                record("2", "Horn", "https://horn.jpg"),
+            ],
+            "dong": [
+                record("1", "Bloodbath", "https://bloodbath.jpg"),
+                record(None, "Unknown Band"),
+            ],
+        }
+    )
+
+    assert catalog.artists == {
+        "1": {"artist": "Bloodbath", "image": "https://bloodbath.jpg"},
+        "2": {"artist": "Horn", "image": "https://horn.jpg"},
+    }
+    assert catalog.festivals == {"1": ["dong", "wacken"], "2": ["wacken"]}
+    assert catalog.lineups == {
+        "dong": {"festival": "dong", "artists": ["1"], "unresolved": ["Unknown Band"]},
+        "wacken": {"festival": "wacken", "artists": ["1", "2"]},
+    }
+
+
+def test_build_catalog_prefers_fresh_records_over_stale_ones():
+    catalog = build_catalog(
+        {
+            "dong": [record("1", "Old Name", "https://old.jpg", stale=True)],
+            "wacken": [record("1", "Bloodbath", "https://bloodbath.jpg")],
+        }
+    )
+
+    assert catalog.artists == {
+        "1": {"artist": "Bloodbath", "image": "https://bloodbath.jpg"}
+    }
+
+
+@mock_aws
+def test_publisher_merges_festivals_not_published_in_this_run():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    s3_client.put_object(
+        Bucket="bucket-name", Key="dong.json", Body=json.dumps([record("2", "Horn")])
+    )
+    publisher = CatalogPublisher(s3=S3(s3_client), bucket_name="bucket-name")
+
+    catalog = publisher.publish(
+        published={"wacken": json.dumps([record("1", "Bloodbath")])}
+    )
+
+    assert set(catalog.artists) == {"1", "2"}
+    body = s3_client.get_object(Bucket="bucket-name", Key="lineups/dong.json")["Body"]
+    assert json.loads(body.read()) == {"festival": "dong", "artists": ["2"]}
+    assert "rude" not in catalog.lineups
+
+
+@mock_aws
+def test_publisher_rebuilds_when_another_invocation_published_concurrently():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    wacken = json.dumps([record("1", "Bloodbath")])
+    dong = json.dumps([record("3", "Gaerea")])
+    s3_client.put_object(Bucket="bucket-name", Key="wacken.json", Body=wacken)
+    s3_client.put_object(
+        Bucket="bucket-name", Key="dong.json", Body=json.dumps([record("2", "Horn")])
+    )
+
+    class ConcurrentS3(S3):
+        concurrent = True
+
+        def download(self, *, bucket_name: str, key: str) -> str | None:
+            body = super().download(bucket_name=bucket_name, key=key)
+            if key == "dong.json" and self.concurrent:
+                self.concurrent = False
+                s3_client.put_object(Bucket="bucket-name", Key="dong.json", Body=dong)
+                CatalogPublisher(s3=S3(s3_client), bucket_name="bucket-name").publish(
+                    published={"dong": dong}
+                )
+            return body
+
+    catalog = CatalogPublisher(
+        s3=ConcurrentS3(s3_client), bucket_name="bucket-name"
+    ).publish(published={"wacken": wacken})
+
+    assert set(catalog.artists) == {"1", "3"}
+    body = s3_client.get_object(Bucket="bucket-name", Key="artists.json")["Body"]
+    assert set(json.loads(body.read())) == {"1", "3"}
+    body = s3_client.get_object(Bucket="bucket-name", Key="lineups/dong.json")["Body"]
+    assert json.loads(body.read()) == {"festival": "dong", "artists": ["3"]}
@@ -0,0 +1,183 @@
+import json
+from unittest.mock import Mock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from src.adapter.s3 import S3, S3ConflictException
+from src.festivals.changes import (
+    Change,
+    ChangeFeed,
+    FileNotifier,
+    LineupDiff,
+    SnsNotifier,
+    apply_change,
+    diff_artists,
+    notifier_from_env,
+)
+from tests.helpers import record
+
+
+def test_diff_artists_reports_added_removed_and_changed_artists():
+    before = [
+        record("1", "Bloodbath", "https://old.jpg"),
+        record("2", "Horn"),
+        record(None, "Unknown Band"),
+    ]
+    after = [
+        record("1", "Bloodbath", "https://new.jpg"),
+        record("3", "Dying Fetus"),
+        record(None, "Unknown Band"),
+    ]
+
+    diff = diff_artists(before=before, after=after)
+
+    assert diff.added == [record("3", "Dying Fetus")]
+    assert diff.removed == ["2"]
+    assert diff.changed == [record("1", "Bloodbath", "https://new.jpg")]
+    assert diff_artists(before=after, after=after).is_empty()
+
+
+def test_apply_change_catches_up_to_the_published_lineup():
+    before = [record("1", "Bloodbath"), record(None, "Unknown Band")]
+    after = [record("1", "Bloodbath", "https://new.jpg"), record("3", "Horn")]
+    feed = ChangeFeed(s3=Mock(), bucket_name="bucket-name")
+
+    change = feed.publish(
+        festival="wacken",
+        sequence=1,
+        diff=diff_artists(before=before, after=after),
+        now=0,
+    )
+
+    assert apply_change(before, change.to_dict()) == after
+
+
+def test_diff_artists_carries_billing_order_only_when_appending_breaks_it():
+    before = [record("1", "Bloodbath"), record("2", "Horn")]
+
+    appended = diff_artists(before=before, after=[*before, record("3", "Gaerea")])
+    headliner = diff_artists(before=before, after=[record("3", "Gaerea"), *before])
+    reordered = diff_artists(before=before, after=[before[1], before[0]])
+
+    assert appended.order is None
+    assert headliner.order == ["3", "1", "2"]
+    assert not reordered.is_empty()
+    assert reordered.order == ["2", "1"]
+    for after in [[record("3", "Gaerea"), *before], [before[1], before[0]]]:
+        change = Change(
+            festival="wacken",
+            sequence=1,
+            created_at="",
+            diff=diff_artists(before=before, after=after),
+        )
+        assert apply_change(before, change.to_dict()) == after
+
+
+@mock_aws
+def test_change_feed_uploads_sequenced_patch_and_notifies(tmp_path):
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    path = tmp_path / "changes.jsonl"
+    feed = ChangeFeed(
+        s3=S3(s3_client),
+        bucket_name="bucket-name",
+        notifier=FileNotifier(path=str(path)),
+    )
+
+    change = feed.publish(
+        festival="wacken",
+        sequence=3,
+        diff=LineupDiff(removed=["1"]),
+        now=0,
+    )
+
+    assert change.key == "changes/wacken/3.json"
+    uploaded = s3_client.get_object(Bucket="bucket-name", Key=change.key)
+    assert json.loads(uploaded["Body"].read()) == {
+        "festival": "wacken",
+        "sequence": 3,
+        "created_at": "1970-01-01T00:00:00+00:00",
+        "removed": ["1"],
+    }
+    assert json.loads(path.read_text()) == change.to_dict()
+
+
+@mock_aws
+def test_change_feed_never_overwrites_a_published_patch():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    notifier = Mock()
+    feed = ChangeFeed(s3=S3(s3_client), bucket_name="bucket-name", notifier=notifier)
+    feed.publish(festival="wacken", sequence=1, diff=LineupDiff(removed=["1"]), now=0)
+
+    with pytest.raises(S3ConflictException):
+        feed.publish(
+            festival="wacken", sequence=1, diff=LineupDiff(removed=["2"]), now=0
+        )
+
+    assert feed.load(festival="wacken", sequence=1)["removed"] == ["1"]
+    assert notifier.notify.call_count == 1
+
+
+@mock_aws
+def test_change_feed_appends_after_patches_left_by_failed_commits():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    feed = ChangeFeed(s3=S3(s3_client), bucket_name="bucket-name")
+    feed.write(festival="wacken", sequence=1, diff=LineupDiff(removed=["1"]), now=0)
+
+    change = feed.append(
+        festival="wacken", after=0, diff=LineupDiff(removed=["2"]), now=0
+    )
+
+    assert change.sequence == 2
+    assert feed.load(festival="wacken", sequence=2)["removed"] == ["2"]
+
+
+def test_change_feed_keeps_going_when_the_notifier_fails(caplog):
+    notifier = Mock()
+    notifier.notify.side_effect = Exception("unreachable")
+    feed = ChangeFeed(s3=Mock(), bucket_name="bucket-name", notifier=notifier)
+
+    feed.publish(festival="dong", sequence=1, diff=LineupDiff(removed=["1"]), now=0)
+
+    assert "Failed to notify about changes/dong/1.json" in caplog.text
+
+
+def test_sns_notifier_publishes_change_with_festival_attribute():
+    sns_client = Mock()
+    notifier = SnsNotifier(
+        topic_arn="arn:aws:sns:eu-west-1:1:changes", sns_client=sns_client
+    )
+    feed = ChangeFeed(s3=Mock(), bucket_name="bucket-name", notifier=notifier)
+
+    change = feed.publish(
+        festival="dong", sequence=2, diff=LineupDiff(removed=["1"]), now=0
+    )
+
+    arguments = sns_client.publish.call_args.kwargs
+    assert arguments["TopicArn"] == "arn:aws:sns:eu-west-1:1:changes"
+    assert json.loads(arguments["Message"]) == change.to_dict()
+    assert arguments["MessageAttributes"]["festival"]["StringValue"] == "dong"
+
+
+def test_notifier_from_env(monkeypatch):
+    assert notifier_from_env() is None
+    monkeypatch.setenv("CHANGE_NOTIFIER", "file:/tmp/changes.jsonl")
+    assert notifier_from_env().path == "/tmp/changes.jsonl"
+    monkeypatch.setenv("CHANGE_NOTIFIER", "sns:arn:aws:sns:eu-west-1:1:changes")
+    assert notifier_from_env().topic_arn == "arn:aws:sns:eu-west-1:1:changes"
+    monkeypatch.setenv("CHANGE_NOTIFIER", "email")
+    with pytest.raises(ValueError):
+        notifier_from_env()
@@ -0,0 +1,178 @@
+import dataclasses
+import json
+
+import boto3
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.adapter.spotify import ArtistInformation
+from src.festivals.checkpoint import Checkpoint, CheckpointStore, lineup_fingerprint
+
+bloodbath = ArtistInformation(
+    id="RandomSpotifyId",
+    name="Bloodbath",
+    search_name="bloodbath",
+    image_url="https://some-image-url.com",
+)
+
+
+@mock_aws
+def test_checkpoint_store_returns_empty_checkpoint_when_none_exists():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = CheckpointStore(s3=S3(s3_client), bucket_name="bucket-name")
+
+    assert store.load(festival="wacken") == Checkpoint(festival="wacken")
+
+
+@mock_aws
+def test_checkpoint_store_saves_and_loads_checkpoint():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = CheckpointStore(s3=S3(s3_client), bucket_name="bucket-name")
+    checkpoint = Checkpoint(festival="wacken", artists={"bloodbath": bloodbath})
+
+    store.save(checkpoint)
+
+    saved = s3_client.get_object(Bucket="bucket-name", Key="checkpoints/wacken.json")
+    assert json.load(saved["Body"])["artists"] == {
+        "bloodbath": {
+            "id": "RandomSpotifyId",
+            "artist": "Bloodbath",
+            "image": "https://some-image-url.com",
+        }
+    }
+    assert store.load(festival="wacken") == checkpoint
+    assert not checkpoint.is_new("bloodbath")
+    assert checkpoint.is_new("Vader")
+
+
+def test_lineup_fingerprint_ignores_order_case_and_whitespace():
+    assert lineup_fingerprint(["Bloodbath", "Vader"]) == lineup_fingerprint(
+        ["vader ", "BLOODBATH", "Vader"]
+    )
+    assert lineup_fingerprint(["Bloodbath"]) != lineup_fingerprint(
+        ["Bloodbath", "Vader"]
+    )
+
+
+def test_checkpoint_update_keeps_resolution_time_of_carried_over_artists():
+    vader = ArtistInformation(
+        id="VaderId", name="Vader", search_name="Vader", image_url=None
+    )
+    checkpoint = Checkpoint(
+        festival="wacken",
+        artists={"bloodbath": bloodbath, "Vader": vader},
+        resolved_at={"bloodbath": 10, "Vader": 10},
+    )
+    refreshed_vader = ArtistInformation(
+        id="VaderId", name="Vader", search_name="Vader", image_url="new"
+    )
+
+    checkpoint.update(artists=[bloodbath, refreshed_vader], now=20)
+
+    assert checkpoint.resolved_at == {"bloodbath": 10, "Vader": 20}
+
+
+def test_checkpoint_is_unchanged_until_fingerprint_differs_or_entries_expire():
+    fingerprint = lineup_fingerprint(["Bloodbath"])
+    checkpoint = Checkpoint(
+        festival="wacken",
+        artists={"bloodbath": bloodbath},
+        resolved_at={"bloodbath": 100},
+        fingerprint=fingerprint,
+    )
+
+    assert checkpoint.is_unchanged(fingerprint=fingerprint, now=150, max_age=100)
+    assert not checkpoint.is_unchanged(fingerprint=fingerprint, now=200, max_age=100)
+    assert not checkpoint.is_unchanged(
+        fingerprint=lineup_fingerprint(["Vader"]), now=150, max_age=100
+    )
+    assert not Checkpoint(festival="wacken").is_unchanged(
+        fingerprint=fingerprint, now=150, max_age=100
+    )
+
+
+@mock_aws
+def test_checkpoint_store_saves_fingerprint_and_resolution_times():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = CheckpointStore(s3=S3(s3_client), bucket_name="bucket-name")
+    checkpoint = Checkpoint(
+        festival="wacken",
+        artists={"bloodbath": bloodbath},
+        resolved_at={"bloodbath": 100},
+        fingerprint="fingerprint",
+    )
+
+    store.save(checkpoint)
+
+    assert store.load(festival="wacken") == checkpoint
+
+
+def test_checkpoint_falls_back_to_last_known_good_ignoring_case():
+    checkpoint = Checkpoint(festival="wacken", artists={"bloodbath": bloodbath})
+
+    assert checkpoint.last_known_good("bloodbath") == bloodbath
+    assert checkpoint.last_known_good("BLOODBATH") == bloodbath
+    assert checkpoint.last_known_good("Vader") is None
+
+
+def test_checkpoint_update_does_not_refresh_stale_artists():
+    checkpoint = Checkpoint(
+        festival="wacken",
+        artists={"bloodbath": bloodbath},
+        resolved_at={"bloodbath": 10},
+    )
+    stale = dataclasses.replace(bloodbath, stale=True)
+    stale_vader = ArtistInformation(
+        id="VaderId", name="Vader", search_name="Vader", image_url=None, stale=True
+    )
+
+    checkpoint.update(artists=[stale, stale_vader], now=20)
+
+    assert checkpoint.resolved_at == {"bloodbath": 10, "Vader": 0}
+
+
+@mock_aws
+def test_checkpoint_store_seeds_missing_checkpoint_from_published_output():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    s3_client.put_object(
+        Bucket="bucket-name",
+        Key="wacken.json",
+        Body=json.dumps(
+            [
+                {
+                    "id": "RandomSpotifyId",
+                    "artist": "Bloodbath",
+                    "image": "https://some-image-url.com",
+                }
+            ]
+        ),
+    )
+    store = CheckpointStore(s3=S3(s3_client), bucket_name="bucket-name")
+
+    checkpoint = store.load(festival="wacken", output_key="wacken.json")
+
+    assert checkpoint.last_known_good("bloodbath") == ArtistInformation(
+        id="RandomSpotifyId",
+        name="Bloodbath",
+        search_name="Bloodbath",
+        image_url="https://some-image-url.com",
+    )
+    assert store.load(festival="dong", output_key="dong.json") == Checkpoint(
+        festival="dong"
+    )
@@ -0,0 +1,37 @@
+import math
+from unittest.mock import Mock
+
+from src.festivals.deadline import Deadline
+
+
+def test_deadline_without_context_never_runs_low():
+    deadline = Deadline.from_context(None)
+
+    assert deadline.remaining_seconds() == math.inf
+    assert not deadline.is_running_low()
+
+
+def test_deadline_reads_remaining_time_from_lambda_context():
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = 20_000
+
+    deadline = Deadline.from_context(context)
+
+    assert deadline.remaining_seconds() == 20
+    assert not deadline.is_running_low()
+
+    context.get_remaining_time_in_millis.return_value = 14_000
+    assert deadline.is_running_low()
+
+
+def test_deadline_reserve_can_be_configured(monkeypatch):
+    monkeypatch.setenv("DEADLINE_RESERVE_SECONDS", "30")
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = 20_000
+
+    assert Deadline.from_context(context).is_running_low()
+
+
+def test_deadline_after_expires():
+    assert Deadline.after(seconds=0).is_running_low()
+    assert not Deadline.after(seconds=60).is_running_low()
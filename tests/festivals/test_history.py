@@ -0,0 +1,97 @@
+import boto3
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.festivals.changes import ChangeFeed, diff_artists
+from src.festivals.history import HistoryIndex, HistoryStore, lineup_at
+from tests.helpers import record
+
+DAY = 24 * 60 * 60
+
+
+def _s3() -> S3:
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    return S3(s3_client)
+
+
+def test_history_index_tracks_first_seen_last_seen_and_removal():
+    index = HistoryIndex(festival="wacken")
+
+    index.record(artist_names=["Bloodbath", "Horn"], now=0)
+    index.record(artist_names=["Bloodbath", "Gaerea"], now=DAY)
+    index.record(artist_names=["Bloodbath", "Gaerea"], now=8 * DAY)
+
+    bloodbath = index.artists["bloodbath"]
+    assert bloodbath.first_seen == "1970-01-01T00:00:00+00:00"
+    assert bloodbath.last_seen == "1970-01-09T00:00:00+00:00"
+    assert index.artists["horn"].removed_at == "1970-01-02T00:00:00+00:00"
+    assert index.artists["gaerea"].first_seen == "1970-01-02T00:00:00+00:00"
+
+
+def test_history_index_answers_announcement_and_removal_queries():
+    index = HistoryIndex(festival="wacken")
+    index.record(artist_names=["Bloodbath", "Horn"], now=0)
+    index.record(artist_names=["Bloodbath", "Gaerea"], now=DAY)
+    index.record(artist_names=["Bloodbath", "Gaerea", "Unknown Band"], now=10 * DAY)
+
+    announced = index.announced_since(7 * DAY)
+    assert [key for key, _ in announced] == ["unknown band"]
+    assert [key for key, _ in index.announced_since(DAY)] == ["gaerea", "unknown band"]
+    assert [key for key, _ in index.removed_since(0)] == ["horn"]
+    assert index.removed_since(7 * DAY) == []
+
+
+def test_history_index_clears_removal_when_an_artist_returns():
+    index = HistoryIndex(festival="dong")
+    index.record(artist_names=["Bloodbath"], now=0)
+    index.record(artist_names=[], now=DAY)
+    index.record(artist_names=["Bloodbath"], now=2 * DAY)
+
+    assert index.artists["bloodbath"].removed_at is None
+    assert index.artists["bloodbath"].first_seen == "1970-01-01T00:00:00+00:00"
+
+
+def test_history_index_keeps_the_resolved_id_when_a_lookup_fails():
+    index = HistoryIndex(festival="wacken")
+    index.record(artist_names=["Bloodbath"], ids={"Bloodbath": "1"}, now=0)
+    index.record(artist_names=["BLOODBATH "], ids={}, now=DAY)
+
+    assert list(index.artists) == ["bloodbath"]
+    assert index.artists["bloodbath"].id == "1"
+    assert index.artists["bloodbath"].artist == "BLOODBATH "
+    assert index.artists["bloodbath"].removed_at is None
+
+
+@mock_aws
+def test_history_store_round_trips():
+    store = HistoryStore(s3=_s3(), bucket_name="bucket-name")
+    assert store.load(festival="wacken").artists == {}
+    index = HistoryIndex(festival="wacken")
+    index.record(artist_names=["Bloodbath"], ids={"Bloodbath": "1"}, now=0)
+    index.record(artist_names=[], now=DAY)
+
+    store.save(index)
+
+    assert store.load(festival="wacken") == index
+
+
+@mock_aws
+def test_lineup_at_replays_the_change_feed():
+    feed = ChangeFeed(s3=_s3(), bucket_name="bucket-name")
+    lineups = [
+        [record("1", "Bloodbath")],
+        [record("1", "Bloodbath", "https://new.jpg"), record("2", "Horn")],
+        [record("2", "Horn")],
+    ]
+    before = []
+    for sequence, after in enumerate(lineups, start=1):
+        diff = diff_artists(before=before, after=after)
+        feed.publish(festival="wacken", sequence=sequence, diff=diff, now=0)
+        before = after
+
+    assert lineup_at(feed, festival="wacken", sequence=2) == lineups[1]
+    assert lineup_at(feed, festival="wacken", sequence=3) == lineups[2]
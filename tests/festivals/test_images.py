@@ -0,0 +1,223 @@
+import io
+import json
+
+import boto3
+import httpx
+import pytest
+from moto import mock_aws
+from PIL import Image
+
+from simulator.dataset import Dataset
+from simulator.images import png
+from simulator.service import Simulator
+from src.adapter.http import HttpStack
+from src.adapter.s3 import S3
+from src.executor import Executor, ExecutorKind
+from src.festivals.deadline import Deadline
+from src.festivals.images import (
+    ImageMirror,
+    fetch_url,
+    image_mirror_from_env,
+    render_variants,
+)
+from tests.helpers import record
+
+
+def _mirror(s3_client, *, kind: ExecutorKind = ExecutorKind.INLINE) -> ImageMirror:
+    return ImageMirror(
+        s3=S3(s3_client),
+        bucket_name="bucket-name",
+        executor=Executor(kind=kind),
+        sizes=(32, 64),
+    )
+
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(
+            Bucket="bucket-name",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+        )
+        yield s3_client
+
+
+def _keys(s3_client) -> list[str]:
+    response = s3_client.list_objects_v2(Bucket="bucket-name", Prefix="images/")
+    return sorted(item["Key"] for item in response.get("Contents", []))
+
+
+def test_render_variants_creates_webp_thumbnails():
+    variants = render_variants(png(width=200, height=100, color=(1, 2, 3)), (64, 320))
+
+    sizes = {}
+    for size, body in variants.items():
+        with Image.open(io.BytesIO(body)) as image:
+            assert image.format == "WEBP"
+            sizes[size] = image.size
+    assert sizes == {64: (64, 32), 320: (200, 100)}
+
+
+@pytest.mark.asyncio
+async def test_mirror_stores_images_content_addressed_with_variants(s3_client):
+    simulator = Simulator(dataset=Dataset.synthetic(artists=1))
+    http = HttpStack(transport=simulator.transport())
+
+    stats = await _mirror(s3_client).mirror(
+        [
+            record("1", image="http://simulator/images/1/640"),
+            record("2", image="http://simulator/images/2/640"),
+            record("1", image="http://simulator/images/1/640"),
+            record(None),
+        ],
+        http=http,
+    )
+
+    assert stats.to_dict() == {
+        "downloaded": 2,
+        "unchanged": 0,
+        "deduplicated": 0,
+        "failed": 0,
+        "skipped": 0,
+    }
+    index = json.loads(
+        s3_client.get_object(Bucket="bucket-name", Key="images/index.json")[
+            "Body"
+        ].read()
+    )
+    entry = index["1"]
+    assert entry["source"] == "http://simulator/images/1/640"
+    assert entry["key"] == f"images/{entry['hash']}.png"
+    assert entry["variants"] == {
+        "32": f"images/{entry['hash']}/32.webp",
+        "64": f"images/{entry['hash']}/64.webp",
+    }
+    original = s3_client.get_object(Bucket="bucket-name", Key=entry["key"])
+    assert original["ContentType"] == "image/png"
+    assert original["CacheControl"] == "public, max-age=31536000, immutable"
+    variant = s3_client.get_object(Bucket="bucket-name", Key=entry["variants"]["64"])
+    assert variant["ContentType"] == "image/webp"
+    assert len(_keys(s3_client)) == 7
+    assert simulator.stats_dict()["images"]["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_mirror_only_fetches_images_whose_source_changed(s3_client):
+    simulator = Simulator(dataset=Dataset.synthetic(artists=1))
+    http = HttpStack(transport=simulator.transport())
+    records = [
+        record("1", image="http://simulator/images/1/640"),
+        record("2", image="http://simulator/images/2/640"),
+    ]
+    await _mirror(s3_client).mirror(records, http=http)
+
+    records[1] = record("2", image="http://simulator/images/2/320")
+    stats = await _mirror(s3_client).mirror(records, http=http)
+
+    assert stats.unchanged == 1
+    assert stats.downloaded == 1
+    assert simulator.stats_dict()["images"]["requests"] == 3
+
+
+@pytest.mark.asyncio
+async def test_mirror_deduplicates_identical_images_from_new_urls(s3_client):
+    body = png(width=8, height=8, color=(9, 9, 9))
+    http = HttpStack(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, content=body, headers={"Content-Type": "image/png"}
+            )
+        )
+    )
+    await _mirror(s3_client).mirror([record("1", image="https://a/1")], http=http)
+    keys = _keys(s3_client)
+
+    stats = await _mirror(s3_client).mirror(
+        [record("1", image="https://a/1"), record("2", image="https://b/2")], http=http
+    )
+
+    assert stats.deduplicated == 1
+    assert _keys(s3_client) == keys
+    index = json.loads(
+        s3_client.get_object(Bucket="bucket-name", Key="images/index.json")[
+            "Body"
+        ].read()
+    )
+    assert index["2"]["key"] == index["1"]["key"]
+
+
+@pytest.mark.asyncio
+async def test_mirror_skips_failed_downloads_and_retries_them_next_run(s3_client):
+    http = HttpStack(transport=httpx.MockTransport(lambda r: httpx.Response(404)))
+
+    stats = await _mirror(s3_client).mirror(
+        [record("1", image="https://a/1")], http=http
+    )
+
+    assert stats.failed == 1
+    assert _keys(s3_client) == ["images/index.json"]
+    body = png(width=8, height=8, color=(9, 9, 9))
+    http = HttpStack(
+        transport=httpx.MockTransport(lambda r: httpx.Response(200, content=body))
+    )
+    stats = await _mirror(s3_client).mirror(
+        [record("1", image="https://a/1")], http=http
+    )
+    assert stats.downloaded == 1
+
+
+@pytest.mark.asyncio
+async def test_mirror_skips_downloads_once_the_deadline_runs_low(s3_client):
+    simulator = Simulator(dataset=Dataset.synthetic(artists=1))
+    http = HttpStack(transport=simulator.transport())
+    records = [record("1", image="http://simulator/images/1/640")]
+
+    stats = await _mirror(s3_client).mirror(
+        records,
+        http=http,
+        deadline=Deadline(remaining_millis=lambda: 0, reserve_seconds=10),
+    )
+
+    assert stats.skipped == 1
+    assert simulator.stats_dict()["images"]["requests"] == 0
+    stats = await _mirror(s3_client).mirror(records, http=http)
+    assert stats.downloaded == 1
+
+
+@pytest.mark.asyncio
+async def test_mirror_renders_variants_in_a_process_pool(s3_client):
+    simulator = Simulator(dataset=Dataset.synthetic(artists=1))
+    mirror = _mirror(s3_client, kind=ExecutorKind.PROCESS)
+
+    try:
+        stats = await mirror.mirror(
+            [record("1", image="http://simulator/images/1/160")],
+            http=HttpStack(transport=simulator.transport()),
+        )
+    finally:
+        mirror.close()
+
+    assert stats.downloaded == 1
+    assert len(_keys(s3_client)) == 4
+
+
+def test_fetch_url_points_spotify_images_at_a_local_server(monkeypatch):
+    assert fetch_url("https://i.scdn.co/image/ab67") == "https://i.scdn.co/image/ab67"
+    monkeypatch.setenv("SPOTIFY_IMAGE_URL", "http://127.0.0.1:8080/images/")
+    assert fetch_url("https://i.scdn.co/image/ab67") == (
+        "http://127.0.0.1:8080/images/image/ab67"
+    )
+
+
+def test_image_mirror_from_env(monkeypatch):
+    assert image_mirror_from_env(s3=None) is None
+    monkeypatch.setenv("FESTIVAL_ARTISTS_BUCKET", "bucket-name")
+    monkeypatch.setenv("IMAGE_MIRROR", "s3")
+    monkeypatch.setenv("IMAGE_MIRROR_SIZES", "64,128")
+    mirror = image_mirror_from_env(s3=None)
+    assert mirror.sizes == (64, 128)
+    assert mirror.executor.kind == ExecutorKind.THREAD
+    monkeypatch.setenv("IMAGE_MIRROR", "cdn")
+    with pytest.raises(ValueError):
+        image_mirror_from_env(s3=None)
@@ -0,0 +1,110 @@
+import boto3
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.festivals.manifest import Manifest, ManifestStore, content_hash, object_key
+
+
+def test_manifest_update_returns_objects_only_when_content_changes():
+    manifest = Manifest()
+
+    objects = manifest.update(
+        festival="wacken", bodies={"v1": "[1]", "v2": "{}"}, artists=1, now=0
+    )
+
+    assert objects == [
+        (object_key(content_hash("[1]")), "[1]"),
+        (object_key(content_hash("{}")), "{}"),
+    ]
+    assert manifest.changed
+    assert manifest.festivals["wacken"].to_dict() == {
+        "hash": content_hash("[1]"),
+        "key": f"objects/{content_hash('[1]')}.json",
+        "artists": 1,
+        "updated_at": "1970-01-01T00:00:00+00:00",
+        "sequence": 0,
+        "v2": {
+            "hash": content_hash("{}"),
+            "key": f"objects/{content_hash('{}')}.json",
+        },
+    }
+
+    manifest.changed = False
+    assert (
+        manifest.update(
+            festival="wacken", bodies={"v1": "[1]", "v2": "{}"}, artists=1, now=60
+        )
+        == []
+    )
+    assert not manifest.changed
+    assert manifest.festivals["wacken"].updated_at == "1970-01-01T00:00:00+00:00"
+
+
+def test_manifest_keeps_change_sequence_across_updates():
+    manifest = Manifest()
+    manifest.update(festival="wacken", bodies={"v1": "[1]"}, artists=1, now=0)
+    manifest.changed = False
+
+    manifest.advance_sequence("wacken", 1)
+    assert manifest.changed
+    manifest.update(festival="wacken", bodies={"v1": "[2]"}, artists=1, now=60)
+
+    assert manifest.festivals["wacken"].sequence == 1
+    manifest.advance_sequence("wacken", 3)
+    manifest.advance_sequence("wacken", 2)
+    assert manifest.festivals["wacken"].sequence == 3
+
+
+@mock_aws
+def test_manifest_store_round_trips():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = ManifestStore(s3=S3(s3_client), bucket_name="bucket-name")
+    assert store.load().festivals == {}
+
+    manifest = Manifest()
+    manifest.update(festival="dong", bodies={"v1": "[]", "v2": "{}"}, artists=0, now=0)
+    manifest.advance_sequence("dong", 1)
+    store.save(manifest)
+
+    assert store.load().festivals == manifest.festivals
+    assert not manifest.changed
+
+
+@mock_aws
+def test_manifest_store_commit_retries_when_manifest_changed_concurrently():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = ManifestStore(s3=S3(s3_client), bucket_name="bucket-name")
+    store.commit(
+        lambda manifest: manifest.update(
+            festival="wacken", bodies={"v1": "[]"}, artists=0, now=0
+        )
+    )
+    attempts = 0
+
+    def publish_dong(manifest: Manifest) -> int:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            concurrent = store.load()
+            concurrent.update(festival="wacken", bodies={"v1": "[1]"}, artists=1, now=0)
+            concurrent.advance_sequence("wacken", 1)
+            store.save(concurrent)
+        manifest.update(festival="dong", bodies={"v1": "[2]"}, artists=1, now=0)
+        manifest.advance_sequence("dong", 1)
+        return manifest.festivals["dong"].sequence
+
+    assert store.commit(publish_dong) == 1
+
+    assert attempts == 2
+    festivals = store.load().festivals
+    assert festivals["wacken"].hash == content_hash("[1]")
+    assert festivals["wacken"].sequence == 1
+    assert festivals["dong"].sequence == 1
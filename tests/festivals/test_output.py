@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from src.adapter.spotify import ArtistInformation
+from src.festivals.output import (
+    deserialize_artists_v2,
+    output_versions_from_env,
+    serialize_artists,
+    serialize_artists_v2,
+    versioned_key,
+)
+
+artists = [
+    ArtistInformation(
+        id="1",
+        name="Bloodbath",
+        search_name="Bloodbath",
+        image_url="https://i.scdn.co/image/ab67616100005174b621972eca6f14a302786381",
+    ),
+    ArtistInformation(
+        id="2",
+        name="Horn",
+        search_name="Horn",
+        image_url="https://images.example/horn.jpg",
+        stale=True,
+    ),
+    ArtistInformation(id=None, name="Apep", search_name="Apep", image_url=None),
+]
+
+
+def test_serialize_artists_writes_one_record_per_artist():
+    assert json.loads(serialize_artists(artists[1:2])) == [
+        {
+            "id": "2",
+            "artist": "Horn",
+            "image": "https://images.example/horn.jpg",
+            "stale": True,
+        }
+    ]
+
+
+def test_serialize_artists_v2_is_columnar_with_image_prefix_factored_out():
+    assert json.loads(serialize_artists_v2(artists)) == {
+        "v": 2,
+        "p": "https://i.scdn.co/image/",
+        "i": ["1", "2", None],
+        "a": ["Bloodbath", "Horn", "Apep"],
+        "m": [
+            "ab67616100005174b621972eca6f14a302786381",
+            "https://images.example/horn.jpg",
+            None,
+        ],
+        "s": [1],
+    }
+    assert len(serialize_artists_v2(artists)) < len(serialize_artists(artists))
+
+
+def test_v2_round_trips():
+    assert deserialize_artists_v2(serialize_artists_v2(artists)) == artists
+
+
+def test_versioned_key():
+    assert versioned_key("wacken.json", "v1") == "wacken.json"
+    assert versioned_key("wacken.json", "v2") == "v2/wacken.json"
+
+
+def test_output_versions_from_env(monkeypatch):
+    assert output_versions_from_env() == ["v1"]
+
+    monkeypatch.setenv("OUTPUT_VERSIONS", "v2")
+    assert output_versions_from_env() == ["v1", "v2"]
+
+    monkeypatch.setenv("OUTPUT_VERSIONS", "v1, v2")
+    assert output_versions_from_env() == ["v1", "v2"]
+
+    monkeypatch.setenv("OUTPUT_VERSIONS", "v3")
+    with pytest.raises(ValueError):
+        output_versions_from_env()
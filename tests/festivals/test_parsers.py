@@ -0,0 +1,118 @@
+from benchmarks.bench_extract import (
+    parse_dong_with_soup,
+    parse_rude_with_soup,
+    read_fixture,
+)
+from src.festivals.extract import Selector, extract_any_text, extract_text
+from src.festivals.parsers import (
+    parse_dong,
+    parse_dong_timetable,
+    parse_dong_with_timetable,
+    parse_rude,
+    parse_wacken,
+)
+from src.festivals.timetable import Slot
+
+
+def test_extract_text_returns_text_of_matching_elements():
+    body = """
+        <a href="https://band/1">One <b>Band</b></a>
+        <a href="https://other/2">Other</a>
+        <a>No href</a>
+        <a href="https://band/3"><img src="x.jpg"></a>
+    """
+
+    assert extract_text(
+        body, Selector(tag="a", attribute="href", prefix="https://band/")
+    ) == [
+        "One Band",
+        "",
+    ]
+
+
+def test_extract_text_follows_selector_chain():
+    body = """
+        <div class="cb-meta cb-article-meta"><h2><a>Marduk (SWE)</a></h2></div>
+        <a>Not an artist</a>
+        <div class="other"><h2><a>Not an artist either</a></h2></div>
+        <div class="cb-article-meta"><span>no title</span></div>
+        <div class="cb-article-meta"><h2><a>Vader &amp; Friends (PL)</a></h2></div>
+    """
+
+    assert extract_text(
+        body,
+        Selector(tag="div", class_name="cb-article-meta"),
+        Selector(tag="h2"),
+        Selector(tag="a"),
+    ) == ["Marduk (SWE)", "Vader & Friends (PL)"]
+
+
+def test_extract_any_text_keeps_document_order_across_selectors():
+    body = """
+        <p>Donnerstag</p>
+        <a href="https://band/1"><div>12:00</div> One</a>
+        <p>Freitag</p>
+        <a href="https://other/2">Other</a>
+        <a href="https://band/3">Three</a>
+    """
+
+    assert extract_any_text(
+        body,
+        Selector(tag="p"),
+        Selector(tag="a", attribute="href", prefix="https://band/"),
+    ) == [(0, "Donnerstag"), (1, "12:00 One"), (0, "Freitag"), (1, "Three")]
+
+
+def test_parse_wacken_reads_titles():
+    assert parse_wacken('[{"artist": {"title": "Bloodbath"}}]') == ["Bloodbath"]
+
+
+def test_parse_dong_matches_beautifulsoup_on_saved_page():
+    body = read_fixture("dong.html")
+
+    artist_names = parse_dong(body)
+
+    assert artist_names == parse_dong_with_soup(body)
+    assert len(artist_names) == 80
+    assert "1914" in artist_names
+    assert not any(":" in name for name in artist_names)
+
+
+def test_parse_rude_matches_beautifulsoup_on_saved_page():
+    body = read_fixture("rude.html")
+
+    artist_names = parse_rude(body)
+
+    assert artist_names == parse_rude_with_soup(body)
+    assert artist_names[:3] == ["RUNNING ORDER 2024", "Marduk", "Deserted Fear"]
+
+
+def test_parse_dong_timetable_reads_days_and_time_slots_on_saved_page():
+    slots = parse_dong_timetable(read_fixture("dong.html"))
+
+    assert len(slots) == 78
+    assert [slot.day for slot in slots[::26]] == ["Donnerstag", "Freitag", "Samstag"]
+    assert slots[0] == Slot(artist="Bloodbath", day="Donnerstag", start=720, end=770)
+
+
+def test_parse_dong_with_timetable_reads_lineup_and_slots_in_one_pass():
+    body = read_fixture("dong.html")
+
+    artist_names, slots = parse_dong_with_timetable(body)
+
+    assert artist_names == parse_dong(body)
+    assert slots == parse_dong_timetable(body)
+
+
+def test_parse_dong_timetable_keeps_sets_after_midnight_on_their_festival_day():
+    body = """
+        <p>Samstag</p>
+        <a href="https://www.dongopenair.de/band-details/?band=Vader"><div>23:30</div> Vader</a>
+        <a href="https://www.dongopenair.de/band-details/?band=Grave"><div>00:40</div> Grave</a>
+        <a href="https://www.dongopenair.de/band-details/?band=Vader">Vader</a>
+    """
+
+    assert parse_dong_timetable(body) == [
+        Slot(artist="Vader", day="Samstag", start=1410, end=1480),
+        Slot(artist="Grave", day="Samstag", start=1480, end=1540),
+    ]
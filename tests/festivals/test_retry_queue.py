@@ -0,0 +1,70 @@
+import boto3
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.festivals.retry_queue import RetryEntry, RetryQueue, RetryQueueStore
+
+
+def test_retry_queue_backs_off_exponentially():
+    retry_queue = RetryQueue(festival="wacken", backoff_seconds=100)
+
+    retry_queue.record_failure("Bloodbath", error="timeout", now=1_000)
+    assert retry_queue.entries["Bloodbath"] == RetryEntry(
+        attempts=1, next_attempt_at=1_100, last_error="timeout"
+    )
+    assert not retry_queue.is_due("Bloodbath", now=1_099)
+    assert retry_queue.is_due("Bloodbath", now=1_100)
+    assert retry_queue.is_due("Vader", now=0)
+
+    retry_queue.record_failure("Bloodbath", error="timeout", now=2_000)
+    assert retry_queue.entries["Bloodbath"].next_attempt_at == 2_200
+    assert retry_queue.due_names(now=2_000) == []
+    assert retry_queue.due_names(now=2_200) == ["Bloodbath"]
+
+
+def test_retry_queue_caps_backoff_at_one_day():
+    retry_queue = RetryQueue(festival="wacken", backoff_seconds=60 * 60)
+
+    for _ in range(10):
+        retry_queue.record_failure("Bloodbath", error="timeout", now=0)
+
+    assert retry_queue.entries["Bloodbath"].next_attempt_at == 24 * 60 * 60
+
+
+def test_retry_queue_escalates_after_max_attempts():
+    retry_queue = RetryQueue(festival="wacken", max_attempts=2)
+
+    retry_queue.record_failure("Bloodbath", error="not found", now=0)
+    assert not retry_queue.should_escalate("Bloodbath")
+    retry_queue.record_failure("Bloodbath", error="not found", now=0)
+    assert retry_queue.should_escalate("Bloodbath")
+
+    retry_queue.record_success("Bloodbath")
+    assert retry_queue.entries == {}
+    assert not retry_queue.should_escalate("Bloodbath")
+
+
+def test_retry_queue_reads_policy_from_env(monkeypatch):
+    monkeypatch.setenv("RETRY_MAX_ATTEMPTS", "5")
+    monkeypatch.setenv("RETRY_BACKOFF_SECONDS", "60")
+
+    retry_queue = RetryQueue.from_env(festival="wacken")
+
+    assert retry_queue.max_attempts == 5
+    assert retry_queue.backoff_seconds == 60
+
+
+@mock_aws
+def test_retry_queue_store_saves_and_loads_queue():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    store = RetryQueueStore(s3=S3(s3_client), bucket_name="bucket-name")
+    retry_queue = RetryQueue.from_env(festival="wacken")
+    retry_queue.record_failure("Bloodbath", error="timeout", now=0)
+
+    assert store.load(festival="wacken") == RetryQueue.from_env(festival="wacken")
+    store.save(retry_queue)
+    assert store.load(festival="wacken") == retry_queue
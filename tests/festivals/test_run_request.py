@@ -0,0 +1,129 @@
+import pytest
+
+from src.adapter.spotify import ArtistInformation
+from src.festivals.checkpoint import Checkpoint
+from src.festivals.run_request import (
+    InvalidRunRequestException,
+    Mode,
+    RunRequest,
+)
+
+checkpoint = Checkpoint(
+    festival="wacken",
+    artists={
+        "Vader": ArtistInformation(
+            id="VaderId", name="Vader", search_name="Vader", image_url=None
+        )
+    },
+)
+
+
+def test_run_request_defaults_to_full_run_of_all_festivals():
+    for event in [None, {}]:
+        assert RunRequest.from_event(event) == RunRequest(
+            festivals=["wacken", "dong", "rude"], mode=Mode.FULL, fan_out=False
+        )
+
+
+def test_run_request_reads_event():
+    run_request = RunRequest.from_event(
+        {
+            "festivals": ["dong"],
+            "artists": ["Bloodbath"],
+            "lineups": {"dong": ["Bloodbath", "Vader"]},
+            "mode": "refresh-only",
+            "fan_out": True,
+            "force": True,
+            "profile": True,
+        }
+    )
+
+    assert run_request == RunRequest(
+        festivals=["dong"],
+        artists=["Bloodbath"],
+        lineups={"dong": ["Bloodbath", "Vader"]},
+        mode=Mode.REFRESH_ONLY,
+        fan_out=True,
+        force=True,
+        profile=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"festivals": ["unknown"]},
+        {"lineups": {"unknown": []}},
+        {"mode": "everything"},
+        {"festivals": "wacken"},
+        {"festivals": [["wacken"]]},
+        {"artists": "Bloodbath"},
+        {"artists": ["Bloodbath", 1]},
+        {"lineups": ["wacken"]},
+        {"lineups": {"wacken": "Bloodbath"}},
+        {"mode": ["full"]},
+        {"fan_out": "yes"},
+        {"force": 1},
+    ],
+)
+def test_run_request_rejects_invalid_events(event):
+    with pytest.raises(InvalidRunRequestException):
+        RunRequest.from_event(event)
+
+
+def test_run_request_for_festival_keeps_options_but_not_fan_out():
+    run_request = RunRequest(
+        festivals=["wacken", "rude"],
+        lineups={"rude": ["Horn"]},
+        mode=Mode.INCREMENTAL,
+        fan_out=True,
+        force=True,
+    )
+
+    assert run_request.for_festival("rude").to_event() == {
+        "festivals": ["rude"],
+        "mode": "incremental",
+        "lineups": {"rude": ["Horn"]},
+        "force": True,
+    }
+    assert run_request.for_festival("wacken").to_event() == {
+        "festivals": ["wacken"],
+        "mode": "incremental",
+        "force": True,
+    }
+
+
+@pytest.mark.parametrize(
+    "run_request,expected_new,expected_known",
+    [
+        (RunRequest(mode=Mode.FULL), True, True),
+        (RunRequest(mode=Mode.INCREMENTAL), True, False),
+        (RunRequest(mode=Mode.REFRESH_ONLY), False, True),
+        (RunRequest(artists=["vader"]), False, True),
+    ],
+)
+def test_run_request_selects_artists_to_look_up(
+    run_request, expected_new, expected_known
+):
+    assert (
+        run_request.should_look_up(artist_name="Bloodbath", checkpoint=checkpoint)
+        == expected_new
+    )
+    assert (
+        run_request.should_look_up(artist_name="Vader", checkpoint=checkpoint)
+        == expected_known
+    )
+
+
+@pytest.mark.parametrize(
+    "run_request,expected",
+    [
+        (RunRequest(mode=Mode.FULL), True),
+        (RunRequest(mode=Mode.INCREMENTAL), True),
+        (RunRequest(mode=Mode.REFRESH_ONLY), False),
+        (RunRequest(artists=["vader"]), False),
+        (RunRequest(force=True), False),
+    ],
+)
+def test_run_request_may_skip_unchanged_lineups(run_request, expected):
+    assert run_request.may_skip_unchanged() == expected
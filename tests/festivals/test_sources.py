@@ -0,0 +1,61 @@
+import pytest
+
+from src.festivals import sources
+from src.festivals.sources import (
+    FestivalSource,
+    SourceException,
+    get_source,
+    register_source,
+    source_names,
+)
+
+
+def _parse_lines(body: str) -> list[str]:
+    return body.splitlines()
+
+
+def test_builtin_sources_are_registered():
+    assert source_names() == ["wacken", "dong", "rude"]
+    assert get_source("wacken").output_key == "wacken.json"
+    assert get_source("wacken").is_excluded("Metal Disco")
+    assert get_source("wacken").is_excluded("Metal Yoga")
+    assert not get_source("wacken").is_excluded("Bloodbath")
+    assert get_source("rude").lineup is not None
+
+
+def test_fetch_url_uses_configured_festival_base_url(monkeypatch):
+    assert get_source("dong").fetch_url == "https://www.dongopenair.de/bands/"
+
+    monkeypatch.setenv("FESTIVAL_BASE_URL", "http://localhost:8080/festivals/")
+
+    assert get_source("dong").fetch_url == "http://localhost:8080/festivals/dong"
+
+
+def test_register_source_adds_source_to_registry(monkeypatch):
+    monkeypatch.setattr(sources, "_sources", {})
+    source = FestivalSource(
+        name="summer-breeze",
+        url="https://summer-breeze.example/bands",
+        parse=_parse_lines,
+        max_per_second=2,
+    )
+
+    register_source(source)
+
+    assert source_names() == ["summer-breeze"]
+    assert get_source("summer-breeze") == source
+    assert source.output_key == "summer-breeze.json"
+
+
+def test_register_source_rejects_duplicates(monkeypatch):
+    monkeypatch.setattr(sources, "_sources", {})
+    source = FestivalSource(name="a", url="https://a.example", parse=_parse_lines)
+    register_source(source)
+
+    with pytest.raises(SourceException):
+        register_source(source)
+
+
+def test_get_source_raises_for_unknown_source():
+    with pytest.raises(SourceException):
+        get_source("unknown")
@@ -0,0 +1,97 @@
+import json
+
+import boto3
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.festivals.timetable import (
+    Slot,
+    Timetable,
+    TimetablePublisher,
+    build_slots,
+)
+
+
+def _two_stage_timetable() -> Timetable:
+    return Timetable.build(
+        festival="wacken",
+        slots=build_slots(
+            [
+                ("Thursday", "Faster", 18 * 60, "Bloodbath"),
+                ("Thursday", "Faster", 19 * 60, "Vader"),
+                ("Thursday", "Harder", 18 * 60 + 30, "Marduk"),
+                ("Friday", "Faster", 12 * 60, "Horn"),
+            ]
+        ),
+    )
+
+
+def test_build_slots_ends_sets_at_the_next_start_on_their_stage():
+    slots = build_slots(
+        [
+            ("Thursday", "Faster", 23 * 60, "Bloodbath"),
+            ("Thursday", "Faster", 30, "Vader"),
+            ("Thursday", "Harder", 23 * 60 + 30, "Marduk"),
+        ]
+    )
+
+    assert slots == [
+        Slot(artist="Bloodbath", day="Thursday", start=1380, end=1470, stage="Faster"),
+        Slot(artist="Vader", day="Thursday", start=1470, end=1530, stage="Faster"),
+        Slot(artist="Marduk", day="Thursday", start=1410, end=1470, stage="Harder"),
+    ]
+
+
+def test_timetable_index_answers_who_plays_now():
+    timetable = _two_stage_timetable()
+
+    assert timetable.index["Thursday"].bounds == [1080, 1110, 1140, 1170, 1200]
+    assert [s.artist for s in timetable.playing_at(day="Thursday", minute=1080)] == [
+        "Bloodbath"
+    ]
+    assert [s.artist for s in timetable.playing_at(day="Thursday", minute=1120)] == [
+        "Bloodbath",
+        "Marduk",
+    ]
+    assert [s.artist for s in timetable.playing_at(day="Thursday", minute=1199)] == [
+        "Vader"
+    ]
+    assert timetable.playing_at(day="Thursday", minute=1200) == []
+    assert timetable.playing_at(day="Thursday", minute=600) == []
+    assert timetable.playing_at(day="Sunday", minute=1080) == []
+
+
+def test_timetable_lists_clashes_across_stages():
+    timetable = _two_stage_timetable()
+
+    assert [s.artist for s in timetable.clashes_with("Marduk")] == [
+        "Bloodbath",
+        "Vader",
+    ]
+    assert [s.artist for s in timetable.clashes_with("Bloodbath")] == ["Marduk"]
+    assert timetable.clashes_with("Horn") == []
+
+
+@mock_aws
+def test_timetable_publisher_uploads_slots_and_index():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+
+    TimetablePublisher(s3=S3(s3_client), bucket_name="bucket-name").publish(
+        _two_stage_timetable()
+    )
+
+    body = s3_client.get_object(Bucket="bucket-name", Key="timetables/wacken.json")
+    document = json.loads(body["Body"].read())
+    assert document["slots"][1] == {
+        "artist": "Marduk",
+        "day": "Thursday",
+        "start": "18:30",
+        "end": "19:30",
+        "stage": "Harder",
+        "clashes": [0, 2],
+    }
+    assert document["index"]["Friday"] == {"bounds": [720, 780], "playing": [[3]]}
@@ -0,0 +1,17 @@
+class Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def record(artist_id, name=None, image=None, *, stale=False) -> dict:
+    record = {
+        "id": artist_id,
+        "artist": artist_id if name is None else name,
+        "image": image,
+    }
+    if stale:
+        record["stale"] = True
+    return record
@@ -0,0 +1,51 @@
+from benchmarks.bench_pipeline import (
+    bench_match,
+    compare,
+    lineup_bodies,
+    output_sizes,
+    run_pipeline,
+    search_responses,
+    unthrottled_sources,
+)
+from src.festivals.sources import get_source
+
+
+def test_pipeline_benchmark_runs_against_stubbed_services():
+    run = run_pipeline(
+        bodies=lineup_bodies()["fixture"],
+        spotify_responses=search_responses()["fixture"],
+    )
+
+    with unthrottled_sources():
+        assert get_source("wacken").max_per_second is None
+        summary = run()
+
+    assert get_source("wacken").max_per_second == 5
+    assert summary["wacken"]["artists"] > 0
+    assert summary["dong"]["artists"] == summary["wacken"]["artists"]
+
+
+def test_match_benchmark_reports_items_per_scale():
+    results = bench_match(rounds=1)
+
+    assert results["match/fixture"]["items"] == 40
+    assert results["match/10000"]["items"] == 10_000
+
+
+def test_compare_reports_relative_change():
+    baseline = {"results": {"parse/dong/fixture": {"median_ms": 10}}}
+    current = {
+        "results": {
+            "parse/dong/fixture": {"median_ms": 12},
+            "parse/rude/fixture": {"median_ms": 5},
+        }
+    }
+
+    assert compare(baseline, current) == {"parse/dong/fixture": 20}
+
+
+def test_output_sizes_compare_v1_and_v2():
+    sizes = output_sizes()
+
+    assert sizes["output/fixture"]["items"] == 40
+    assert sizes["output/1000"]["v2_bytes"] < sizes["output/1000"]["v1_bytes"]
@@ -0,0 +1,55 @@
+import os
+import threading
+
+import pytest
+
+from benchmarks.bench_extract import read_fixture
+from src.executor import Executor, ExecutorKind
+from src.festivals.parsers import parse_dong
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_inline_executor_runs_on_event_loop_thread():
+    executor = Executor(kind=ExecutorKind.INLINE)
+
+    assert await executor.run(_thread_name) == threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_runs_off_event_loop_thread():
+    executor = Executor(kind=ExecutorKind.THREAD, max_workers=1)
+
+    try:
+        assert await executor.run(_thread_name) != threading.current_thread().name
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_executor_parses_in_worker_process():
+    executor = Executor(kind=ExecutorKind.PROCESS, max_workers=2)
+    body = read_fixture("dong.html")
+
+    try:
+        assert await executor.run(os.getpid) != os.getpid()
+        assert await executor.run(parse_dong, body) == parse_dong(body)
+    finally:
+        executor.shutdown()
+
+
+def test_executor_reads_configuration_from_env(monkeypatch):
+    monkeypatch.setenv("EXECUTOR_KIND", "process")
+    monkeypatch.setenv("EXECUTOR_MAX_WORKERS", "4")
+
+    executor = Executor.from_env()
+
+    assert executor.kind == ExecutorKind.PROCESS
+    assert executor.max_workers == 4
+
+
+def test_executor_defaults_to_thread_pool():
+    assert Executor.from_env().kind == ExecutorKind.THREAD
@@ -1,13 +1,18 @@
 import json
 import os
 import re
+from unittest.mock import Mock
 
 import boto3
 import pytest
 from moto import mock_aws
 from mypy_boto3_s3 import S3Client
 
-from handler import handler
+from handler import _fan_out, handler
+from simulator.images import png
+from src.adapter.http_recording import read_cassette
+from src.adapter.invoker import LocalInvoker
+from src.festivals.run_request import RunRequest
 
 
 @pytest.fixture
@@ -69,12 +74,6 @@ def test_get_bands_handler_gets_artists_and_images_and_uploads_them(
     #     status_code=200,
     #     text="<div class='cb-article-meta'><h2><a>Bloodbath (SWE)</a></h2></div>",
     # )
-    httpx_mock.add_response(
-        method="POST",
-        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
-        status_code=201,
-        is_reusable=True,
-    )
     httpx_mock.add_response(
         method="POST",
         url=spotify_token_endpoint,
@@ -143,3 +142,809 @@ def test_get_bands_handler_gets_artists_and_images_and_uploads_them(
     assert wacken_expected_result == json.load(wacken_file.get("Body"))
     assert dong_expected_result == json.load(dong_file.get("Body"))
     assert rude_expected_result == json.load(rude_file.get("Body"))
+    assert not any(
+        request.method == "POST" and request.url.host == "api.github.com"
+        for request in httpx_mock.get_requests()
+    )
+
+
+def _create_aws_resources() -> S3Client:
+    s3_client: S3Client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    ssm_client = boto3.client("ssm", "eu-west-1")
+    for name, value in [
+        ("/spotify/client-id", "value1"),
+        ("/spotify/client-secret", "value2"),
+        ("/github/festival-scraper/pr-token", "value3"),
+    ]:
+        ssm_client.put_parameter(Name=name, Value=value, Type="SecureString")
+    return s3_client
+
+
+def _mock_festival_and_service_responses(httpx_mock):
+    httpx_mock.add_response(
+        method="POST",
+        url="https://accounts.spotify.com/api/token",
+        json={"access_token": "token", "token_type": "bearer", "expires_in": 3600},
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
+        json=[],
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://www.wacken.com/fileadmin/Json/bandlist-concert.json",
+        json=[{"artist": {"title": "Bloodbath"}}],
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://www.dongopenair.de/bands/",
+        text="<a href='https://www.dongopenair.de/band-details/?band=Bloodbath'>Bloodbath</a>",
+        is_reusable=True,
+    )
+
+
+def _festival_summary(summary: dict) -> dict:
+    return {key: value for key, value in summary.items() if not key.startswith("http")}
+
+
+def _mock_bloodbath_search(httpx_mock):
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(r"https://api\.spotify\.com/v1/search\?type=artist&q=.*"),
+        json={
+            "artists": {
+                "items": [
+                    {
+                        "id": "RandomSpotifyId",
+                        "genres": ["Swedish Death Metal"],
+                        "images": [
+                            {
+                                "height": 320,
+                                "url": "https://image_320.com",
+                                "width": 320,
+                            }
+                        ],
+                        "name": "Bloodbath",
+                    }
+                ]
+            }
+        },
+        is_reusable=True,
+    )
+
+
+@mock_aws
+def test_handler_publishes_checkpointed_artists_when_deadline_is_reached(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    s3_client = _create_aws_resources()
+    s3_client.put_object(
+        Bucket="bucket-name",
+        Key="checkpoints/wacken.json",
+        Body=json.dumps(
+            {
+                "festival": "wacken",
+                "artists": {
+                    "Bloodbath": {
+                        "id": "RandomSpotifyId",
+                        "artist": "Bloodbath",
+                        "image": "https://image_320.com",
+                    }
+                },
+            }
+        ),
+    )
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = 1_000
+
+    handler(None, context)
+
+    wacken_file = s3_client.get_object(Bucket="bucket-name", Key="wacken.json")
+    dong_file = s3_client.get_object(Bucket="bucket-name", Key="dong.json")
+    dong_checkpoint = s3_client.get_object(
+        Bucket="bucket-name", Key="checkpoints/dong.json"
+    )
+    assert json.load(wacken_file["Body"]) == [
+        {
+            "id": "RandomSpotifyId",
+            "artist": "Bloodbath",
+            "image": "https://image_320.com",
+        }
+    ]
+    assert json.load(dong_file["Body"]) == []
+    assert json.load(dong_checkpoint["Body"])["artists"] == {}
+    assert not any(
+        request.url.host == "api.spotify.com" for request in httpx_mock.get_requests()
+    )
+
+
+@mock_aws
+def test_handler_only_scrapes_festivals_selected_by_event(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    httpx_mock.add_response(
+        method="POST",
+        url="https://accounts.spotify.com/api/token",
+        json={"access_token": "token", "token_type": "bearer", "expires_in": 3600},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
+        json=[],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://www.wacken.com/fileadmin/Json/bandlist-concert.json",
+        json=[{"artist": {"title": "Bloodbath"}}],
+    )
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken"], "mode": "incremental"}, None)
+
+    assert _festival_summary(summary) == {"wacken": {"artists": 1}}
+    keys = [
+        o["Key"] for o in s3_client.list_objects_v2(Bucket="bucket-name")["Contents"]
+    ]
+    assert sorted(key for key in keys if not key.startswith("objects/")) == [
+        "artist-festivals.json",
+        "artists.json",
+        "changes/wacken/1.json",
+        "checkpoints/wacken.json",
+        "history/wacken.json",
+        "lineups/wacken.json",
+        "manifest.json",
+        "retry-queue/wacken.json",
+        "wacken.json",
+    ]
+    assert len([key for key in keys if key.startswith("objects/")]) == 1
+
+
+@mock_aws
+def test_fan_out_invokes_one_run_per_festival(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+    invoker = LocalInvoker(handler=handler)
+    run_request = RunRequest.from_event(
+        {"festivals": ["wacken", "dong"], "mode": "full", "fan_out": True}
+    )
+
+    summary = _fan_out(run_request=run_request, invoker=invoker)
+
+    assert invoker.payloads == [
+        {"festivals": ["wacken"], "mode": "full"},
+        {"festivals": ["dong"], "mode": "full"},
+    ]
+    assert {f: _festival_summary(s) for f, s in summary.items()} == {
+        "wacken": {"wacken": {"artists": 1}},
+        "dong": {"dong": {"artists": 1}},
+    }
+    dong_file = s3_client.get_object(Bucket="bucket-name", Key="dong.json")
+    assert json.load(dong_file["Body"]) == [
+        {
+            "id": "RandomSpotifyId",
+            "artist": "Bloodbath",
+            "image": "https://image_320.com",
+        }
+    ]
+
+
+@mock_aws
+def test_handler_skips_festivals_with_unchanged_lineup(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    _create_aws_resources()
+
+    event = {"festivals": ["wacken", "dong"]}
+
+    assert _festival_summary(handler(event, None)) == {
+        "wacken": {"artists": 1},
+        "dong": {"artists": 1},
+    }
+    requests_after_first_run = len(httpx_mock.get_requests())
+    assert _festival_summary(handler(event, None)) == {
+        "wacken": {"artists": 1, "skipped": "unchanged"},
+        "dong": {"artists": 1, "skipped": "unchanged"},
+    }
+
+    second_run_hosts = [
+        request.url.host
+        for request in httpx_mock.get_requests()[requests_after_first_run:]
+    ]
+    assert "api.spotify.com" not in second_run_hosts
+    assert _festival_summary(handler({**event, "force": True}, None)) == {
+        "wacken": {"artists": 1},
+        "dong": {"artists": 1},
+    }
+
+
+@mock_aws
+def test_handler_queues_failed_lookups_instead_of_failing_the_run(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(r"https://api\.spotify\.com/v1/search\?type=artist&q=.*"),
+        status_code=503,
+        json={"error": {"status": 503}},
+        is_reusable=True,
+    )
+    s3_client = _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert _festival_summary(summary) == {
+        "wacken": {"artists": 0, "retry_queue": 1},
+        "dong": {"artists": 0, "retry_queue": 1},
+    }
+    retry_queue = s3_client.get_object(
+        Bucket="bucket-name", Key="retry-queue/wacken.json"
+    )
+    assert json.load(retry_queue["Body"])["entries"]["Bloodbath"]["attempts"] == 1
+
+
+@mock_aws
+def test_handler_queues_lookups_throttled_with_non_json_bodies(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(r"https://api\.spotify\.com/v1/search\?type=artist&q=.*"),
+        status_code=429,
+        text="<html>Too Many Requests</html>",
+        is_reusable=True,
+    )
+    _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert _festival_summary(summary) == {
+        "wacken": {"artists": 0, "retry_queue": 1},
+        "dong": {"artists": 0, "retry_queue": 1},
+    }
+
+
+@mock_aws
+def test_handler_isolates_festivals_that_fail(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch
+):
+    import handler as handler_module
+
+    resolve_festival = handler_module._resolve_festival
+
+    async def fail_for_dong(*, source, **kwargs):
+        result = await resolve_festival(source=source, **kwargs)
+        if source.name == "dong":
+            raise RuntimeError("parser broke")
+        return result
+
+    monkeypatch.setattr(handler_module, "_resolve_festival", fail_for_dong)
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert _festival_summary(summary) == {
+        "wacken": {"artists": 1},
+        "dong": {"failed": True},
+    }
+    keys = [
+        item["Key"]
+        for item in s3_client.list_objects_v2(Bucket="bucket-name")["Contents"]
+    ]
+    assert "wacken.json" in keys
+    assert "dong.json" not in keys
+
+
+@mock_aws
+def test_handler_keeps_previous_outputs_when_lineup_fetch_fails(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    httpx_mock.add_response(
+        method="POST",
+        url="https://accounts.spotify.com/api/token",
+        json={"access_token": "token", "token_type": "bearer", "expires_in": 3600},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
+        json=[],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://www.wacken.com/fileadmin/Json/bandlist-concert.json",
+        status_code=503,
+    )
+    s3_client = _create_aws_resources()
+    published = json.dumps(
+        [{"id": "RandomSpotifyId", "artist": "Bloodbath", "image": None}]
+    )
+    s3_client.put_object(Bucket="bucket-name", Key="wacken.json", Body=published)
+
+    summary = handler({"festivals": ["wacken"]}, None)
+
+    assert _festival_summary(summary) == {"wacken": {"failed": True}}
+    wacken_file = s3_client.get_object(Bucket="bucket-name", Key="wacken.json")
+    assert wacken_file["Body"].read().decode() == published
+    keys = [
+        item["Key"]
+        for item in s3_client.list_objects_v2(Bucket="bucket-name")["Contents"]
+    ]
+    assert keys == ["wacken.json"]
+
+
+@mock_aws
+def test_handler_keeps_last_published_artists_when_spotify_is_down(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(r"https://api\.spotify\.com/v1/search\?type=artist&q=.*"),
+        status_code=503,
+        json={"error": {"status": 503}},
+        is_reusable=True,
+    )
+    s3_client = _create_aws_resources()
+    published = {
+        "id": "RandomSpotifyId",
+        "artist": "Bloodbath",
+        "image": "https://image_320.com",
+    }
+    s3_client.put_object(
+        Bucket="bucket-name", Key="wacken.json", Body=json.dumps([published])
+    )
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert summary["wacken"] == {"artists": 1, "stale": 1, "retry_queue": 1}
+    wacken_file = s3_client.get_object(Bucket="bucket-name", Key="wacken.json")
+    assert json.load(wacken_file["Body"]) == [{**published, "stale": True}]
+
+
+@mock_aws
+def test_handler_emits_stage_metrics(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch, capsys
+):
+    monkeypatch.setenv("METRICS_SINK", "emf")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    documents = {
+        document["Festival"]: document
+        for document in map(json.loads, capsys.readouterr().out.splitlines())
+    }
+    wacken = documents["wacken"]
+    for name in [
+        "FestivalDuration",
+        "FetchDuration",
+        "ParseDuration",
+        "SpotifySearchDuration",
+        "UploadDuration",
+    ]:
+        assert len(wacken[name]) == 1
+    assert wacken["SpotifySearches"] == 1
+    assert wacken["PublishedArtists"] == 1
+    assert len(documents["all"]["GitHubDuration"]) == 1
+
+
+@mock_aws
+def test_handler_reports_http_stats_per_host(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert sorted(summary["http"]) == [
+        "accounts.spotify.com",
+        "api.github.com",
+        "api.spotify.com",
+        "www.dongopenair.de",
+        "www.wacken.com",
+    ]
+    spotify = summary["http"]["api.spotify.com"]
+    assert spotify["requests"] == 1
+    assert spotify["status_codes"] == {"200": 1}
+    assert list(spotify["endpoints"]) == ["GET /v1/search"]
+    assert sum(spotify["latency_ms"]["histogram"].values()) == 1
+
+
+@mock_aws
+def test_handler_publishes_deduplicated_artist_catalog(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    def read(key):
+        body = s3_client.get_object(Bucket="bucket-name", Key=key)["Body"].read()
+        return json.loads(body)
+
+    assert read("artists.json") == {
+        "RandomSpotifyId": {"artist": "Bloodbath", "image": "https://image_320.com"}
+    }
+    assert read("artist-festivals.json") == {"RandomSpotifyId": ["dong", "wacken"]}
+    assert read("lineups/wacken.json") == {
+        "festival": "wacken",
+        "artists": ["RandomSpotifyId"],
+    }
+    searches = [r for r in httpx_mock.get_requests() if r.url.host == "api.spotify.com"]
+    assert len(searches) == 1
+
+
+@mock_aws
+def test_handler_publishes_v2_output_when_enabled(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch
+):
+    monkeypatch.setenv("OUTPUT_VERSIONS", "v1,v2")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    body = s3_client.get_object(Bucket="bucket-name", Key="v2/wacken.json")["Body"]
+    assert json.loads(body.read()) == {
+        "v": 2,
+        "p": "https://i.scdn.co/image/",
+        "i": ["RandomSpotifyId"],
+        "a": ["Bloodbath"],
+        "m": ["https://image_320.com"],
+    }
+    assert s3_client.get_object(Bucket="bucket-name", Key="wacken.json")
+
+
+@mock_aws
+def test_handler_publishes_content_addressed_objects_and_manifest(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    manifest = s3_client.get_object(Bucket="bucket-name", Key="manifest.json")
+    assert manifest["CacheControl"] == "public, max-age=60"
+    entry = json.loads(manifest["Body"].read())["festivals"]["wacken"]
+    assert entry["artists"] == 1
+    assert entry["key"] == f"objects/{entry['hash']}.json"
+    published = s3_client.get_object(Bucket="bucket-name", Key=entry["key"])
+    assert published["CacheControl"] == "public, max-age=31536000, immutable"
+    wacken = s3_client.get_object(Bucket="bucket-name", Key="wacken.json")
+    assert published["Body"].read() == wacken["Body"].read()
+
+
+@mock_aws
+def test_handler_publishes_lineup_changes_and_notifies(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch, tmp_path
+):
+    notifications = tmp_path / "changes.jsonl"
+    monkeypatch.setenv("CHANGE_NOTIFIER", f"file:{notifications}")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+    s3_client.put_object(
+        Bucket="bucket-name",
+        Key="wacken.json",
+        Body=json.dumps([{"id": "OldId", "artist": "Horn", "image": None}]),
+    )
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    change = s3_client.get_object(Bucket="bucket-name", Key="changes/wacken/1.json")
+    assert json.loads(change["Body"].read()) | {"created_at": None} == {
+        "festival": "wacken",
+        "sequence": 1,
+        "created_at": None,
+        "added": [
+            {
+                "id": "RandomSpotifyId",
+                "artist": "Bloodbath",
+                "image": "https://image_320.com",
+            }
+        ],
+    }
+    manifest = s3_client.get_object(Bucket="bucket-name", Key="manifest.json")
+    assert json.loads(manifest["Body"].read())["festivals"]["wacken"]["sequence"] == 1
+    notified = [json.loads(line) for line in notifications.read_text().splitlines()]
+    assert sorted((n["festival"], n["sequence"]) for n in notified) == [
+        ("dong", 1),
+        ("wacken", 1),
+    ]
+
+
+class FailingNotifier:
+    def notify(self, change):
+        raise RuntimeError("SNS is unavailable")
+
+
+@mock_aws
+def test_handler_keeps_the_change_feed_gapless_when_notifying_fails(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch
+):
+    monkeypatch.setattr("handler.notifier_from_env", FailingNotifier)
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    manifest = s3_client.get_object(Bucket="bucket-name", Key="manifest.json")
+    festivals = json.loads(manifest["Body"].read())["festivals"]
+    for festival in ["wacken", "dong"]:
+        assert festivals[festival]["sequence"] == 1
+        assert s3_client.get_object(
+            Bucket="bucket-name", Key=f"changes/{festival}/1.json"
+        )
+    assert s3_client.get_object(Bucket="bucket-name", Key="artists.json")
+
+
+@mock_aws
+def test_handler_does_not_advertise_changes_that_failed_to_upload(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch
+):
+    def fail(*args, **kwargs):
+        raise RuntimeError("S3 is unavailable")
+
+    monkeypatch.setattr("handler.ChangeFeed.write", fail)
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    manifest = s3_client.get_object(Bucket="bucket-name", Key="manifest.json")
+    festivals = json.loads(manifest["Body"].read())["festivals"]
+    assert festivals["wacken"]["sequence"] == 0
+    assert festivals["wacken"]["artists"] == 1
+    assert s3_client.get_object(Bucket="bucket-name", Key="artists.json")
+
+
+@mock_aws
+def test_handler_records_when_artists_were_first_and_last_seen(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    body = s3_client.get_object(Bucket="bucket-name", Key="history/wacken.json")["Body"]
+    history = json.loads(body.read())
+    seen = history["artists"]["bloodbath"]
+    assert seen["artist"] == "Bloodbath"
+    assert seen["id"] == "RandomSpotifyId"
+    assert seen["first_seen"] == seen["last_seen"]
+    assert "removed_at" not in seen
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert summary["wacken"]["skipped"] == "unchanged"
+    body = s3_client.get_object(Bucket="bucket-name", Key="history/wacken.json")["Body"]
+    skipped = json.loads(body.read())["artists"]["bloodbath"]
+    assert skipped["first_seen"] == seen["first_seen"]
+    assert skipped["last_seen"] > seen["last_seen"]
+    assert "removed_at" not in skipped
+
+
+@mock_aws
+def test_handler_records_history_of_artists_whose_lookup_failed(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    _mock_festival_and_service_responses(httpx_mock)
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(r"https://api\.spotify\.com/v1/search\?type=artist&q=.*"),
+        json={"artists": {"items": []}},
+        is_reusable=True,
+    )
+    s3_client = _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert summary["wacken"]["artists"] == 0
+    body = s3_client.get_object(Bucket="bucket-name", Key="history/wacken.json")["Body"]
+    seen = json.loads(body.read())["artists"]["bloodbath"]
+    assert seen["artist"] == "Bloodbath"
+    assert "id" not in seen
+    assert "removed_at" not in seen
+
+
+@mock_aws
+def test_handler_publishes_timetable_of_festivals_with_running_order(
+    spotify_envs, github_envs, setup_env, httpx_mock
+):
+    httpx_mock.add_response(
+        method="POST",
+        url="https://accounts.spotify.com/api/token",
+        json={"access_token": "token", "token_type": "bearer", "expires_in": 3600},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
+        json=[],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://www.dongopenair.de/bands/",
+        text="""
+            <p>Freitag</p>
+            <a href="https://www.dongopenair.de/band-details/?band=Bloodbath"><div>20:00</div> Bloodbath</a>
+            <a href="https://www.dongopenair.de/band-details/?band=Bloodbath">Bloodbath</a>
+        """,
+    )
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    handler({"festivals": ["dong"]}, None)
+
+    body = s3_client.get_object(Bucket="bucket-name", Key="timetables/dong.json")
+    assert json.loads(body["Body"].read()) == {
+        "festival": "dong",
+        "slots": [
+            {"artist": "Bloodbath", "day": "Freitag", "start": "20:00", "end": "21:00"}
+        ],
+        "index": {"Freitag": {"bounds": [1200, 1260], "playing": [[0]]}},
+    }
+
+
+@mock_aws
+def test_handler_skips_timetables_when_disabled(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch
+):
+    monkeypatch.setenv("TIMETABLES", "0")
+    httpx_mock.add_response(
+        method="POST",
+        url="https://accounts.spotify.com/api/token",
+        json={"access_token": "token", "token_type": "bearer", "expires_in": 3600},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://api.github.com/repos/kruspe/festival-scraper/issues",
+        json=[],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://www.dongopenair.de/bands/",
+        text="""
+            <p>Freitag</p>
+            <a href="https://www.dongopenair.de/band-details/?band=Bloodbath"><div>20:00</div> Bloodbath</a>
+            <a href="https://www.dongopenair.de/band-details/?band=Bloodbath">Bloodbath</a>
+        """,
+    )
+    _mock_bloodbath_search(httpx_mock)
+    s3_client = _create_aws_resources()
+
+    summary = handler({"festivals": ["dong"]}, None)
+
+    assert summary["dong"]["artists"] == 1
+    objects = s3_client.list_objects_v2(Bucket="bucket-name", Prefix="timetables/")
+    assert "Contents" not in objects
+
+
+@mock_aws
+def test_handler_mirrors_artist_images_when_enabled(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch
+):
+    monkeypatch.setenv("IMAGE_MIRROR", "s3")
+    monkeypatch.setenv("IMAGE_MIRROR_EXECUTOR_KIND", "inline")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    httpx_mock.add_response(
+        method="GET",
+        url="https://image_320.com",
+        content=png(width=320, height=320, color=(0, 0, 0)),
+        headers={"Content-Type": "image/png"},
+    )
+    s3_client = _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"]}, None)
+
+    assert summary["images"] == {
+        "downloaded": 1,
+        "unchanged": 0,
+        "deduplicated": 0,
+        "failed": 0,
+        "skipped": 0,
+    }
+    body = s3_client.get_object(Bucket="bucket-name", Key="images/index.json")["Body"]
+    entry = json.loads(body.read())["RandomSpotifyId"]
+    assert entry["source"] == "https://image_320.com"
+    assert s3_client.get_object(Bucket="bucket-name", Key=entry["variants"]["160"])
+
+
+@mock_aws
+def test_handler_exports_trace_spans(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch, tmp_path
+):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("TRACE_EXPORTER", f"file:{trace_file}")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    _create_aws_resources()
+
+    handler({"festivals": ["wacken", "dong"]}, None)
+
+    document = json.loads(trace_file.read_text())
+    spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_id = {s["spanId"]: s for s in spans}
+
+    def parent_name(s):
+        return by_id[s["parentSpanId"]]["name"]
+
+    search = next(s for s in spans if s["name"] == "search_artist")
+    assert parent_name(search) == "festival"
+    assert {"key": "artist.outcome", "value": {"stringValue": "found"}} in search[
+        "attributes"
+    ]
+    spotify = next(s for s in spans if s["name"] == "GET api.spotify.com")
+    assert by_id[spotify["parentSpanId"]] == search
+    festival = next(s for s in spans if s["name"] == "festival")
+    assert parent_name(festival) == "run"
+    assert any(s["name"] == "s3.put" and parent_name(s) == "run" for s in spans)
+
+
+@mock_aws
+def test_handler_profiles_run_when_requested_by_event(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch, tmp_path
+):
+    monkeypatch.setenv("PROFILE_OUTPUT", f"dir:{tmp_path}")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    _create_aws_resources()
+
+    summary = handler({"festivals": ["wacken", "dong"], "profile": True}, None)
+
+    assert _festival_summary(summary)["wacken"] == {"artists": 1}
+    reports = list(tmp_path.glob("*-wacken-dong.json"))
+    assert len(reports) == 1
+    assert json.loads(reports[0].read_text())["wall_seconds"] > 0
+    assert len(list(tmp_path.glob("*-wacken-dong.prof"))) == 1
+
+
+@mock_aws
+def test_handler_replays_recorded_run(
+    spotify_envs, github_envs, setup_env, httpx_mock, monkeypatch, tmp_path
+):
+    cassette = tmp_path / "run.jsonl.gz"
+    monkeypatch.setenv("HTTP_CASSETTE", f"record:{cassette}")
+    _mock_festival_and_service_responses(httpx_mock)
+    _mock_bloodbath_search(httpx_mock)
+    _create_aws_resources()
+
+    recorded = handler({"festivals": ["wacken", "dong"]}, None)
+
+    monkeypatch.setenv("HTTP_CASSETTE", f"replay:{cassette}")
+    replayed = handler({"festivals": ["wacken", "dong"], "force": True}, None)
+
+    assert cassette.exists()
+    assert _festival_summary(replayed) == _festival_summary(recorded)
+    assert len(httpx_mock.get_requests()) == len(read_cassette(cassette.read_bytes()))
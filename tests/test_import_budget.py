@@ -0,0 +1,28 @@
+import os
+
+from scripts.import_profile import (
+    LAZY_MODULES,
+    MODULE_BUDGET,
+    fastest_import,
+    profile_import,
+    time_budget_ms,
+)
+
+# Wall-clock time varies between runs and machines, so the test takes the fastest
+# of several cold imports and allows twice the budget unless it is set explicitly
+TIME_HEADROOM = 1 if "IMPORT_TIME_BUDGET_MS" in os.environ else 2
+
+
+def test_handler_cold_import_stays_within_budget():
+    profile = fastest_import("handler", rounds=3)
+
+    assert "handler" in profile.loaded_modules
+    assert profile.cumulative_ms < time_budget_ms() * TIME_HEADROOM
+    assert len(profile.loaded_modules) < MODULE_BUDGET
+
+
+def test_handler_does_not_import_heavy_dependencies_eagerly():
+    profile = profile_import("handler")
+
+    for module in LAZY_MODULES:
+        assert module not in profile.loaded_modules
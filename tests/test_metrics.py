@@ -0,0 +1,97 @@
+import io
+import json
+
+import pytest
+
+from src.metrics import EmfSink, JsonSink, Metrics, current_metrics
+from tests.helpers import Clock
+
+
+def test_metrics_records_timings_and_counters_per_festival():
+    clock = Clock()
+    metrics = Metrics(clock=clock)
+
+    with metrics.timer("FetchDuration", festival="wacken"):
+        clock.now += 0.25
+    metrics.increment("SpotifySearches", festival="wacken")
+    metrics.increment("SpotifySearches", 2, festival="wacken")
+    metrics.increment("SpotifyThrottles")
+
+    assert metrics.metric_sets["wacken"].to_dict() == {
+        "timings": {"FetchDuration": {"count": 1, "total_ms": 250.0, "max_ms": 250.0}},
+        "counters": {"SpotifySearches": 3},
+    }
+    assert metrics.metric_sets["all"].counters == {"SpotifyThrottles": 1}
+
+
+def test_metrics_timer_records_failed_stages():
+    metrics = Metrics(clock=Clock())
+
+    with pytest.raises(ValueError), metrics.timer("ParseDuration"):
+        raise ValueError()
+
+    assert metrics.metric_sets["all"].timings["ParseDuration"].values_ms == [0]
+
+
+def test_emf_sink_writes_one_document_per_festival():
+    stream = io.StringIO()
+    metrics = Metrics(sink=EmfSink(stream=stream))
+    metrics.record("SpotifySearchDuration", 12.5, festival="wacken")
+    metrics.record("SpotifySearchDuration", 7.5, festival="wacken")
+    metrics.increment("SpotifySearches", 2, festival="wacken")
+    metrics.increment("HttpCacheHits", 0)
+
+    metrics.flush()
+
+    documents = [json.loads(line) for line in stream.getvalue().splitlines()]
+    wacken = documents[0]
+    assert wacken["Festival"] == "wacken"
+    assert wacken["SpotifySearchDuration"] == [12.5, 7.5]
+    assert wacken["SpotifySearches"] == 2
+    assert wacken["_aws"]["CloudWatchMetrics"] == [
+        {
+            "Namespace": "FestivalScraper",
+            "Dimensions": [["Festival"]],
+            "Metrics": [
+                {"Name": "SpotifySearchDuration", "Unit": "Milliseconds"},
+                {"Name": "SpotifySearches", "Unit": "Count"},
+            ],
+        }
+    ]
+    assert documents[1]["Festival"] == "all"
+    assert metrics.metric_sets == {}
+
+
+def test_json_sink_writes_a_single_summary_line():
+    stream = io.StringIO()
+    metrics = Metrics(sink=JsonSink(stream=stream))
+    metrics.record("UploadDuration", 3, festival="dong")
+
+    metrics.flush()
+
+    assert json.loads(stream.getvalue())["metrics"] == {
+        "dong": {
+            "timings": {"UploadDuration": {"count": 1, "total_ms": 3, "max_ms": 3}},
+            "counters": {},
+        }
+    }
+
+
+def test_metrics_from_env(monkeypatch):
+    monkeypatch.setenv("METRICS_SINK", "emf")
+    assert isinstance(Metrics.from_env().sink, EmfSink)
+    monkeypatch.setenv("METRICS_SINK", "json")
+    assert isinstance(Metrics.from_env().sink, JsonSink)
+    monkeypatch.setenv("METRICS_SINK", "none")
+    assert Metrics.from_env().sink is None
+
+
+def test_activate_makes_metrics_current():
+    metrics = Metrics()
+    current_metrics().increment("Outside")
+
+    with metrics.activate():
+        assert current_metrics() is metrics
+
+    assert current_metrics() is not metrics
+    assert current_metrics().metric_sets == {}
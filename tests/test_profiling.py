@@ -0,0 +1,103 @@
+import asyncio
+import json
+import marshal
+import pstats
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from src.adapter.s3 import S3
+from src.profiling import (
+    DirectoryProfileWriter,
+    RunProfiler,
+    S3ProfileWriter,
+    profile_name,
+    profile_writer_from_env,
+)
+
+
+def _block_event_loop():
+    time.sleep(0.05)
+
+
+async def _run() -> str:
+    data = [bytearray(1024) for _ in range(1024)]
+    await asyncio.sleep(0.01)
+    _block_event_loop()
+    await asyncio.sleep(0.01)
+    return f"{len(data)} blocks"
+
+
+def test_run_profiler_records_wall_cpu_memory_and_loop_lag():
+    profiler = RunProfiler(name="test", lag_interval=0.001)
+
+    assert profiler.run(_run()) == "1024 blocks"
+
+    profile = profiler.profile.to_dict()
+    assert profile["wall_seconds"] >= 0.07
+    assert profile["cpu_seconds"] >= 0
+    assert profile["peak_memory_bytes"] >= 1024 * 1024
+    assert profile["loop_lag"]["max_ms"] >= 40
+    assert any("_block_event_loop" in f["function"] for f in profile["top_functions"])
+
+
+def test_run_profiler_keeps_profile_when_run_fails():
+    async def fail():
+        raise ValueError()
+
+    profiler = RunProfiler(name="test")
+
+    with pytest.raises(ValueError):
+        profiler.run(fail())
+
+    assert profiler.profile is not None
+
+
+def test_directory_writer_writes_report_and_pstats(tmp_path):
+    profiler = RunProfiler(name="wacken")
+    profiler.run(_run())
+
+    path = DirectoryProfileWriter(directory=str(tmp_path / "profiles")).write(
+        profiler.profile
+    )
+
+    with open(f"{path}.json") as f:
+        assert json.load(f)["name"] == "wacken"
+    assert pstats.Stats(f"{path}.prof").total_calls > 0
+
+
+@mock_aws
+def test_s3_writer_uploads_report_and_pstats():
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(
+        Bucket="bucket-name",
+        CreateBucketConfiguration={"LocationConstraint": "eu-west-1"},
+    )
+    profiler = RunProfiler(name="wacken")
+    profiler.run(_run())
+
+    location = S3ProfileWriter(s3=S3(s3_client), bucket_name="bucket-name").write(
+        profiler.profile
+    )
+
+    assert location == "s3://bucket-name/profiles/wacken"
+    report = s3_client.get_object(Bucket="bucket-name", Key="profiles/wacken.json")
+    assert json.load(report["Body"])["name"] == "wacken"
+    stats = s3_client.get_object(Bucket="bucket-name", Key="profiles/wacken.prof")
+    assert marshal.loads(stats["Body"].read()) == profiler.profile.stats
+
+
+def test_profile_writer_from_env(monkeypatch, tmp_path):
+    assert isinstance(profile_writer_from_env(s3=None), DirectoryProfileWriter)
+    monkeypatch.setenv("PROFILE_OUTPUT", "s3")
+    monkeypatch.setenv("FESTIVAL_ARTISTS_BUCKET", "bucket-name")
+    assert isinstance(profile_writer_from_env(s3=None), S3ProfileWriter)
+    monkeypatch.setenv("PROFILE_OUTPUT", "stdout")
+    with pytest.raises(ValueError):
+        profile_writer_from_env(s3=None)
+
+
+def test_profile_name_contains_festivals():
+    assert profile_name(festivals=["wacken", "dong"]).endswith("Z-wacken-dong")
@@ -0,0 +1,48 @@
+from scripts.rematch import rematch
+from src.adapter.search_archive import ArchivedSearch
+
+
+def _search(*, query: str, candidate: str, selected: dict) -> ArchivedSearch:
+    return ArchivedSearch(
+        query=query,
+        market="DE",
+        searched_at=0,
+        response={
+            "artists": {
+                "items": [
+                    {
+                        "id": f"{candidate}Id",
+                        "name": candidate,
+                        "genres": ["death metal"],
+                        "images": [{"height": 640, "width": 640, "url": "image"}],
+                    }
+                ]
+            }
+        },
+        selected=selected,
+    )
+
+
+def test_rematch_reports_searches_whose_selection_changes():
+    unchanged = _search(
+        query="Horn",
+        candidate="Horn",
+        selected={"id": "HornId", "name": "Horn", "image_url": "image"},
+    )
+    changed = _search(
+        query="Apep",
+        candidate="Apep",
+        selected={"id": None, "name": "Apep", "image_url": None},
+    )
+
+    count, changes = rematch([unchanged, changed], genres=["Metal"])
+
+    assert count == 2
+    assert [change.to_dict() for change in changes] == [
+        {
+            "query": "Apep",
+            "market": "DE",
+            "before": {"id": None, "name": "Apep", "image_url": None},
+            "after": {"id": "ApepId", "name": "Apep", "image_url": "image"},
+        }
+    ]
@@ -0,0 +1,168 @@
+import random
+
+import httpx
+import pytest
+
+from benchmarks.bench_pipeline import unthrottled_sources
+from simulator.dataset import Dataset
+from simulator.drive import drive
+from simulator.faults import (
+    Distribution,
+    FaultProfile,
+    Latency,
+    RateLimit,
+    TokenBucket,
+)
+from simulator.server import SimulatorServer, base_urls
+from simulator.service import Simulator
+from src.adapter.http import HttpStack
+
+
+@pytest.fixture
+def simulator_envs(monkeypatch, spotify_envs, github_envs):
+    for name in base_urls("http://simulator"):
+        monkeypatch.setenv(name, "")
+
+
+def _client(simulator: Simulator) -> httpx.Client:
+    return httpx.Client(transport=simulator.transport(), base_url="http://simulator")
+
+
+def test_simulator_serves_lineups_searches_and_issues():
+    simulator = Simulator(dataset=Dataset.synthetic(artists=3))
+    client = _client(simulator)
+
+    token = client.post("/accounts/api/token", content="grant_type=client_credentials")
+    lineup = client.get("/festivals/dong")
+    search = client.get("/spotify/v1/search", params={"q": "Synthetic Band 00001"})
+    created = client.post(
+        "/github/repos/kruspe/festival-scraper/issues", json={"title": "Search"}
+    )
+    closed = client.patch(
+        "/github/repos/kruspe/festival-scraper/issues/1", json={"state": "closed"}
+    )
+    issues = client.get("/github/repos/kruspe/festival-scraper/issues")
+
+    assert token.json()["access_token"] == "simulated"
+    assert "Synthetic Band 00002" in lineup.text
+    assert search.json()["artists"]["items"][-1]["name"] == "Synthetic Band 00001"
+    assert created.status_code == 201
+    assert closed.status_code == 200
+    assert issues.json() == [{"number": 1, "state": "closed", "title": "Search"}]
+    assert client.get("/festivals/unknown").status_code == 404
+    assert simulator.stats_dict()["github"]["requests"] == 3
+
+
+def test_simulator_injects_errors_and_throttles():
+    simulator = Simulator(
+        dataset=Dataset.synthetic(artists=1),
+        faults=FaultProfile.from_dict(
+            {"spotify": {"error_rate": 1}, "festivals": {"throttle_rate": 1}}
+        ),
+    )
+    client = _client(simulator)
+
+    search = client.get("/spotify/v1/search", params={"q": "Synthetic Band 00000"})
+    lineup = client.get("/festivals/wacken")
+
+    assert search.status_code == 503
+    assert lineup.status_code == 429
+    assert lineup.headers["Retry-After"] == "1"
+    assert simulator.stats_dict()["spotify"]["injected"] == {"errors": 1}
+    assert simulator.stats_dict()["festivals"]["injected"] == {"throttled": 1}
+
+
+def test_token_bucket_limits_requests_per_second():
+    now = [0.0]
+    bucket = TokenBucket(
+        rate_limit=RateLimit(per_second=2, burst=2), clock=lambda: now[0]
+    )
+
+    assert bucket.acquire() is None
+    assert bucket.acquire() is None
+    assert bucket.acquire() == 0.5
+    now[0] = 0.5
+    assert bucket.acquire() is None
+
+
+def test_latency_is_sampled_from_the_distribution():
+    rng = random.Random(1)
+
+    assert Latency(ms=20).sample(rng) == 0.02
+    uniform = Latency(distribution=Distribution.UNIFORM, ms=100, spread=50)
+    assert all(0.05 <= uniform.sample(rng) <= 0.15 for _ in range(100))
+    lognormal = Latency(distribution=Distribution.LOGNORMAL, ms=100, spread=0.5)
+    assert all(lognormal.sample(rng) > 0 for _ in range(100))
+
+
+def test_fault_profile_parses_rate_limits():
+    profile = FaultProfile.from_dict(
+        {
+            "spotify": {
+                "latency": {"distribution": "lognormal", "ms": 80, "spread": 0.4},
+                "rate_limit": {"per_second": 10},
+            }
+        }
+    )
+
+    assert profile.for_service("spotify").rate_limit == RateLimit(
+        per_second=10, burst=10
+    )
+    assert profile.for_service("github").rate_limit is None
+
+
+def test_pipeline_runs_against_the_simulator(simulator_envs):
+    simulator = Simulator(dataset=Dataset.synthetic(artists=10), seed=1)
+
+    with unthrottled_sources():
+        summary = drive(
+            url="http://simulator",
+            festivals=["wacken", "dong"],
+            http=HttpStack(transport=simulator.transport()),
+        )
+
+    assert summary["wacken"]["artists"] == 10
+    assert summary["dong"]["artists"] == 10
+    assert simulator.stats_dict()["spotify"]["requests"] == 10
+
+
+def test_pipeline_queues_retries_when_spotify_fails(simulator_envs):
+    simulator = Simulator(
+        dataset=Dataset.synthetic(artists=3),
+        faults=FaultProfile.from_dict({"spotify": {"error_rate": 1}}),
+    )
+
+    with unthrottled_sources():
+        summary = drive(
+            url="http://simulator",
+            festivals=["dong"],
+            http=HttpStack(transport=simulator.transport()),
+        )
+
+    assert summary["dong"]["retry_queue"] == 3
+    assert simulator.stats_dict()["spotify"]["statuses"] == {"503": 3}
+
+
+def test_server_serves_simulator_over_http():
+    simulator = Simulator(dataset=Dataset.synthetic(artists=2))
+
+    with SimulatorServer(simulator=simulator) as server:
+        lineup = httpx.get(f"{server.url}/festivals/wacken")
+        stats = httpx.get(f"{server.url}/_stats")
+
+    assert "Synthetic Band 00001" in lineup.text
+    assert stats.json()["festivals"]["requests"] == 1
+
+
+def test_server_serves_stub_images():
+    simulator = Simulator(dataset=Dataset.synthetic(artists=1))
+
+    with SimulatorServer(simulator=simulator) as server:
+        first = httpx.get(f"{server.url}/images/0/160")
+        again = httpx.get(f"{server.url}/images/0/160")
+        other = httpx.get(f"{server.url}/images/1/160")
+
+    assert first.headers["Content-Type"] == "image/png"
+    assert first.content.startswith(b"\x89PNG")
+    assert first.content == again.content
+    assert first.content != other.content
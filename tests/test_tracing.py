@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from src.tracing import (
+    NOOP_SPAN,
+    STATUS_ERROR,
+    FileExporter,
+    OtlpHttpExporter,
+    Tracer,
+    current_span,
+    span,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def test_spans_link_to_their_parent():
+    tracer = Tracer(exporter=ListExporter())
+
+    with tracer.activate(), span("run") as run:
+        with span("festival", festival="wacken") as festival:
+            assert current_span() is festival
+        assert current_span() is run
+
+    child, parent = tracer.finished
+    assert child.parent_span_id == parent.span_id
+    assert parent.parent_span_id is None
+    assert child.trace_id == parent.trace_id
+    assert child.attributes == {"festival": "wacken"}
+    assert parent.start_ns <= child.start_ns <= child.end_ns <= parent.end_ns
+
+
+def test_span_records_errors():
+    tracer = Tracer(exporter=ListExporter())
+
+    with pytest.raises(ValueError), tracer.span("search_artist"):
+        raise ValueError("boom")
+
+    assert tracer.finished[0].status == STATUS_ERROR
+    assert tracer.finished[0].status_message == "ValueError('boom')"
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+
+    with tracer.span("run") as run:
+        run.set_attribute("ignored", True)
+
+    assert run is NOOP_SPAN
+    assert tracer.finished == []
+
+
+def test_file_exporter_appends_otlp_json(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(exporter=FileExporter(path=str(path)))
+    with tracer.span("s3.put", **{"s3.key": "wacken.json", "s3.bytes": 2}):
+        pass
+
+    tracer.flush()
+    tracer.flush()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    resource_spans = json.loads(lines[0])["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "festival-scraper"}}
+    ]
+    exported = resource_spans["scopeSpans"][0]["spans"][0]
+    assert exported["name"] == "s3.put"
+    assert exported["attributes"] == [
+        {"key": "s3.key", "value": {"stringValue": "wacken.json"}},
+        {"key": "s3.bytes", "value": {"intValue": "2"}},
+    ]
+
+
+def test_otlp_exporter_posts_to_collector(httpx_mock):
+    httpx_mock.add_response(method="POST", url="http://collector:4318/v1/traces")
+    tracer = Tracer(exporter=OtlpHttpExporter(endpoint="http://collector:4318/"))
+    with tracer.span("run"):
+        pass
+
+    tracer.flush()
+
+    body = json.loads(httpx_mock.get_requests()[0].content)
+    assert body["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] == "run"
+
+
+def test_tracer_from_env(monkeypatch):
+    assert not Tracer.from_env().enabled
+    monkeypatch.setenv("TRACE_EXPORTER", "file:/tmp/trace.jsonl")
+    assert Tracer.from_env().exporter.path == "/tmp/trace.jsonl"
+    monkeypatch.setenv("TRACE_EXPORTER", "otlp:http://localhost:4318")
+    assert Tracer.from_env().exporter.endpoint == "http://localhost:4318"
+    monkeypatch.setenv("TRACE_EXPORTER", "zipkin")
+    with pytest.raises(ValueError):
+        Tracer.from_env()